@@ -98,6 +98,16 @@ def _register_util_routes(app: Flask) -> None:
     def healthz():
         return jsonify({"status": "ok"})
 
+    @app.get("/metrics")
+    def metrics_endpoint():
+        # формат Prometheus; METRICS_TOKEN — если /metrics не закрыт на уровне ingress
+        from .services import metrics
+
+        token = app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return jsonify({"error": "unauthorized"}), 401
+        return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
     @app.get("/readyz")
     def readyz():
         try:
@@ -142,20 +152,32 @@ def create_app(config_class: Type[Config] = Config) -> Flask:
     from .blueprints.auth import bp as auth_bp
     from .blueprints.main import bp as main_bp
     from .blueprints.admin import bp as admin_bp
+    from .blueprints.hooks import bp as hooks_bp
 
     app.register_blueprint(auth_bp)                       # /auth/...
     app.register_blueprint(main_bp)                       # /
     app.register_blueprint(admin_bp, url_prefix="/admin") # /admin/...
+    app.register_blueprint(hooks_bp)                      # /hooks/... (уведомления ExecEngine)
 
     # 5) утилитарные маршруты и обработчики ошибок
     _register_util_routes(app)
     _register_error_handlers(app)
 
-    # 6) чтобы Alembic «видел» модели
+    # 5a) замеры запросов: время, SQL, вызовы ExecEngine (см. services/metrics.py)
+    from .services import metrics, profiler
+    metrics.init_app(app)
+    profiler.configure(app.config)
+
+    # 6) CLI-команды (flask judge-worker и т.п.)
+    from .cli import register_cli
+    register_cli(app)
+
+    # 7) чтобы Alembic «видел» модели
     with app.app_context():
         from . import models  # noqa: F401
+        from .services import scoreboard  # noqa: F401  (ведёт best_scores после каждого flush)
 
-    # 7) опциональная UI-админка на Flask-Admin
+    # 8) опциональная UI-админка на Flask-Admin
     if str(app.config.get("ENABLE_FLASK_ADMIN", os.getenv("ENABLE_FLASK_ADMIN", "0"))).lower() in ("1", "true", "yes"):
         try:
             from .admin import init_admin  # ожидается, что повесит UI на /panel
@@ -1,12 +1,13 @@
 # app/admin.py
-from flask import Blueprint, request, jsonify, render_template, current_app, redirect, url_for
+from flask import Blueprint, request, jsonify, render_template, current_app, redirect, url_for, stream_with_context
 from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.actions import action
 from wtforms import ValidationError
+from werkzeug.datastructures import MultiDict
+from .services import checker, exports, results, roster, spreadsheet
+from .services import scoreboard as best_scores
 from .models import db, Discipline, Module, StudyGroup, Student, Task, TaskTest, Submission, validate_cyr_code
-import csv
-import io
 
 
 admin_bp = Blueprint('admin_extra', __name__, template_folder='templates')
@@ -59,15 +60,21 @@ class TaskTestInline(ModelView):
     can_create = True
     can_edit = True
     can_delete = True
-    column_list = ['order', 'points', 'hidden']
-    form_columns = ['order', 'input_data', 'expected_output', 'points', 'hidden']
+    column_list = ['order', 'points', 'group', 'hidden']
+    form_columns = ['order', 'input_data', 'expected_output', 'points', 'group', 'hidden']
 
 
 class TaskView(RequireAuth):
     column_list = ['module', 'title', 'order', 'max_score']
     column_filters = ['module.discipline', 'module']
     column_searchable_list = ['title', 'description']
-    inline_models = [(TaskTest, dict(form_columns=['order','input_data','expected_output','points','hidden']))]
+    inline_models = [(TaskTest, dict(form_columns=['order','input_data','expected_output','points','group','hidden']))]
+
+    def on_model_change(self, form, model, is_created):
+        try:
+            checker.validate(model.checker)
+        except ValueError as e:
+            raise ValidationError(str(e))
 
 
 class SubmissionView(RequireAuth):
@@ -107,86 +114,84 @@ def roster_import(group_id):
     f = request.files.get('file')
     if not f:
         return 'no file', 400
-    data = io.StringIO(f.stream.read().decode('utf-8'))
-    reader = csv.DictReader(data)
-    created, updated, errors = 0, 0, []
-    for i, row in enumerate(reader, start=1):
-        name = (row.get('full_name') or '').strip()
-        code = (row.get('auth_code') or '').strip().upper()
-        try:
-            validate_cyr_code(code)
-        except Exception as e:
-            errors.append(f'Строка {i}: {e}')
-            continue
-        st = Student.query.filter_by(auth_code=code).first()
-        if st:
-            st.full_name = name or st.full_name
-            st.group = group
-            updated += 1
-        else:
-            st = Student(full_name=name, group=group)
-            st.set_auth_code(code)
-            db.session.add(st)
-            created += 1
-    db.session.commit()
-    return jsonify({'created': created, 'updated': updated, 'errors': errors})
+    # ?dry_run=1 — только проверить файл и посчитать, кто будет создан/обновлён
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'yes', 'on')
+    return jsonify(roster.import_csv(f.stream, group, dry_run=dry_run))
 
 
 @admin_bp.get('/admin/groups/<int:group_id>/roster/export')
 def roster_export(group_id):
     group = StudyGroup.query.get_or_404(group_id)
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(['full_name','auth_code'])
-    for s in group.students:
-        w.writerow([s.full_name, s.auth_code])
-    return current_app.response_class(out.getvalue(), mimetype='text/csv', headers={
+    body = exports.stream('roster', 'csv', MultiDict({'group_id': group.id}))
+    return current_app.response_class(stream_with_context(body), mimetype=exports.FORMATS['csv'], headers={
         'Content-Disposition': f'attachment; filename="group_{group.id}_roster.csv"'
     })
 
 
-# === Сводная по группе/модулям ===
-@admin_bp.get('/admin/scoreboard')
-def scoreboard():
-    # Варианты фильтров: group_id, discipline_id
-    group_id = request.args.get('group_id', type=int)
-    discipline_id = request.args.get('discipline_id', type=int)
-
-
-    sql = "SELECT * FROM v_group_module_scores WHERE 1=1"
-    params = {}
-    if group_id:
-        sql += " AND group_id = :gid"; params['gid'] = group_id
-    if discipline_id:
-        sql += " AND discipline_id = :did"; params['did'] = discipline_id
-
+# === Выгрузки: roster, submissions, test_results в csv/xlsx/ndjson ===
+@admin_bp.get('/admin/export/<name>.<fmt>')
+def export(name, fmt):
+    try:
+        body = exports.stream(name, fmt, request.args)
+    except LookupError as e:
+        return str(e), 404
+    except results.BadQuery as e:
+        return str(e), 400
+    return current_app.response_class(stream_with_context(body), mimetype=exports.FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{name}.{fmt}"'
+    })
 
-    rows = db.session.execute(db.text(sql), params).mappings().all()
 
+# === Сводная по группе/модулям ===
+SCOREBOARD_PER_PAGE = 100
 
-    # перестроим в удобную матрицу: student x module
-    modules = []
-    students = {}
-    for r in rows:
-        key = (r['module_id'], r['module_name'])
-        if key not in modules:
-            modules.append(key)
-        stud = students.setdefault(r['student_id'], {
-            'student_id': r['student_id'],
-            'student_name': r['student_name'],
-            'scores': {}
-        })
-        stud['scores'][r['module_id']] = r['score']
 
+def _scoreboard_filters():
+    # Варианты фильтров: group_id, discipline_id
+    return request.args.get('group_id', type=int), request.args.get('discipline_id', type=int)
 
-    modules_sorted = sorted(modules, key=lambda x: x[0])
-    students_list = list(students.values())
 
+@admin_bp.get('/admin/scoreboard')
+def scoreboard():
+    group_id, discipline_id = _scoreboard_filters()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(500, max(1, request.args.get('per_page', SCOREBOARD_PER_PAGE, type=int)))
+
+    # столбцы — модули, строки — одна страница студентов; баллы из best_scores за один проход
+    modules = best_scores.modules_for(discipline_id)
+    student_ids, total = best_scores.students_page(group_id, page, per_page)
+    students = [
+        {'student_id': sid, 'student_name': name, 'scores': scores, 'total': row_total}
+        for sid, name, scores, row_total in best_scores.iter_matrix(modules, group_id, student_ids)
+    ]
+    groups, disciplines = best_scores.filter_choices()
 
     return render_template('admin/scoreboard.html',
-                                    groups=StudyGroup.query.all(),
-                                    disciplines=Discipline.query.all(),
-                                    modules=modules_sorted,
-                                    students=students_list,
+                                    groups=groups,
+                                    disciplines=disciplines,
+                                    modules=modules,
+                                    students=students,
                                     selected_group=group_id,
-                                    selected_discipline=discipline_id)
\ No newline at end of file
+                                    selected_discipline=discipline_id,
+                                    page=page,
+                                    pages=max(1, -(-total // per_page)),
+                                    per_page=per_page)
+
+
+@admin_bp.get('/admin/scoreboard.<fmt>')
+def scoreboard_export(fmt):
+    if fmt not in ('csv', 'xlsx'):
+        return 'unknown format', 404
+    group_id, discipline_id = _scoreboard_filters()
+    modules = best_scores.modules_for(discipline_id)
+    header = ['ФИО'] + [name for _, name in modules] + ['Итого']
+    rows = ([name, *scores, row_total] for _, name, scores, row_total in best_scores.iter_matrix(modules, group_id))
+
+    if fmt == 'csv':
+        body, mimetype = spreadsheet.stream_csv(header, rows), 'text/csv; charset=utf-8'
+    else:
+        body = spreadsheet.stream_xlsx(header, rows, sheet_name='Сводка')
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return current_app.response_class(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="scoreboard.{fmt}"'
+    })
@@ -0,0 +1,179 @@
+# app/asgi.py
+"""
+ASGI-вход: то же Flask-приложение плюс долгий опрос вердикта без занятого потока.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Flask обслуживает a2wsgi.WSGIMiddleware (пул из ASYNC_THREADS потоков). Своё здесь только
+одно — ?wait=N у студенческого API (секунд, не больше ASYNC_LONGPOLL_MAX):
+
+  POST /submit?wait=N             — поставить в очередь и дождаться вердикта;
+  GET  /submissions/<id>?wait=N   — дождаться, пока отправка перестанет быть pending.
+
+Flask отвечает как обычно (вход, права, 404 — всё там), а если отправка ещё проверяется,
+соединение ждёт в event loop: поток не держится. Вердикты выставляет judge-worker, поэтому
+ожидающих обслуживает один SubmissionWatcher на процесс — раз в ASYNC_WATCH_INTERVAL
+одним запросом к БД на всех. Не дождались — отдаём исходный ответ Flask (202 / pending).
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import re
+from typing import Optional
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+
+from .extensions import db
+from .models import Submission
+
+log = logging.getLogger(__name__)
+
+_STATUS_PATH = re.compile(r"^/submissions/(\d+)$")
+_PENDING = ("queued", "running")
+
+
+class SubmissionWatcher:
+    """Кто ждёт вердикта: sub_id -> futures; один опрос БД на всех, пока есть ожидающие."""
+
+    def __init__(self, app: Flask, interval: float, executor):
+        self.app = app
+        self.interval = interval
+        self.executor = executor  # тот же пул, что у Flask: БД не получает лишних потоков
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(v) for v in self._waiters.values())
+
+    async def wait(self, sub_id: int, timeout: float) -> Optional[dict]:
+        """to_json отправки, когда она проверена; None — не дождались за timeout."""
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(sub_id, []).append(fut)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(sub_id)
+            if waiters is not None:
+                if fut in waiters:
+                    waiters.remove(fut)
+                if not waiters:
+                    del self._waiters[sub_id]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            await asyncio.sleep(self.interval)
+            ids = list(self._waiters)
+            if not ids:
+                break
+            try:
+                done = await loop.run_in_executor(self.executor, self._finished, ids)
+            except Exception:
+                log.exception("submission watcher poll failed")
+                continue
+            self.polls += 1
+            for sub_id, data in done.items():
+                for fut in self._waiters.get(sub_id, ()):
+                    if not fut.done():
+                        fut.set_result(data)
+
+    def _finished(self, ids: list[int], chunk: int = 500) -> dict:
+        from .services.judging import to_json
+
+        out = {}
+        with self.app.app_context():
+            try:
+                for i in range(0, len(ids), chunk):
+                    for sub in (Submission.query
+                                .filter(Submission.id.in_(ids[i:i + chunk]), Submission.status.notin_(_PENDING))):
+                        out[sub.id] = to_json(sub)
+            finally:
+                db.session.remove()
+        return out
+
+
+class AsgiApp:
+    def __init__(self, app: Flask):
+        cfg = app.config
+        self.max_wait = float(cfg.get("ASYNC_LONGPOLL_MAX", 60))
+        # потоки только на время работы Flask, а не на ожидание вердикта
+        self.wsgi = WSGIMiddleware(app, workers=int(cfg.get("ASYNC_THREADS", 40)))
+        self.watcher = SubmissionWatcher(app, float(cfg.get("ASYNC_WATCH_INTERVAL", 0.25)), self.wsgi.executor)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self._long_poll_route(scope):
+            wait = self._wait_seconds(scope)
+            if wait > 0:
+                await self._long_poll(scope, wait, receive, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    def _wait_seconds(self, scope) -> float:
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("wait")
+        try:
+            return max(0.0, min(float(values[0]), self.max_wait)) if values else 0.0
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _long_poll_route(scope) -> bool:
+        path, method = scope["path"], scope["method"]
+        return (method == "POST" and path == "/submit") or (method == "GET" and bool(_STATUS_PATH.match(path)))
+
+    @staticmethod
+    async def _disconnected(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _wait_verdict(self, sub_id: int, wait: float, receive) -> Optional[dict]:
+        """Ждём вердикт, пока клиент на связи: ушёл — перестаём ждать сразу, а не по таймауту."""
+        verdict = asyncio.ensure_future(self.watcher.wait(sub_id, wait))
+        gone = asyncio.ensure_future(self._disconnected(receive))
+        await asyncio.wait({verdict, gone}, return_when=asyncio.FIRST_COMPLETED)
+        if not verdict.done():
+            verdict.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await verdict  # снимаем ожидающего с учёта до ответа
+            return None
+        gone.cancel()
+        return verdict.result()
+
+    async def _long_poll(self, scope, wait, receive, send):
+        # ответ Flask копим целиком: пока отправка в работе, его, возможно, заменит вердикт
+        start, chunks = {}, []
+
+        async def collect(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            else:
+                chunks.append(message.get("body", b""))
+
+        await self.wsgi(scope, receive, collect)
+        status, headers, payload = start["status"], list(start.get("headers", ())), b"".join(chunks)
+        data = None
+        if status in (200, 202):
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                data = None
+        if isinstance(data, dict) and data.get("id") and (status == 202 or data.get("pending")):
+            verdict = await self._wait_verdict(int(data["id"]), wait, receive)
+            if verdict is not None:
+                status, payload = 200, json.dumps({**data, **verdict}, ensure_ascii=False).encode("utf-8")
+                headers = [(k, v) for k, v in headers if k != b"content-length"]
+                headers.append((b"content-length", str(len(payload)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+
+def create_asgi_app(app: Flask) -> AsgiApp:
+    return AsgiApp(app)
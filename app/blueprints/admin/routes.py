@@ -1,11 +1,13 @@
 # app/blueprints/admin/routes.py
 
-from flask import render_template, jsonify, request, current_app, abort
+import json
+import os
+
+from flask import render_template, jsonify, request, current_app, abort, send_from_directory, stream_with_context, url_for
 from flask_login import login_required, current_user
 from jinja2 import TemplateNotFound
 
-from ...extensions import db
-from ...models import Submission, Task, Student  # Module убрал — не используется
+from ...services import profiler, results, scheduler, scoreboard
 
 from . import bp
 
@@ -43,37 +45,101 @@ def dashboard():
 @bp.get("/api/results.json")  # <-- убрали лишнее 'admin' в пути
 @login_required
 def results_json():
+    """
+    Лента отправок, новые первыми. Фильтры: student_id, group_id, task_id, module_id,
+    status (через запятую), since/until (ISO 8601). Страница — limit строк (до 1000),
+    следующая — по курсору из заголовка X-Next-Cursor (?cursor=...).
+    ?format=ndjson — вся выборка потоком, по JSON-объекту на строку.
+    """
     if not has_admin_access():
         return jsonify({"error": "forbidden"}), 403
 
-    module_id = request.args.get("module_id", type=int)
-
-    q = (
-        db.session.query(
-            Submission.id,
-            Submission.created_at,
-            Submission.status,
-            Submission.score,
-            Student.full_name.label("student"),
-            Task.title.label("task"),
-            Task.module_id.label("module_id"),
-        )
-        .join(Student, Student.id == Submission.student_id)
-        .join(Task, Task.id == Submission.task_id)
-    )
-    if module_id:
-        q = q.filter(Task.module_id == module_id)
-
-    rows = [
+    try:
+        f = results.ResultsFilter.from_args(request.args)
+        cursor = request.args.get("cursor") or None
+        if request.args.get("format") == "ndjson":
+            if cursor:
+                results.decode_cursor(cursor)  # плохой курсор — 400 до начала потока
+            rows = results.iter_all(f, cursor=cursor)
+            body = (json.dumps(results.to_json(r), ensure_ascii=False) + "\n" for r in rows)
+            return current_app.response_class(stream_with_context(body), mimetype="application/x-ndjson")
+
+        limit = min(1000, max(1, request.args.get("limit", 200, type=int)))
+        rows, next_cursor = results.page(f, limit, cursor)
+    except results.BadQuery as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify([results.to_json(r) for r in rows])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        resp.headers["Link"] = f'<{url_for(".results_json", _external=True, **args)}>; rel="next"'
+    return resp
+
+
+@bp.get("/api/queue.json")
+@login_required
+def queue_json():
+    """Глубина очереди проверки, занятость слотов ExecEngine и время ожидания."""
+    if not has_admin_access():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(scheduler.queue_metrics(current_app.config))
+
+
+@bp.get("/api/group_scores.json")
+@login_required
+def group_scores_json():
+    """Сводка по группам и модулям (из best_scores)."""
+    if not has_admin_access():
+        return jsonify({"error": "forbidden"}), 403
+    discipline_id = request.args.get("discipline_id", type=int)
+    return jsonify([
         {
-            "id": r.id,
-            "when": r.created_at.isoformat() if r.created_at else None,
-            "status": r.status,
-            "score": r.score,
-            "student": r.student,
-            "task": r.task,
+            "group_id": r.group_id,
+            "group": r.group_name,
             "module_id": r.module_id,
+            "module": r.module_name,
+            "students": r.students,
+            "avg_score": round(float(r.avg_score or 0), 2),
+            "total_score": int(r.total_score or 0),
         }
-        for r in q.order_by(Submission.created_at.desc()).limit(200).all()
-    ]
-    return jsonify(rows)
+        for r in scoreboard.group_module_scores(discipline_id=discipline_id)
+    ])
+
+
+@bp.post("/api/profile")
+@login_required
+def profile_start():
+    """
+    Включить сэмплирующий профайлер в этом воркере на ?seconds=N (по умолчанию 30).
+    &wait=1 — дождаться и вернуть collapsed stacks; иначе 202 и имя файла в PROFILE_DIR.
+    """
+    if not has_admin_access():
+        return jsonify({"error": "forbidden"}), 403
+    run = profiler.get_profiler().start(request.args.get("seconds", 30, type=float))
+    if run is None:
+        return jsonify({"error": "profiler already running"}), 409
+    if request.args.get("wait", type=int):
+        run.done.wait(run.seconds + 10)
+        return current_app.response_class(run.collapsed(), mimetype="text/plain")
+    return jsonify({"pid": os.getpid(), "seconds": run.seconds, "file": os.path.basename(run.path)}), 202
+
+
+@bp.get("/api/profiles")
+@login_required
+def profiles_list():
+    """Готовые профили всех воркеров (PROFILE_DIR общий)."""
+    if not has_admin_access():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(profiler.list_profiles())
+
+
+@bp.get("/api/profiles/<name>")
+@login_required
+def profile_download(name: str):
+    if not has_admin_access():
+        return jsonify({"error": "forbidden"}), 403
+    if not name.endswith(".folded"):
+        abort(404)
+    return send_from_directory(profiler.get_profiler().out_dir, name, mimetype="text/plain")
@@ -5,14 +5,15 @@ from flask_login import login_user, logout_user
 from ...models import Student
 from ...extensions import db, login_manager
 from ...security import normalize_code, is_valid_code
+from ...services import principals
 from . import bp  # используем уже созданный в __init__.py Blueprint (url_prefix="/auth")
 
 
 @login_manager.user_loader
 def load_user(uid: str):
     try:
-        # предпочтительно через session.get (SA2.0), но query.get тоже допустим
-        return db.session.get(Student, int(uid))
+        # снимок из подписанной сессии/кеша; в БД — только когда они устарели (см. services/principals.py)
+        return principals.load(int(uid))
     except Exception:
         return None
 
@@ -35,7 +36,9 @@ def login():
             db.session.add(student)
             db.session.commit()
 
-        login_user(student, remember=True)
+        principal = principals.Principal.of(student)
+        login_user(principal, remember=True)
+        principals.remember(principal)
 
         next_url = request.args.get("next") or url_for("main.index")
         return redirect(next_url)
@@ -47,4 +50,5 @@ def login():
 @bp.get("/logout")
 def logout():
     logout_user()
+    principals.forget()
     return redirect(url_for("auth.login"))
@@ -0,0 +1,7 @@
+#app/blueprints/hooks/__init__.py
+
+from flask import Blueprint
+
+bp = Blueprint("hooks", __name__, url_prefix="/hooks")
+
+from . import routes  # noqa: E402,F401
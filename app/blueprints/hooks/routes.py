@@ -0,0 +1,32 @@
+# app/blueprints/hooks/routes.py
+# Входящие уведомления от ExecEngine (EXECENGINE_COMPLETION=webhook).
+
+import hmac
+
+from flask import current_app, jsonify, request
+
+from ...execengine_client import get_client
+from ...services import judging
+from . import bp
+
+
+def _secret_ok() -> bool:
+    need = current_app.config.get("EXECENGINE_WEBHOOK_SECRET")
+    got = request.headers.get("X-Webhook-Secret") or request.args.get("secret") or ""
+    return bool(need) and hmac.compare_digest(got, need)
+
+
+@bp.post("/execengine")
+@bp.post("/execengine/<batch_token>")
+def execengine_batch_done(batch_token=None):
+    if not _secret_ok():
+        return jsonify({"error": "forbidden"}), 403
+
+    body = request.get_json(silent=True) or {}
+    batch_token = batch_token or body.get("batch_token") or body.get("token")
+    if not batch_token:
+        return jsonify({"error": "missing batch_token"}), 400
+
+    # уведомление только будит опрос: результат забираем обычным GET
+    sub = judging.complete_batch(get_client(), batch_token)
+    return jsonify({"batch_token": batch_token, "submission_id": sub.id if sub else None}), 202
@@ -0,0 +1,73 @@
+# app/cli.py
+"""flask-команды приложения (регистрируются в create_app)."""
+import logging
+
+import click
+from flask import Flask
+
+
+def register_cli(app: Flask) -> None:
+    @app.cli.command("judge-worker")
+    @click.option("--interval", default=0.5, show_default=True, type=float,
+                  help="Пауза между тиками, если очередь пуста (сек.)")
+    @click.option("--once", is_flag=True, help="Сделать один тик и выйти")
+    @click.option("--metrics-port", type=int, default=None, help="Отдавать /metrics воркера на этом порту")
+    def judge_worker(interval: float, once: bool, metrics_port):
+        """Воркер проверки: очередь submissions -> ExecEngine -> оценка."""
+        from .services import metrics
+        from .services.judging import run_worker
+
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        if metrics_port:
+            metrics.serve(metrics_port)
+        run_worker(interval=interval, once=once)
+
+    @app.cli.command("rescore")
+    @click.option("--task", "task_id", type=int, default=None, help="Только отправки этой задачи")
+    @click.option("--chunk", default=500, show_default=True, type=int, help="Отправок за транзакцию")
+    @click.option("--dry-run", is_flag=True, help="Только посчитать, что изменится")
+    def rescore(task_id, chunk: int, dry_run: bool):
+        """Пересчитать оценки по сохранённым результатам (без ExecEngine)."""
+        from .services.judging import rescore as do_rescore
+
+        stats = do_rescore(task_id=task_id, chunk=chunk, dry_run=dry_run)
+        click.echo(f"seen={stats['seen']} changed={stats['changed']} skipped={stats['skipped']}"
+                   + (" (dry run)" if dry_run else ""))
+
+    @app.cli.command("scoreboard-rebuild")
+    def scoreboard_rebuild():
+        """Пересобрать best_scores (сводную) по всем отправкам."""
+        from .services.scoreboard import rebuild
+
+        click.echo(f"best_scores: {rebuild()} rows")
+
+    @app.cli.command("tasks-import")
+    @click.argument("source", type=click.Path(exists=True))
+    @click.option("--force", is_flag=True, help="Перезаписать и неизменившиеся пакеты")
+    @click.option("--dry-run", is_flag=True, help="Только проверить пакеты")
+    def tasks_import(source: str, force: bool, dry_run: bool):
+        """Загрузить задачи с тестами из каталога пакетов или zip (см. services/tasks_loader.py)."""
+        from .services.tasks_loader import import_path
+
+        stats = import_path(source, force=force, dry_run=dry_run)
+        for err in stats["errors"]:
+            click.echo(f"error: {err}", err=True)
+        click.echo(f"created={stats['created']} updated={stats['updated']} unchanged={stats['unchanged']} "
+                   f"errors={len(stats['errors'])} in {stats['seconds']}s" + (" (dry run)" if dry_run else ""))
+
+    @app.cli.command("blobs-offload")
+    @click.option("--chunk", default=100, show_default=True, type=int, help="Тестов за транзакцию")
+    def blobs_offload(chunk: int):
+        """Вынести большие тесты из task_tests в хранилище (см. services/blobs.py)."""
+        from .services.blobs import offload_tests
+
+        click.echo(f"moved {offload_tests(chunk=chunk)} test fields")
+
+    @app.cli.command("results-evict")
+    @click.option("--days", type=float, default=None, help="Срок хранения (по умолчанию RAW_RESULTS_TTL_DAYS)")
+    def results_evict(days):
+        """Удалить сырые ответы ExecEngine старше срока (см. services/archive.py)."""
+        from .services.archive import evict
+
+        stats = evict(ttl_days=days)
+        click.echo(f"evicted={stats['evicted']} deleted_blobs={stats['deleted']}")
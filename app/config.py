@@ -1,9 +1,52 @@
+import configparser
 import os
 
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_execengine_ini(path: str) -> dict:
+    """Плоский словарь параметров из execengine.ini (секции игнорируем, ключи как в файле)."""
+    parser = configparser.ConfigParser(inline_comment_prefixes=("#",), interpolation=None)
+    parser.optionxform = str  # type: ignore[assignment]
+    try:
+        parser.read(path, encoding="utf-8")
+    except configparser.Error:
+        return {}
+    return {k: v for section in parser.sections() for k, v in parser.items(section)}
+
+
+EXECENGINE_INI = read_execengine_ini(os.getenv("EXECENGINE_INI", os.path.join(_ROOT, "execengine.ini")))
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "postgresql+psycopg://postgres:postgres@db:5432/execschool")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # сколько живёт снимок вошедшего студента в сессии и в кеше процесса (см. services/principals.py)
+    PRINCIPAL_TTL = int(os.getenv("PRINCIPAL_TTL", "60"))
+    # каталог задач в памяти процесса; правки из других процессов видны не позже (см. services/catalog.py)
+    TASK_CACHE_TTL = int(os.getenv("TASK_CACHE_TTL", "30"))
+    # большие тесты и сырые результаты ExecEngine — вне строк таблиц (см. services/blobs.py)
+    BLOB_BACKEND = os.getenv("BLOB_BACKEND", "fs")  # fs | pg
+    BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(_ROOT, "var", "blobs"))
+    BLOB_INLINE_BYTES = int(os.getenv("BLOB_INLINE_BYTES", str(64 * 1024)))
+    # сырые ответы ExecEngine: хранить ли (сжатыми) и сколько дней (см. services/archive.py)
+    RAW_RESULTS_KEEP = os.getenv("RAW_RESULTS_KEEP", "true").lower() == "true"
+    RAW_RESULTS_TTL_DAYS = float(os.getenv("RAW_RESULTS_TTL_DAYS", "30"))
+    # замеры запросов и /metrics (см. services/metrics.py); SLOW_REQUEST_MS=0 — без лога медленных
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "0"))
+    # сэмплирующий профайлер воркеров: /admin/api/profile или сигнал (см. services/profiler.py)
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(_ROOT, "var", "profiles"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "120"))
+    PROFILER_SIGNAL = os.getenv("PROFILER_SIGNAL", "SIGUSR2")
+    PROFILER_SIGNAL_SECONDS = float(os.getenv("PROFILER_SIGNAL_SECONDS", "30"))
+    # ASGI-вход (asgi.py): долгий опрос ?wait= без занятого потока (см. app/asgi.py)
+    ASYNC_LONGPOLL_MAX = float(os.getenv("ASYNC_LONGPOLL_MAX", "60"))
+    ASYNC_WATCH_INTERVAL = float(os.getenv("ASYNC_WATCH_INTERVAL", "0.25"))
+    ASYNC_THREADS = int(os.getenv("ASYNC_THREADS", "40"))  # потоки a2wsgi под Flask/БД
 
     # ExecEngine
     EXECENGINE_BASE_URL = os.getenv("EXECENGINE_BASE_URL", "http://execengine:8000")
@@ -16,6 +59,46 @@ class Config:
     EXECENGINE_USERNAME = os.getenv("EXECENGINE_USERNAME", "admin")
     EXECENGINE_PASSWORD = os.getenv("EXECENGINE_PASSWORD", "admin")
 
+    # Токен живёт ACCESS_TOKEN_EXPIRE_MINUTES (execengine.ini), обновляем заранее — за REFRESH_MARGIN сек.
+    EXECENGINE_TOKEN_TTL = int(os.getenv("EXECENGINE_TOKEN_TTL",
+                                         int(EXECENGINE_INI.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30)) * 60))
+    EXECENGINE_TOKEN_REFRESH_MARGIN = int(os.getenv("EXECENGINE_TOKEN_REFRESH_MARGIN", "120"))
+    # keep-alive пул соединений на процесс (≈ gunicorn threads + запас)
+    EXECENGINE_POOL_SIZE = int(os.getenv("EXECENGINE_POOL_SIZE", "10"))
+    # то же для AsyncExecEngineClientV2: соединения не держат потоков, их можно больше
+    EXECENGINE_ASYNC_POOL_SIZE = int(os.getenv("EXECENGINE_ASYNC_POOL_SIZE", "100"))
+
+    # Пропускная способность ExecEngine (execengine.ini): сколько батчей одновременно и тестов в батче
+    EE_MAX_CONCURRENT_SUBMISSIONS = int(os.getenv("EE_MAX_CONCURRENT_SUBMISSIONS",
+                                                  EXECENGINE_INI.get("MAX_CONCURRENT_SUBMISSIONS", 5)))
+    EE_MAX_BATCH_SIZE = int(os.getenv("EE_MAX_BATCH_SIZE", EXECENGINE_INI.get("MAX_BATCH_SIZE", 50)))
+    # размер куска тестов для задач в режиме fail_fast (после открытых тестов)
+    EE_FAIL_FAST_CHUNK = int(os.getenv("EE_FAIL_FAST_CHUNK", "5"))
+    # кусок, взятый в отправку (sending) дольше этого, сек., снова в очереди: воркер упал посреди HTTP
+    JUDGE_SENDING_TIMEOUT = float(os.getenv("JUDGE_SENDING_TIMEOUT", "120"))
+    # память под закодированные тесты задач на процесс (см. services/payloads.py)
+    EE_PAYLOAD_CACHE_BYTES = int(os.getenv("EE_PAYLOAD_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+    # Как узнаём о готовности батча: poll | webhook | rabbitmq (см. services/completion.py)
+    EXECENGINE_COMPLETION = os.getenv("EXECENGINE_COMPLETION", "poll")
+    EE_POLL_INITIAL = float(os.getenv("EE_POLL_INITIAL", "0.1"))  # первая проверка, сек.
+    EE_POLL_FACTOR = float(os.getenv("EE_POLL_FACTOR", "2"))
+    EE_POLL_MAX = float(os.getenv("EE_POLL_MAX", "5"))
+    EE_POLL_SAFETY = float(os.getenv("EE_POLL_SAFETY", "15"))  # страховочный опрос при push-режимах
+    # webhook: адрес, который ExecEngine вызовет по готовности, и общий секрет
+    EXECENGINE_CALLBACK_URL = os.getenv("EXECENGINE_CALLBACK_URL", "")
+    EXECENGINE_WEBHOOK_SECRET = os.getenv("EXECENGINE_WEBHOOK_SECRET", "")
+    # rabbitmq: брокер из docker-compose
+    EXECENGINE_RABBITMQ_URL = os.getenv(
+        "EXECENGINE_RABBITMQ_URL",
+        f"amqp://{EXECENGINE_INI.get('RABBITMQ_USER', 'admin')}:{EXECENGINE_INI.get('RABBITMQ_PASSWORD', 'admin')}"
+        f"@{EXECENGINE_INI.get('RABBITMQ_HOST', 'rabbitmq')}:5672/%2F",
+    )
+    EXECENGINE_RABBITMQ_QUEUE = os.getenv("EXECENGINE_RABBITMQ_QUEUE", "batch_results")
+    # Мультиплексный опрос: сколько токенов в одном GET и сколько параллельных GET, если ExecEngine так не умеет
+    EXECENGINE_STATUS_CHUNK = int(os.getenv("EXECENGINE_STATUS_CHUNK", "100"))
+    EXECENGINE_POLL_CONCURRENCY = int(os.getenv("EXECENGINE_POLL_CONCURRENCY", "4"))
+
     # Дефолтные лимиты (могут переопределяться на задаче)
     EE_TIME_LIMIT = float(os.getenv("EE_TIME_LIMIT", "2"))
     EE_EXTRA_TIME = float(os.getenv("EE_EXTRA_TIME", "0.5"))
@@ -1,67 +1,297 @@
+import asyncio
 import base64
+import json
+import os
+import threading
 import time
 from typing import Iterable, Optional
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
 
+from .services import metrics
 
+_NO_TEST = {"stdin": None, "expected_output": None}
 
 
-class ExecEngineClientV2:
+class _ExecEngineV2Base:
     """
-    Мини-клиент под ExecEngine v2:
-      - POST /auth/login/ -> {"access_token": "..."}
-      - POST /submissions/batch/ -> {"batch_token": "..."}
-      - GET  /submissions/batch/{batch_token}/ -> {"status": "...", "results": [...] }   # <-- ожидаем такой контракт
+    Общее для ExecEngineClientV2 и AsyncExecEngineClientV2 — всё, кроме самих HTTP-вызовов:
+    адреса, кодирование тела, кеш токена, выбор маршрута статуса и разбор ответов.
     """
 
-    def __init__(self, base_url: str, api_prefix: str = "/v2", timeout: int = 15,
-                 username: Optional[str] = None, password: Optional[str] = None):
+    def __init__(self, base_url: str, api_prefix: str, username: Optional[str], password: Optional[str],
+                 token_ttl: float, refresh_margin: float):
         self.base_url = base_url.rstrip("/")
         self.api = api_prefix if api_prefix.startswith("/") else f"/{api_prefix}"
-        self.timeout = timeout
         self.username = username
         self.password = password
         self._token = None
-        self._token_ts = 0
-        self._token_ttl = 60 * 25  # минут 25 (в ini по умолчанию 30)
+        self._token_ts = 0.0
+        # обновляем токен заранее, до истечения ACCESS_TOKEN_EXPIRE_MINUTES
+        self._token_ttl = max(0.0, token_ttl - refresh_margin)
+        self._status_route: Optional[str] = None  # "path" | "query", см. _get_batch
+        self._multi_status: Optional[bool] = None  # поддерживает ли ExecEngine ?batch_tokens=, см. get_many_batch_results
+
+    # ---------- адреса ----------
+
+    @property
+    def _login_url(self) -> str:
+        return f"{self.base_url}{self.api}/auth/login/"
+
+    @property
+    def _batch_url(self) -> str:
+        return f"{self.base_url}{self.api}/submissions/batch/"
+
+    def _status_request(self, batch_token: str, route: str) -> tuple[str, dict]:
+        """(url, params) GET статуса по маршруту "path" или "query"."""
+        if route == "query":
+            return self._batch_url, {"batch_token": batch_token}
+        return f"{self._batch_url}{batch_token}/", {}
+
+    def _learn_route(self, alt_ok: bool) -> bool:
+        """
+        Основной маршрут ответил 404, запасной — alt_ok. Запасной не ответил — значит неизвестен
+        сам батч, а основной маршрут верный. True — вызывающему отдать ответ запасного.
+        """
+        self._status_route = "query" if alt_ok else "path"
+        return alt_ok
+
+    # ---------- токен ----------
+
+    def _cached_token(self) -> Optional[str]:
+        if self._token and (time.monotonic() - self._token_ts) < self._token_ttl:
+            return self._token
+        return None
+
+    def _credentials(self) -> Optional[dict]:
+        if not self.username or not self.password:
+            return None
+        return {"username": self.username, "password": self.password}
+
+    def _store_token(self, data: dict, now: float) -> Optional[str]:
+        self._token = data.get("access_token")
+        self._token_ts = now
+        return self._token
+
+    def _drop_token(self, stale: str) -> None:
+        # сбрасываем только тот токен, который получил 401 (его могли уже обновить)
+        if self._token == stale:
+            self._token = None
+
+    @staticmethod
+    def _with_auth(headers: Optional[dict], token: Optional[str]) -> dict:
+        auth = {"Authorization": f"Bearer {token}"} if token else {}
+        return {**(headers or {}), **auth}
 
     # ---------- utils ----------
 
     @staticmethod
-    def _b64(s: Optional[str]) -> Optional[str]:
+    def _b64(s) -> Optional[str]:
         if s is None:
             return None
         if isinstance(s, str):
             return base64.b64encode(s.encode("utf-8")).decode("ascii")
-        raise TypeError("Expected str for base64")
+        try:
+            # bytes/mmap из хранилища тестов (services/blobs.py) — без промежуточной строки
+            return base64.b64encode(s).decode("ascii")
+        except TypeError:
+            raise TypeError("Expected str or bytes-like for base64") from None
+
+    # ---------- кодирование ----------
+
+    @staticmethod
+    def limits(
+            cfg,
+            *,
+            time_limit: Optional[float] = None,
+            extra_time: Optional[float] = None,
+            wall_time_limit: Optional[float] = None,
+            memory_limit: Optional[int] = None,
+            redirect_stderr_to_stdout: Optional[bool] = None,
+            enable_network: Optional[bool] = None,
+            max_file_size: Optional[int] = None,
+            callback_url: Optional[str] = None,
+    ) -> dict:
+        """Общие для всех тестов поля сабмишена: дефолты из конфига, явные аргументы важнее."""
+        pick = lambda value, key: cfg.get(key) if value is None else value  # noqa: E731
+        out = {
+            "compiler_options": None,
+            "command_line_args": None,
+            "time_limit": float(pick(time_limit, "EE_TIME_LIMIT")),
+            "extra_time": float(pick(extra_time, "EE_EXTRA_TIME")),
+            "wall_time_limit": float(pick(wall_time_limit, "EE_WALL_TIME_LIMIT")),
+            "memory_limit": int(pick(memory_limit, "EE_MEMORY_LIMIT")),
+            "redirect_stderr_to_stdout": bool(pick(redirect_stderr_to_stdout, "EE_REDIRECT_STDERR")),
+            "enable_network": bool(pick(enable_network, "EE_ENABLE_NETWORK")),
+            "max_file_size": int(pick(max_file_size, "EE_MAX_FILE_SIZE")),
+        }
+        cb = pick(callback_url, "EXECENGINE_CALLBACK_URL")
+        if cb:
+            out["callback_url"] = cb
+        return out
+
+    @classmethod
+    def encode_test(cls, test: dict, limits: dict) -> bytes:
+        """
+        Готовый кусок JSON одного сабмишена без language_id/source_code и без фигурных скобок:
+        b'"stdin":"...","expected_output":"...","time_limit":...'. Не зависит от кода студента,
+        поэтому его можно закешировать (см. services/payloads.py) и склеивать с исходником.
+        """
+        item = {"stdin": cls._b64(test.get("stdin")),
+                "expected_output": cls._b64(test.get("expected_output")),
+                **limits}
+        return json.dumps(item, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+
+    @classmethod
+    def encode_body(cls, language_id: int, source_code: str, fragments: list[bytes]) -> bytes:
+        """Тело POST /submissions/batch/: исходник кодируется один раз и приклеивается к каждому куску."""
+        head = b'{"language_id":%d,"source_code":"%s",' % (int(language_id),
+                                                          cls._b64(source_code).encode("ascii"))
+        return b'{"submissions":[' + b",".join(head + f + b"}" for f in fragments) + b"]}"
+
+    @classmethod
+    def _submit_body(cls, cfg, language_id: int, source_code: str, fragments: list[bytes]) -> bytes:
+        if not fragments:
+            # хотя бы один сабмишен без stdin/expected_output — на случай задач без тестов
+            fragments = [cls.encode_test(_NO_TEST, cls.limits(cfg))]
+        return cls.encode_body(language_id, source_code, fragments)
+
+    # ---------- разбор ответов ----------
+
+    @staticmethod
+    def _json(resp):
+        """JSON ответа или None (requests и httpx оба бросают ValueError)."""
+        try:
+            return resp.json()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_batch(data) -> Optional[dict]:
+        """Финальный ответ по батчу или None, если он ещё в работе."""
+        # Проверяем, является ли ответ списком (что, вероятно, является причиной ошибки)
+        if isinstance(data, list):
+            # Если это список, и в нём есть хотя бы один элемент с результатами,
+            # можно считать, что он готов. Можно скорректировать логику.
+            if any("results" in item for item in data):
+                return {"status": "FINISHED", "results": data}
 
-    def _headers(self) -> dict:
-        tok = self._get_token()
-        return {"Authorization": f"Bearer {tok}"} if tok else {}
+        # Иначе, продолжаем с оригинальной логикой для словаря
+        elif isinstance(data, dict):
+            status = (str(data.get("status", ""))).lower()
+            if "finish" in status or "done" in status or "completed" in status:
+                return data
+
+            # иногда ответ уже содержит "results" — тоже считаем финалом
+            if "results" in data:
+                return data
+
+        return None
+
+    def _multi_unsupported(self, status_code: int) -> bool:
+        """Ответ на ?batch_tokens= говорит, что ExecEngine его не знает (пока не видели обратного)."""
+        if status_code in (400, 404, 405, 422) and not self._multi_status:
+            self._multi_status = False
+        return self._multi_status is False
+
+    def _read_many(self, batch_tokens: list[str], data) -> Optional[dict]:
+        """{token: финальный JSON | None} из ответа на ?batch_tokens=; None — параметр не поддержан."""
+        items = data.get("batches") if isinstance(data, dict) else data
+        out: dict[str, Optional[dict]] = dict.fromkeys(batch_tokens)
+        known = 0
+        for item in items if isinstance(items, list) else ():
+            token = item.get("batch_token") if isinstance(item, dict) else None
+            if token in out:
+                out[token] = self._parse_batch(item)
+                known += 1
+        if not known and not self._multi_status:
+            # ответ не про наши батчи — параметр batch_tokens проигнорирован
+            self._multi_status = False
+            return None
+        self._multi_status = True
+        return out
+
+    @staticmethod
+    def _backoff(step_s: float, max_step_s: float):
+        """Паузы между опросами: step_s, 2*step_s, ... до max_step_s."""
+        delay = step_s
+        while True:
+            yield delay
+            delay = min(delay * 2, max_step_s)
+
+
+class ExecEngineClientV2(_ExecEngineV2Base):
+    """
+    Мини-клиент под ExecEngine v2:
+      - POST /auth/login/ -> {"access_token": "..."}
+      - POST /submissions/batch/ -> {"batch_token": "..."}
+      - GET  /submissions/batch/{batch_token}/ -> {"status": "...", "results": [...] }   # <-- ожидаем такой контракт
+
+    Один экземпляр на процесс (см. get_client): keep-alive Session с пулом соединений
+    и общий для всех потоков кеш токена.
+    """
+
+    def __init__(self, base_url: str, api_prefix: str = "/v2", timeout: int = 15,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 token_ttl: float = 30 * 60, refresh_margin: float = 120, pool_size: int = 10):
+        super().__init__(base_url, api_prefix, username, password, token_ttl, refresh_margin)
+        self.timeout = timeout
+        self._token_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # ---------- HTTP ----------
+
+    def _timed(self, op: str, method: str, url: str, **kwargs) -> requests.Response:
+        """HTTP-вызов с замером в services/metrics.py (op: login, submit, poll, poll_many)."""
+        started = time.perf_counter()
+        status = "error"
+        try:
+            resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            status = resp.status_code
+            return resp
+        finally:
+            metrics.observe_execengine(op, time.perf_counter() - started, status)
+
+    def _request(self, method: str, url: str, headers: Optional[dict] = None, op: str = "request",
+                 **kwargs) -> requests.Response:
+        """Запрос через общий Session; на 401 один раз перелогиниваемся и повторяем."""
+        token = self._get_token()
+        resp = self._timed(op, method, url, headers=self._with_auth(headers, token), **kwargs)
+        if resp.status_code == 401 and token:
+            self._invalidate_token(token)
+            token = self._get_token()
+            resp = self._timed(op, method, url, headers=self._with_auth(headers, token), **kwargs)
+        return resp
 
     # ---------- auth ----------
 
     def _get_token(self) -> Optional[str]:
-        # простой кеш токена, без рефрешей
-        now = time.time()
-        if self._token and (now - self._token_ts) < self._token_ttl:
-            return self._token
+        # кеш токена на процесс; логин под локом, чтобы потоки не логинились наперегонки
+        token = self._cached_token()
+        credentials = self._credentials()
+        if token or not credentials:
+            return token
 
-        if not self.username or not self.password:
-            return None
+        with self._token_lock:
+            now = time.monotonic()
+            token = self._cached_token()
+            if token:
+                return token
 
-        resp = requests.post(
-            f"{self.base_url}{self.api}/auth/login/",
-            json={"username": self.username, "password": self.password},
-            timeout=self.timeout,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        self._token = data.get("access_token")
-        self._token_ts = now
-        return self._token
+            resp = self._timed("login", "POST", self._login_url, json=credentials)
+            resp.raise_for_status()
+            return self._store_token(resp.json(), now)
+
+    def _invalidate_token(self, stale: str) -> None:
+        with self._token_lock:
+            self._drop_token(stale)
 
     # ---------- submissions ----------
 
@@ -71,119 +301,254 @@ class ExecEngineClientV2:
             language_id: int,
             source_code: str,
             tests: Optional[Iterable[dict]] = None,
-            time_limit: Optional[float] = None,
-            extra_time: Optional[float] = None,
-            wall_time_limit: Optional[float] = None,
-            memory_limit: Optional[int] = None,
-            redirect_stderr_to_stdout: Optional[bool] = None,
-            enable_network: Optional[bool] = None,
-            max_file_size: Optional[int] = None,
+            **limits,
     ) -> dict:
         """
         tests: iterable of {"stdin": str|None, "expected_output": str|None}
+        limits: time_limit, extra_time, wall_time_limit, memory_limit, redirect_stderr_to_stdout,
+                enable_network, max_file_size, callback_url (по умолчанию — из конфига).
         Возвращает {"batch_token": "..."} как в твоём примере.
         """
-        # дефолты из конфига
-        cfg = current_app.config
-        tl = cfg.get("EE_TIME_LIMIT") if time_limit is None else time_limit
-        et = cfg.get("EE_EXTRA_TIME") if extra_time is None else extra_time
-        wl = cfg.get("EE_WALL_TIME_LIMIT") if wall_time_limit is None else wall_time_limit
-        ml = cfg.get("EE_MEMORY_LIMIT") if memory_limit is None else memory_limit
-        rse = cfg.get("EE_REDIRECT_STDERR") if redirect_stderr_to_stdout is None else redirect_stderr_to_stdout
-        net = cfg.get("EE_ENABLE_NETWORK") if enable_network is None else enable_network
-        mfs = cfg.get("EE_MAX_FILE_SIZE") if max_file_size is None else max_file_size
-
-        submissions = []
-        if not tests:
-            # хотя бы один сабмишен без stdin/expected_output — на случай задач без тестов
-            tests = [{"stdin": None, "expected_output": None}]
-
-        sc_b64 = self._b64(source_code)
-        for t in tests:
-            sub = {
-                "language_id": int(71),
-                "source_code": sc_b64,
-                "stdin": self._b64(t.get("stdin")),
-                "expected_output": self._b64(t.get("expected_output")),
-                "compiler_options": None,
-                "command_line_args": None,
-                "time_limit": float(tl),
-                "extra_time": float(et),
-                "wall_time_limit": float(wl),
-                "memory_limit": int(ml),
-                "redirect_stderr_to_stdout": bool(rse),
-                "enable_network": bool(net),
-                "max_file_size": int(mfs),
-            }
-            submissions.append(sub)
-
-        payload = {"submissions": submissions}
-        r = requests.post(
-            f"{self.base_url}{self.api}/submissions/batch/",
-            json=payload,
-            headers=self._headers(),
-            timeout=self.timeout,
-        )
+        common = self.limits(current_app.config, **limits)
+        return self.submit_encoded(language_id=language_id, source_code=source_code,
+                                   fragments=[self.encode_test(t, common) for t in tests or ()])
+
+    def submit_encoded(self, *, language_id: int, source_code: str, fragments: list[bytes]) -> dict:
+        """
+        То же, что submit_batch, но тесты уже закодированы encode_test: тело запроса —
+        склейка готовых байтов, по тестам только один раз кодируется исходник.
+        """
+        body = self._submit_body(current_app.config, language_id, source_code, fragments)
+        r = self._request("POST", self._batch_url, data=body, op="submit",
+                          headers={"Content-Type": "application/json"})
         r.raise_for_status()
         return r.json()  # ожидаем {"batch_token": "..."}
 
-    def wait_batch_results(self, batch_token: str, max_wait_s: float = 8.0, step_s: float = 0.5) -> dict:
+    # ---------- статус батча ----------
+
+    def _get_batch(self, batch_token: str) -> requests.Response:
         """
-        Небольшой опрос результата батча.
-        Ожидаем контракт вида {"status": "FINISHED", "results": [...] }
-        Если контракт иной — вернём что получилось (raw JSON), не упадём.
+        GET статуса батча. ExecEngine разных сборок отдаёт его либо по /submissions/batch/{token}/,
+        либо по /submissions/batch/?batch_token=. Какой маршрут рабочий, выясняем одной пробой
+        на 404 и запоминаем на весь процесс (клиент и так один на процесс, см. get_client).
         """
-        url = f"{self.base_url}{self.api}/submissions/batch/{batch_token}/"
-        deadline = time.time() + max_wait_s
-        last = None
-        while time.time() < deadline:
-            resp = requests.get(url, headers=self._headers(), timeout=self.timeout)
-
-            # на случай иного роутинга — один бэкап-вариант (можно убрать, если не нужен)
+        url, params = self._status_request(batch_token, self._status_route or "path")
+        resp = self._request("GET", url, params=params, op="poll")
+        if self._status_route is None:
             if resp.status_code == 404:
-                resp = requests.get(f"{self.base_url}{self.api}/submissions/batch/?batch_token={batch_token}",
-                                    headers=self._headers(), timeout=self.timeout)
+                url, params = self._status_request(batch_token, "query")
+                alt = self._request("GET", url, params=params, op="poll")
+                return alt if self._learn_route(alt.ok) else resp
+            self._status_route = "path"
+        return resp
 
-            if resp.ok:
-                try:
-                    data = resp.json()
-                    last = data
-                except requests.exceptions.JSONDecodeError:
-                    # Если ответ не JSON, просто пропускаем и ждём следующего
-                    time.sleep(step_s)
-                    continue
+    def get_batch_results(self, batch_token: str) -> Optional[dict]:
+        """
+        Один опрос батча без ожидания.
+        Возвращает финальный JSON ({"status": "FINISHED", "results": [...]}) или None, если батч ещё в работе.
+        """
+        resp = self._get_batch(batch_token)
+        if not resp.ok:
+            return None
+        return self._parse_batch(self._json(resp))  # не JSON — считаем, что батч ещё не готов
 
-                # Проверяем, является ли ответ списком (что, вероятно, является причиной ошибки)
-                if isinstance(data, list):
-                    # Если это список, и в нём есть хотя бы один элемент с результатами,
-                    # можно считать, что он готов. Можно скорректировать логику.
-                    if any("results" in item for item in data):
-                        return {"status": "FINISHED", "results": data}
+    def get_many_batch_results(self, batch_tokens: list[str]) -> Optional[dict]:
+        """
+        Статусы нескольких батчей одним запросом: GET /submissions/batch/?batch_tokens=a,b,c
+        -> [{"batch_token": ..., "status": ..., "results": [...]}, ...] (или {"batches": [...]}).
+        Возвращает {token: финальный JSON | None}; None целиком — ExecEngine так не умеет
+        (выясняем один раз на процесс, дальше вызывающий опрашивает по одному).
+        """
+        if self._multi_status is False:
+            return None
+        if not batch_tokens:
+            return {}
+
+        resp = self._request("GET", self._batch_url, params={"batch_tokens": ",".join(batch_tokens)},
+                             op="poll_many")
+        if self._multi_unsupported(resp.status_code):
+            return None
+        resp.raise_for_status()
+        return self._read_many(batch_tokens, self._json(resp))
+
+    def wait_batch_results(self, batch_token: str, max_wait_s: float = 8.0,
+                           step_s: float = 0.05, max_step_s: float = 1.0) -> dict:
+        """
+        Синхронное ожидание батча с экспоненциальной паузой (step_s, 2*step_s, ... до max_step_s):
+        быстрые батчи забираем почти сразу, долгие не заваливаем запросами.
+        Если за max_wait_s батч не готов — вернём {"status": "PENDING", ...}, не упадём.
+        """
+        deadline = time.monotonic() + max_wait_s
+        for delay in self._backoff(step_s, max_step_s):
+            data = self.get_batch_results(batch_token)
+            if data is not None:
+                return data
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            time.sleep(min(delay, left))
+
+        return {"status": "PENDING", "batch_token": batch_token}
+
+
+class AsyncExecEngineClientV2(_ExecEngineV2Base):
+    """
+    Асинхронный двойник ExecEngineClientV2 на httpx: тот же контракт, кеш токена, повтор на 401
+    и выбор маршрутов (общая часть — _ExecEngineV2Base), но ожидание ответа ExecEngine
+    не держит поток — в одном event loop живут тысячи опросов.
+    Один экземпляр на event loop (httpx.AsyncClient к нему привязан); закрывать — aclose().
+    """
+
+    def __init__(self, base_url: str, api_prefix: str = "/v2", timeout: float = 15,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 token_ttl: float = 30 * 60, refresh_margin: float = 120, pool_size: int = 100,
+                 config: Optional[dict] = None):
+        super().__init__(base_url, api_prefix, username, password, token_ttl, refresh_margin)
+        self.config = dict(config or {})  # дефолтные лимиты (EE_TIME_LIMIT и т.п.) без current_app
+        self._token_lock = asyncio.Lock()
+        # keep-alive пул: соединения не держат потоков, поэтому он больше, чем у Session
+        self.http = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    @classmethod
+    def from_config(cls, cfg) -> "AsyncExecEngineClientV2":
+        return cls(
+            base_url=cfg["EXECENGINE_BASE_URL"],
+            api_prefix=cfg.get("EXECENGINE_API_PREFIX", "/v2"),
+            timeout=cfg.get("EXECENGINE_TIMEOUT", 15),
+            username=cfg.get("EXECENGINE_USERNAME"),
+            password=cfg.get("EXECENGINE_PASSWORD"),
+            token_ttl=cfg.get("EXECENGINE_TOKEN_TTL", 30 * 60),
+            refresh_margin=cfg.get("EXECENGINE_TOKEN_REFRESH_MARGIN", 120),
+            pool_size=cfg.get("EXECENGINE_ASYNC_POOL_SIZE", 100),
+            config=cfg,
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _timed(self, op: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            resp = await self.http.request(method, url, **kwargs)
+            status = resp.status_code
+            return resp
+        finally:
+            metrics.observe_execengine(op, time.perf_counter() - started, status)
+
+    async def _request(self, method: str, url: str, headers: Optional[dict] = None, op: str = "request",
+                       **kwargs) -> httpx.Response:
+        """Как ExecEngineClientV2._request: на 401 один раз перелогиниваемся и повторяем."""
+        token = await self._get_token()
+        resp = await self._timed(op, method, url, headers=self._with_auth(headers, token), **kwargs)
+        if resp.status_code == 401 and token:
+            self._drop_token(token)
+            token = await self._get_token()
+            resp = await self._timed(op, method, url, headers=self._with_auth(headers, token), **kwargs)
+        return resp
+
+    async def _get_token(self) -> Optional[str]:
+        # логин под asyncio.Lock: одновременные корутины не логинятся наперегонки
+        token = self._cached_token()
+        credentials = self._credentials()
+        if token or not credentials:
+            return token
+        async with self._token_lock:
+            now = time.monotonic()
+            token = self._cached_token()
+            if token:
+                return token
+            resp = await self._timed("login", "POST", self._login_url, json=credentials)
+            resp.raise_for_status()
+            return self._store_token(resp.json(), now)
+
+    async def submit_batch(self, *, language_id: int, source_code: str,
+                           tests: Optional[Iterable[dict]] = None, **limits) -> dict:
+        common = self.limits(self.config, **limits)
+        return await self.submit_encoded(language_id=language_id, source_code=source_code,
+                                         fragments=[self.encode_test(t, common) for t in tests or ()])
 
-                    # Если нужно, можно добавить более сложную логику проверки статуса
-                    # Например, `if all("status" in item and item["status"] == "FINISHED" for item in data):`
+    async def submit_encoded(self, *, language_id: int, source_code: str, fragments: list[bytes]) -> dict:
+        body = self._submit_body(self.config, language_id, source_code, fragments)
+        r = await self._request("POST", self._batch_url, content=body, op="submit",
+                                headers={"Content-Type": "application/json"})
+        r.raise_for_status()
+        return r.json()
+
+    async def _get_batch(self, batch_token: str) -> httpx.Response:
+        url, params = self._status_request(batch_token, self._status_route or "path")
+        resp = await self._request("GET", url, params=params, op="poll")
+        if self._status_route is None:
+            if resp.status_code == 404:
+                url, params = self._status_request(batch_token, "query")
+                alt = await self._request("GET", url, params=params, op="poll")
+                return alt if self._learn_route(alt.is_success) else resp
+            self._status_route = "path"
+        return resp
 
-                # Иначе, продолжаем с оригинальной логикой для словаря
-                elif isinstance(data, dict):
-                    status = (str(data.get("status", ""))).lower()
-                    if "finish" in status or "done" in status or "completed" in status:
-                        return data
+    async def get_batch_results(self, batch_token: str) -> Optional[dict]:
+        resp = await self._get_batch(batch_token)
+        if not resp.is_success:
+            return None
+        return self._parse_batch(self._json(resp))
 
-                    # иногда ответ уже содержит "results" — тоже считаем финалом
-                    if "results" in data:
-                        return data
+    async def get_many_batch_results(self, batch_tokens: list[str]) -> Optional[dict]:
+        """См. ExecEngineClientV2.get_many_batch_results."""
+        if self._multi_status is False:
+            return None
+        if not batch_tokens:
+            return {}
+        resp = await self._request("GET", self._batch_url, params={"batch_tokens": ",".join(batch_tokens)},
+                                   op="poll_many")
+        if self._multi_unsupported(resp.status_code):
+            return None
+        resp.raise_for_status()
+        return self._read_many(batch_tokens, self._json(resp))
 
-            time.sleep(step_s)
+    async def wait_batch_results(self, batch_token: str, max_wait_s: float = 8.0,
+                                 step_s: float = 0.05, max_step_s: float = 1.0) -> dict:
+        deadline = time.monotonic() + max_wait_s
+        for delay in self._backoff(step_s, max_step_s):
+            data = await self.get_batch_results(batch_token)
+            if data is not None:
+                return data
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            await asyncio.sleep(min(delay, left))
+        return {"status": "PENDING", "batch_token": batch_token}
 
-        return last or {"status": "PENDING", "batch_token": batch_token}
+_client_lock = threading.Lock()
 
 
 def get_client() -> ExecEngineClientV2:
-    cfg = current_app.config
-    return ExecEngineClientV2(
-        base_url=cfg["EXECENGINE_BASE_URL"],
-        api_prefix=cfg.get("EXECENGINE_API_PREFIX", "/v2"),
-        timeout=cfg.get("EXECENGINE_TIMEOUT", 15),
-        username=cfg.get("EXECENGINE_USERNAME"),
-        password=cfg.get("EXECENGINE_PASSWORD"),
-    )
+    """Долгоживущий клиент на процесс (после fork gunicorn'а создаётся заново)."""
+    ext = current_app.extensions
+    client = ext.get("execengine_client")
+    if client is not None and ext.get("execengine_client_pid") == os.getpid():
+        return client
+
+    with _client_lock:
+        client = ext.get("execengine_client")
+        if client is None or ext.get("execengine_client_pid") != os.getpid():
+            cfg = current_app.config
+            client = ExecEngineClientV2(
+                base_url=cfg["EXECENGINE_BASE_URL"],
+                api_prefix=cfg.get("EXECENGINE_API_PREFIX", "/v2"),
+                timeout=cfg.get("EXECENGINE_TIMEOUT", 15),
+                username=cfg.get("EXECENGINE_USERNAME"),
+                password=cfg.get("EXECENGINE_PASSWORD"),
+                token_ttl=cfg.get("EXECENGINE_TOKEN_TTL", 30 * 60),
+                refresh_margin=cfg.get("EXECENGINE_TOKEN_REFRESH_MARGIN", 120),
+                pool_size=cfg.get("EXECENGINE_POOL_SIZE", 10),
+            )
+            ext["execengine_client"] = client
+            ext["execengine_client_pid"] = os.getpid()
+    return client
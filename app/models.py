@@ -1,10 +1,13 @@
 # app/models.py
 from datetime import datetime
+from itertools import chain
 import re
 from flask_login import UserMixin
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, deferred, validates
 
 # Если ты используешь app/extensions.py с db = SQLAlchemy(), то лучше так:
 try:
@@ -93,6 +96,15 @@ class Task(db.Model):
     examples = db.Column(JSONB, default=list)  # список {input, output, note}
     order = db.Column(db.Integer, default=1)
     max_score = db.Column(db.Integer, default=100)
+    # растёт при любом изменении тестов задачи (см. _bump_tests_version) — штамп для кеша вердиктов
+    tests_version = db.Column(db.Integer, default=1, nullable=False)
+    # full — все тесты сразу; fail_fast — сначала открытые тесты, затем кусками, до первой ошибки
+    judging_mode = db.Column(db.String(16), default="full", nullable=False)
+    # сравнение вывода: exact | tokens | float[:eps] (см. services/checker.py)
+    checker = db.Column(db.String(32), default="exact", nullable=False)
+    # задача из пакета (services/tasks_loader.py): имя пакета и sha256 его содержимого
+    package = db.Column(db.String(120), unique=True)
+    package_hash = db.Column(db.String(64))
 
     tests = db.relationship(
         "TaskTest",
@@ -109,10 +121,23 @@ class TaskTest(db.Model):
         db.Integer, db.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
     )
     order = db.Column(db.Integer, default=1)
-    input_data = db.Column(db.Text, nullable=False)
-    expected_output = db.Column(db.Text, nullable=False)
+    # данные тестов грузятся только по требованию: списки тестов (task.tests) остаются лёгкими
+    input_data = deferred(db.Column(db.Text), group="data")
+    expected_output = deferred(db.Column(db.Text), group="data")
+    # большие данные — во внешнем хранилище, здесь sha256 (см. services/blobs.py); тогда *_data пусто
+    input_blob = db.Column(db.String(64))
+    output_blob = db.Column(db.String(64))
     points = db.Column(db.Integer, default=0)
     hidden = db.Column(db.Boolean, default=True)  # скрыто от студента
+    # подзадача: баллы тестов одной группы начисляются, только если прошли все (см. scoring.py)
+    group = db.Column(db.String(32))
+
+    @validates("input_data", "expected_output")
+    def _inline_wins(self, key, value):
+        # правка текста в админке заменяет данные из хранилища
+        if value:
+            setattr(self, "input_blob" if key == "input_data" else "output_blob", None)
+        return value
 
 
 # === Отправки (интеграция с ExecEngine) ===
@@ -127,11 +152,17 @@ class Submission(db.Model):
     )
     code = db.Column(db.Text, nullable=False)
     language = db.Column(db.String(32), default="python")
-    status = db.Column(db.String(32), default="queued")  # queued/running/ok/failed
+    language_id = db.Column(db.Integer)  # id языка в ExecEngine
+    status = db.Column(db.String(32), default="queued", index=True)  # queued/running/OK/PARTIAL/WA/error
     score = db.Column(db.Integer, default=0)
     runtime_ms = db.Column(db.Integer, default=0)
     result = db.Column(JSONB, default=dict)  # произвольный JSON от EE
+    # сырые results ExecEngine, если не влезли в BLOB_INLINE_BYTES (см. services/blobs.py)
+    result_blob = db.Column(db.String(64))
+    cache_key = db.Column(db.String(64), index=True)  # см. services/verdict_cache.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # когда планировщик взял из очереди (ожидание = started_at - created_at)
+    judged_at = db.Column(db.DateTime)
 
     student = db.relationship(
         "Student", backref=db.backref("submissions", cascade="all, delete-orphan")
@@ -140,4 +171,80 @@ class Submission(db.Model):
         "Task", backref=db.backref("submissions", cascade="all, delete-orphan")
     )
 
+    # ленты отправок листаются по (created_at, id), см. services/results.py
+    __table_args__ = (
+        db.Index("ix_submissions_created_at_id", "created_at", "id"),
+        db.Index("ix_submissions_student_created", "student_id", "created_at", "id"),
+        db.Index("ix_submissions_task_created", "task_id", "created_at", "id"),
+        db.Index("ix_submissions_status_created", "status", "created_at", "id"),
+    )
+
+    @property
+    def is_pending(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class SubmissionBatch(db.Model):
+    """Кусок тестов отправки, ушедший в ExecEngine одним батчем (не больше MAX_BATCH_SIZE тестов)."""
+    __tablename__ = "submission_batches"
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(
+        db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    part = db.Column(db.Integer, nullable=False, default=0)  # порядковый номер куска
+    first_test = db.Column(db.Integer, nullable=False, default=0)  # индекс первого теста куска
+    n_tests = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(16), default="pending", index=True)  # held/pending/sending/running/done/skipped
+    batch_token = db.Column(db.String(64), index=True)
+    results = db.Column(JSONB(none_as_null=True))  # results из ответа ExecEngine, пока не собраны все куски
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    submission = db.relationship(
+        "Submission",
+        backref=db.backref("batches", cascade="all, delete-orphan", order_by="SubmissionBatch.part"),
+    )
+
+class Blob(db.Model):
+    """Large object Postgres под sha256 (бэкенд pg в services/blobs.py)."""
+    __tablename__ = "blobs"
+    sha256 = db.Column(db.String(64), primary_key=True)
+    oid = db.Column(db.BigInteger, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class BestScore(db.Model):
+    """Лучший результат студента по задаче — источник сводной (ведётся services/scoreboard.py)."""
+    __tablename__ = "best_scores"
+    student_id = db.Column(
+        db.Integer, db.ForeignKey("students.id", ondelete="CASCADE"), primary_key=True
+    )
+    task_id = db.Column(
+        db.Integer, db.ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(32))
+    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id", ondelete="SET NULL"))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_tests_version(session, flush_context, instances):
+    """Любое добавление/правка/удаление TaskTest увеличивает Task.tests_version."""
+    tasks = set()
+    with session.no_autoflush:
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if not isinstance(obj, TaskTest):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            task = obj.task or (obj.task_id and session.get(Task, obj.task_id))
+            if task is not None:
+                tasks.add(task)
+    for task in tasks:
+        task.tests_version = (task.tests_version or 0) + 1
+
+
 # Под сводки — будем делать SQL VIEW в миграциях (см. alembic script), из приложения читать обычным SELECT.
@@ -0,0 +1,90 @@
+# app/services/archive.py
+"""
+Холодное хранилище сырых ответов ExecEngine.
+
+В Submission.result остаётся только компактная сводка по тестам (scoring.TEST_COLUMNS),
+а полный results (stdout в base64 на каждый тест) нужен редко — для разбора и для
+`flask rescore`. Он сжимается zlib и кладётся в хранилище (services/blobs.py),
+в строке — Submission.result_blob. RAW_RESULTS_KEEP=false — не хранить вовсе.
+
+Срок хранения — RAW_RESULTS_TTL_DAYS: `flask results-evict` отвязывает старые ответы
+и удаляет блобы, на которые больше никто не ссылается. Пересчитать такие отправки
+rescore уже не сможет (они попадут в skipped). Проверка ссылок и удаление идут под
+lock_blobs, как и разделение блоба кешем вердиктов (verdict_cache.copy_verdict):
+иначе копия могла бы сослаться на блоб, который тут же удалят.
+"""
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import Submission, TaskTest
+from . import blobs
+from .locks import xact_lock
+
+_PENDING = ("queued", "running")
+_BLOB_LOCK = 0x626C6F62  # ключ advisory lock Postgres ("blob")
+
+
+def lock_blobs() -> None:
+    """Замок до конца транзакции: ссылки на блобы сырых ответов не меняются под evict."""
+    xact_lock(_BLOB_LOCK)
+
+
+def put(results: list) -> Optional[str]:
+    """Сохранить results; sha256 блоба или None, если сырые ответы не храним."""
+    if not current_app.config.get("RAW_RESULTS_KEEP", True):
+        return None
+    data = json.dumps(results, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return blobs.get_store().put(zlib.compress(data, 6))
+
+
+def get(digest: str) -> Optional[list]:
+    """results по sha256; None, если блоб уже удалён."""
+    try:
+        data = blobs.get_store().read(digest)
+    except FileNotFoundError:
+        return None
+    if data[:1] not in (b"[", b"{"):  # несжатые — записанные до сжатия
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def _referenced(digest: str) -> bool:
+    return db.session.query(
+        db.exists().where(Submission.result_blob == digest)
+        | db.exists().where((TaskTest.input_blob == digest) | (TaskTest.output_blob == digest))
+    ).scalar()
+
+
+def evict(ttl_days: Optional[float] = None, chunk: int = 1000) -> dict:
+    """Отвязать сырые ответы старше срока и удалить осиротевшие блобы."""
+    if ttl_days is None:
+        ttl_days = current_app.config.get("RAW_RESULTS_TTL_DAYS", 30)
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+    store = blobs.get_store()
+    stats = {"evicted": 0, "deleted": 0}
+    last_id = 0
+    while True:
+        rows = (db.session.query(Submission.id, Submission.result_blob)
+                .filter(Submission.id > last_id, Submission.result_blob.isnot(None),
+                        Submission.created_at < cutoff, Submission.status.notin_(_PENDING))
+                .order_by(Submission.id).limit(chunk).all())
+        if not rows:
+            return stats
+        last_id = rows[-1].id
+        db.session.execute(db.update(Submission)
+                           .where(Submission.id.in_([r.id for r in rows]))
+                           .values(result_blob=None))
+        db.session.commit()
+        stats["evicted"] += len(rows)
+        # удаляем после commit: если он не прошёл, ссылки на блобы остались бы висячими
+        lock_blobs()
+        for digest in {r.result_blob for r in rows}:
+            if not _referenced(digest):
+                store.delete(digest)
+                stats["deleted"] += 1
+        db.session.commit()
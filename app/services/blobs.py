@@ -0,0 +1,237 @@
+# app/services/blobs.py
+"""
+Хранилище больших данных вне строк таблиц, адресуемое содержимым (sha256).
+
+Тесты (TaskTest.input_data/expected_output) крупнее BLOB_INLINE_BYTES и сжатые сырые
+ответы ExecEngine (services/archive.py) кладутся сюда, а в строке остаётся только хеш
+(TaskTest.input_blob/output_blob, Submission.result_blob).
+Одинаковое содержимое хранится один раз — в том числе одинаковые тесты разных задач.
+
+Бэкенды (BLOB_BACKEND):
+  fs — файлы BLOB_DIR/ab/cd/<sha256>; чтение через mmap, без копии в память процесса;
+  pg — large objects Postgres, учёт в таблице blobs (sha256 -> oid), чтение кусками.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import Blob, TaskTest
+
+_CHUNK = 1024 * 1024
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class BlobStore(ABC):
+    """Основа бэкендов; неполный бэкенд не создастся (TypeError), а не упадёт на первом вызове."""
+
+    name = "base"
+
+    @abstractmethod
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        ...
+
+    @abstractmethod
+    def view(self, digest: str) -> Buffer:
+        """Содержимое целиком как буфер (bytes или mmap) — годится для base64 без копии в str."""
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        ...
+
+    def put(self, data: bytes) -> str:
+        return self.put_stream((data,))
+
+    def read(self, digest: str) -> bytes:
+        with self.open(digest) as f:
+            return f.read()
+
+
+class FsBlobStore(BlobStore):
+    name = "fs"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".put-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    h.update(chunk)
+                    f.write(chunk)
+            digest = h.hexdigest()
+            path = self.path(digest)
+            if os.path.exists(path):
+                os.unlink(tmp)  # уже есть — дедупликация
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+            return digest
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self.path(digest), "rb")
+
+    def view(self, digest: str) -> Buffer:
+        with self.open(digest) as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""  # пустой файл mmap не отображает
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def delete(self, digest: str) -> None:
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+
+class _LargeObjectReader:
+    """Файлоподобное чтение large object кусками через lo_get."""
+
+    def __init__(self, oid: int, size: int):
+        self.oid, self.size, self.pos = oid, size, 0
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self.pos
+        n = min(n, self.size - self.pos)
+        if n <= 0:
+            return b""
+        data = db.session.execute(db.text("SELECT lo_get(:oid, :off, :n)"),
+                                  {"oid": self.oid, "off": self.pos, "n": n}).scalar_one()
+        self.pos += len(data)
+        return bytes(data)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PgBlobStore(BlobStore):
+    """Large objects в той же БД и транзакции, что и строки, которые на них ссылаются."""
+
+    name = "pg"
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        h = hashlib.sha256()
+        oid = db.session.execute(db.text("SELECT lo_create(0)")).scalar_one()
+        size = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            h.update(chunk)
+            db.session.execute(db.text("SELECT lo_put(:oid, :off, :data)"),
+                               {"oid": oid, "off": size, "data": chunk})
+            size += len(chunk)
+        digest = h.hexdigest()
+        if db.session.get(Blob, digest) is not None:
+            db.session.execute(db.text("SELECT lo_unlink(:oid)"), {"oid": oid})
+        else:
+            db.session.add(Blob(sha256=digest, oid=oid, size=size))
+            db.session.flush()
+        return digest
+
+    def _blob(self, digest: str) -> Blob:
+        blob = db.session.get(Blob, digest)
+        if blob is None:
+            raise FileNotFoundError(digest)
+        return blob
+
+    def open(self, digest: str) -> BinaryIO:
+        blob = self._blob(digest)
+        return _LargeObjectReader(blob.oid, blob.size)
+
+    def view(self, digest: str) -> Buffer:
+        return self.read(digest)
+
+    def delete(self, digest: str) -> None:
+        blob = db.session.get(Blob, digest)
+        if blob is not None:
+            db.session.execute(db.text("SELECT lo_unlink(:oid)"), {"oid": blob.oid})
+            db.session.delete(blob)
+
+
+def get_store() -> BlobStore:
+    store = current_app.extensions.get("blob_store")
+    if store is None:
+        cfg = current_app.config
+        backend = cfg.get("BLOB_BACKEND", "fs")
+        if backend == "pg":
+            store = PgBlobStore()
+        elif backend == "fs":
+            store = FsBlobStore(cfg["BLOB_DIR"])
+        else:
+            raise RuntimeError(f"BLOB_BACKEND: unknown backend {backend!r}")
+        current_app.extensions["blob_store"] = store
+    return store
+
+
+def inline_limit() -> int:
+    return int(current_app.config.get("BLOB_INLINE_BYTES", 64 * 1024))
+
+
+def file_chunks(f: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------- тесты задач ----------
+
+def task_test_data(inline: Optional[str], digest: Optional[str]) -> Union[str, Buffer, None]:
+    """Вход или эталон теста: строка из строки таблицы или буфер из хранилища."""
+    if digest and not inline:
+        return get_store().view(digest)
+    return inline
+
+
+def offload_tests(chunk: int = 100) -> int:
+    """Перенести в хранилище уже лежащие в строках большие тесты; возвращает число перенесённых полей."""
+    limit = inline_limit()
+    store = get_store()
+    moved, last_id = 0, 0
+    while True:
+        rows = (db.session.query(TaskTest.id, TaskTest.input_data, TaskTest.expected_output)
+                .filter(TaskTest.id > last_id,
+                        db.or_(db.func.length(TaskTest.input_data) > limit,
+                               db.func.length(TaskTest.expected_output) > limit))
+                .order_by(TaskTest.id).limit(chunk).all())
+        if not rows:
+            return moved
+        for test_id, input_data, expected_output in rows:
+            last_id = test_id
+            values = {}
+            for data, column, blob in ((input_data, "input_data", "input_blob"),
+                                       (expected_output, "expected_output", "output_blob")):
+                if data is not None and len(data) > limit:
+                    values[column], values[blob] = None, store.put(data.encode("utf-8"))
+                    moved += 1
+            # мимо ORM: tests_version не меняется — содержимое тестов то же
+            db.session.execute(db.update(TaskTest).where(TaskTest.id == test_id).values(**values))
+        db.session.commit()
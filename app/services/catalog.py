@@ -0,0 +1,146 @@
+# app/services/catalog.py
+"""
+Каталог задач в памяти процесса — для index и submit.
+
+Задачи во время занятия почти не меняются, а submit/index читали Task (и лениво его
+тесты) на каждый запрос. Здесь храним задачу — TaskInfo с кортежем TaskTestInfo (без самих
+данных тестов: они бывают по мегабайту и нужны только воркеру), неизменяемые, со __slots__ —
+и отдаём без запросов к БД.
+
+Инвалидация — счётчик версии на процесс: его поднимает любой flush с Task/TaskTest
+(TaskView, загрузчик задач) или явный bump(); записи со старой версией не находятся.
+Правки из других процессов видны не позже чем через TASK_CACHE_TTL.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import Task, TaskTest
+
+
+@dataclass(frozen=True, slots=True)
+class TaskTestInfo:
+    id: int
+    order: int
+    points: int
+    hidden: bool
+    group: Optional[str]
+
+    @classmethod
+    def of(cls, t: TaskTest) -> "TaskTestInfo":
+        return cls(t.id, t.order or 0, t.points or 0, bool(t.hidden), t.group)
+
+
+@dataclass(frozen=True, slots=True)
+class TaskInfo:
+    """Снимок Task: те же имена полей, так что годится везде, где задачу только читают."""
+    id: int
+    module_id: int
+    title: str
+    description: str
+    input_format: str
+    output_format: str
+    examples: tuple
+    order: int
+    max_score: int
+    tests_version: int
+    judging_mode: str
+    checker: str
+    tests: tuple  # TaskTestInfo в порядке TaskTest.order
+
+    @classmethod
+    def of(cls, task: Task) -> "TaskInfo":
+        return cls(task.id, task.module_id, task.title, task.description, task.input_format or "",
+                   task.output_format or "", tuple(task.examples or ()), task.order or 0,
+                   task.max_score or 0, task.tests_version, task.judging_mode, task.checker,
+                   tuple(TaskTestInfo.of(t) for t in task.tests))
+
+
+class TaskCatalog:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._items: dict[int, tuple[int, float, Optional[TaskInfo]]] = {}  # id -> (версия, до, задача)
+        self._first: Optional[tuple[int, float, Optional[int]]] = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._items.clear()
+            self._first = None
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and entry[0] == self.version and entry[1] > time.monotonic()
+
+    def get(self, task_id: int) -> Optional[TaskInfo]:
+        entry = self._items.get(task_id)
+        if self._fresh(entry):
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        version = self.version
+        task = Task.query.options(selectinload(Task.tests)).filter(Task.id == task_id).one_or_none()
+        info = TaskInfo.of(task) if task is not None else None
+        with self._lock:
+            if version == self.version:  # пока читали, могли поднять версию — тогда не кладём
+                self._items[task_id] = (version, time.monotonic() + self.ttl, info)
+        return info
+
+    def first_id(self) -> Optional[int]:
+        entry = self._first
+        if self._fresh(entry):
+            return entry[2]
+        version = self.version
+        row = Task.query.with_entities(Task.id).order_by(Task.id.asc()).first()
+        first = row[0] if row else None
+        with self._lock:
+            if version == self.version:
+                self._first = (version, time.monotonic() + self.ttl, first)
+        return first
+
+    def stats(self) -> dict:
+        return {"version": self.version, "tasks": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+def get_catalog() -> TaskCatalog:
+    catalog = current_app.extensions.get("task_catalog")
+    if catalog is None:
+        catalog = TaskCatalog(float(current_app.config.get("TASK_CACHE_TTL", 30)))
+        current_app.extensions["task_catalog"] = catalog
+    return catalog
+
+
+def get(task_id: int) -> Optional[TaskInfo]:
+    return get_catalog().get(task_id)
+
+
+def first() -> Optional[TaskInfo]:
+    """Первая задача (по id) — стартовая страница."""
+    task_id = get_catalog().first_id()
+    return get(task_id) if task_id is not None else None
+
+
+def bump() -> None:
+    """Сбросить каталог в этом процессе (после правки задач мимо ORM)."""
+    if not has_app_context():
+        return
+    catalog = current_app.extensions.get("task_catalog")
+    if catalog is not None:
+        catalog.bump()
+
+
+@event.listens_for(Session, "after_flush")
+def _tasks_changed(session_, flush_context):
+    for obj in (*session_.new, *session_.dirty, *session_.deleted):
+        if isinstance(obj, TaskTest) or (
+                isinstance(obj, Task) and (obj not in session_.dirty
+                                           or session_.is_modified(obj, include_collections=False))):
+            bump()
+            return
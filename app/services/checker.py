@@ -0,0 +1,195 @@
+# app/services/checker.py
+"""
+Сравнение вывода решения с ожидаемым без полного декодирования.
+
+stdout и expected_output приходят из ExecEngine в base64 (до MAX_FILE_SIZE каждый,
+до 50 тестов в батче). Декодируем их кусками по _STEP символов, сравниваем потоково
+и останавливаемся на первом расхождении, сообщая его позицию.
+
+Режим выбирается на задаче (Task.checker):
+  - exact        — побайтно, пробельные символы в начале и конце вывода не важны;
+  - tokens       — по словам, любые пробелы и переводы строк равнозначны;
+  - float[:eps]  — по словам, числа сравниваются с абсолютной/относительной точностью eps.
+Свои режимы добавляются через @register("имя").
+"""
+import base64
+import binascii
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+_STEP = 16 * 1024  # символов base64 за раз (~12 КБ вывода)
+_WS = b" \t\n\r\x0b\x0c"
+_SNIPPET = 32
+
+DEFAULT = "exact"
+
+
+@dataclass(frozen=True)
+class CheckResult:
+    ok: bool
+    position: Optional[int] = None  # байт (exact) или номер слова с 1 (tokens/float)
+    line: Optional[int] = None
+    got: Optional[str] = None
+    expected: Optional[str] = None
+
+    def to_json(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if v is not None}
+
+
+def _snippet(b: Optional[bytes]) -> Optional[str]:
+    if b is None:
+        return None
+    return b[:_SNIPPET].decode("utf-8", errors="replace")
+
+
+def b64_chunks(data: Optional[str], step: int = _STEP) -> Iterator[bytes]:
+    """Инкрементальный base64: куски исходных байтов. Переводы строк внутри base64 допустимы."""
+    if not data:
+        return
+    carry = ""
+    for i in range(0, len(data), step):
+        part = carry + "".join(data[i:i + step].split())
+        cut = len(part) - len(part) % 4
+        carry = part[cut:]
+        if cut:
+            yield base64.b64decode(part[:cut], validate=True)
+    if carry:
+        yield base64.b64decode(carry + "=" * (-len(carry) % 4), validate=True)
+
+
+def _stripped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Поток без пробельных символов в начале и в конце (хвост придерживаем, пока не встретим не-пробел)."""
+    started = False
+    pending = b""
+    for c in chunks:
+        if not started:
+            c = c.lstrip(_WS)
+            if not c:
+                continue
+            started = True
+        body = c.rstrip(_WS)
+        if body:
+            yield pending + body
+            pending = c[len(body):]
+        else:
+            pending += c
+
+
+def _tokens(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Слова потока; слово на стыке кусков склеиваем."""
+    tail = b""
+    for c in chunks:
+        parts = (tail + c).split()
+        tail = b""
+        if parts and c and not c[-1:].isspace():
+            tail = parts.pop()
+        yield from parts
+    if tail:
+        yield tail
+
+
+def _compare_bytes(got: Iterator[bytes], exp: Iterator[bytes]) -> CheckResult:
+    offset, line = 0, 1
+    a = b = b""
+    while True:
+        if not a:
+            a = next(got, None)
+        if not b:
+            b = next(exp, None)
+        if a is None or b is None:
+            if a is None and b is None:
+                return CheckResult(True)
+            return CheckResult(False, position=offset, line=line, got=_snippet(a), expected=_snippet(b))
+        n = min(len(a), len(b))
+        if a[:n] != b[:n]:
+            i = next(i for i in range(n) if a[i] != b[i])
+            return CheckResult(False, position=offset + i, line=line + a[:i].count(b"\n"),
+                               got=_snippet(a[i:]), expected=_snippet(b[i:]))
+        line += a.count(b"\n", 0, n)
+        offset += n
+        a, b = a[n:], b[n:]
+
+
+def _compare_tokens(got: Iterator[bytes], exp: Iterator[bytes],
+                    same: Callable[[bytes, bytes], bool]) -> CheckResult:
+    index = 0
+    while True:
+        a, b = next(got, None), next(exp, None)
+        index += 1
+        if a is None and b is None:
+            return CheckResult(True)
+        if a is None or b is None or not same(a, b):
+            return CheckResult(False, position=index, got=_snippet(a), expected=_snippet(b))
+
+
+# ---------- режимы ----------
+
+_CHECKERS: dict[str, Callable] = {}
+
+
+def register(name: str):
+    """Декоратор режима: fn(stdout_chunks, expected_chunks, arg: Optional[str]) -> CheckResult."""
+    def deco(fn):
+        _CHECKERS[name] = fn
+        return fn
+    return deco
+
+
+@register("exact")
+def _exact(got, exp, arg=None) -> CheckResult:
+    return _compare_bytes(_stripped(got), _stripped(exp))
+
+
+@register("tokens")
+def _whitespace_insensitive(got, exp, arg=None) -> CheckResult:
+    return _compare_tokens(_tokens(got), _tokens(exp), lambda a, b: a == b)
+
+
+@register("float")
+def _float_tolerance(got, exp, arg=None) -> CheckResult:
+    eps = float(arg) if arg else 1e-6
+
+    def same(a: bytes, b: bytes) -> bool:
+        if a == b:
+            return True
+        try:
+            x, y = float(a), float(b)
+        except ValueError:
+            return False
+        return abs(x - y) <= eps * max(1.0, abs(y))
+
+    return _compare_tokens(_tokens(got), _tokens(exp), same)
+
+
+def names() -> list[str]:
+    return sorted(_CHECKERS)
+
+
+def parse(spec: Optional[str]) -> tuple[str, Optional[str]]:
+    """'float:1e-4' -> ('float', '1e-4'); пустое — режим по умолчанию."""
+    name, _, arg = (spec or DEFAULT).partition(":")
+    return name.strip().lower(), (arg.strip() or None)
+
+
+def validate(spec: Optional[str]) -> None:
+    name, arg = parse(spec)
+    if name not in _CHECKERS:
+        raise ValueError(f"unknown checker {name!r}, expected one of {', '.join(names())}")
+    if name == "float" and arg is not None:
+        float(arg)
+
+
+def compare(stdout_b64: Optional[str], expected_b64: Optional[str], spec: Optional[str] = None) -> CheckResult:
+    """Сравнить вывод с ожидаемым (оба — base64 из ExecEngine) в режиме spec."""
+    name, arg = parse(spec)
+    fn = _CHECKERS.get(name)
+    if fn is None:
+        log.warning("unknown checker %r, falling back to %s", spec, DEFAULT)
+        fn, arg = _CHECKERS[DEFAULT], None
+    try:
+        return fn(b64_chunks(stdout_b64), b64_chunks(expected_b64), arg)
+    except (binascii.Error, ValueError):
+        return CheckResult(False)
@@ -0,0 +1,176 @@
+# app/services/completion.py
+"""
+Как judge-worker узнаёт, что батч в ExecEngine готов.
+
+Все варианты — за одним интерфейсом CompletionStrategy:
+  - poll      — адаптивный опрос с экспоненциальной паузой (по умолчанию);
+  - webhook   — ExecEngine дёргает POST /hooks/execengine (callback_url), веб-процесс
+                сразу забирает батч; воркер опрашивает только как страховку;
+  - rabbitmq  — воркер слушает очередь RabbitMQ из docker-compose, сообщение
+                с batch_token делает батч «к опросу немедленно».
+
+Push-уведомление лишь будит опрос: сам результат всегда берётся одним GET,
+так что формат уведомления может быть любым, лишь бы в нём был batch_token.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Iterable, Optional
+
+log = logging.getLogger(__name__)
+
+
+class CompletionStrategy:
+    """Адаптивный опрос: первая проверка через initial_s, дальше пауза растёт в factor раз до max_s."""
+
+    name = "poll"
+
+    def __init__(self, initial_s: float = 0.1, factor: float = 2.0, max_s: float = 5.0):
+        self.initial_s = initial_s
+        self.factor = factor
+        self.max_s = max_s
+        self._next: dict[str, tuple[float, float]] = {}  # token -> (когда опросить, текущая пауза)
+        self._inbox: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+
+    # --- жизненный цикл (push-источникам нужен фон) ---
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    # --- расписание опроса ---
+
+    def track(self, token: str, now: Optional[float] = None) -> None:
+        """Батч только что отправлен — первая проверка через initial_s."""
+        now = time.monotonic() if now is None else now
+        self._next[token] = (now + self.initial_s, self.initial_s)
+
+    def notify(self, token: str) -> None:
+        """Push: батч готов, опросить на ближайшем тике (потокобезопасно)."""
+        self._inbox.put(token)
+
+    def _drain(self, now: float) -> None:
+        while True:
+            try:
+                token = self._inbox.get_nowait()
+            except queue.Empty:
+                return
+            self._next[token] = (now, self.initial_s)
+
+    def due(self, tokens: Iterable[str], now: Optional[float] = None) -> list[str]:
+        """Какие из tokens пора опрашивать. Незнакомые (например, после рестарта воркера) — сразу."""
+        now = time.monotonic() if now is None else now
+        self._drain(now)
+        return [t for t in tokens if self._next.get(t, (now, 0.0))[0] <= now]
+
+    def polled(self, token: str, finished: bool, now: Optional[float] = None) -> None:
+        if finished:
+            self._next.pop(token, None)
+            return
+        now = time.monotonic() if now is None else now
+        _, delay = self._next.get(token, (now, self.initial_s))
+        delay = min(max(delay, self.initial_s) * self.factor, self.max_s)
+        self._next[token] = (now + delay, delay)
+
+    def forget(self, token: str) -> None:
+        self._next.pop(token, None)
+
+    def retain(self, tokens: Iterable[str]) -> None:
+        """Оставить в расписании только tokens (все батчи в работе по БД). Батч мог закрыть
+        не этот воркер — webhook, соседний воркер, ошибка отправки; без этого его срок
+        навсегда «наступил» и воркер крутится без сна."""
+        keep = set(tokens)
+        for token in [t for t in self._next if t not in keep]:
+            del self._next[token]
+
+    def seconds_until_due(self, now: Optional[float] = None) -> Optional[float]:
+        """Сколько можно спать до ближайшего опроса (None — ждать нечего)."""
+        now = time.monotonic() if now is None else now
+        if not self._next:
+            return None
+        return max(0.0, min(at for at, _ in self._next.values()) - now)
+
+
+class WebhookCompletion(CompletionStrategy):
+    """Готовность приходит на /hooks/execengine; опрос — только редкая страховка."""
+
+    name = "webhook"
+
+    def __init__(self, safety_s: float = 15.0, max_s: float = 30.0):
+        super().__init__(initial_s=safety_s, factor=2.0, max_s=max_s)
+
+
+class RabbitMQCompletion(CompletionStrategy):
+    """Потребитель очереди RabbitMQ в фоне; сообщение = JSON {"batch_token": ...} или сам токен."""
+
+    name = "rabbitmq"
+
+    def __init__(self, url: str, queue_name: str, safety_s: float = 15.0, max_s: float = 30.0):
+        super().__init__(initial_s=safety_s, factor=2.0, max_s=max_s)
+        self.url = url
+        self.queue_name = queue_name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        try:
+            import pika  # noqa: F401  (опциональная зависимость: pip install pika)
+        except ImportError as e:
+            raise RuntimeError("EXECENGINE_COMPLETION=rabbitmq requires the 'pika' package") from e
+        self._thread = threading.Thread(target=self._consume_forever, name="ee-rabbitmq", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @staticmethod
+    def token_from_message(body: bytes) -> Optional[str]:
+        text = body.decode("utf-8", errors="replace").strip()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return text or None
+        if isinstance(data, dict):
+            return data.get("batch_token") or data.get("token")
+        return str(data) if data else None
+
+    def _consume_forever(self) -> None:
+        import pika
+
+        while not self._stop.is_set():
+            try:
+                conn = pika.BlockingConnection(pika.URLParameters(self.url))
+                channel = conn.channel()
+                channel.queue_declare(queue=self.queue_name, durable=True)
+                for _method, _props, body in channel.consume(self.queue_name, auto_ack=True,
+                                                             inactivity_timeout=1.0):
+                    if self._stop.is_set():
+                        break
+                    if body is None:
+                        continue
+                    token = self.token_from_message(body)
+                    if token:
+                        self.notify(token)
+                conn.close()
+            except Exception as e:
+                # брокер недоступен — живём на страховочном опросе и переподключаемся
+                log.warning("RabbitMQ consumer error, reconnecting: %s", e)
+                self._stop.wait(5.0)
+
+
+def from_config(cfg) -> CompletionStrategy:
+    mode = str(cfg.get("EXECENGINE_COMPLETION", "poll")).lower()
+    if mode == "webhook":
+        return WebhookCompletion(safety_s=cfg.get("EE_POLL_SAFETY", 15.0))
+    if mode == "rabbitmq":
+        return RabbitMQCompletion(cfg.get("EXECENGINE_RABBITMQ_URL"), cfg.get("EXECENGINE_RABBITMQ_QUEUE"),
+                                  safety_s=cfg.get("EE_POLL_SAFETY", 15.0))
+    return CompletionStrategy(
+        initial_s=cfg.get("EE_POLL_INITIAL", 0.1),
+        factor=cfg.get("EE_POLL_FACTOR", 2.0),
+        max_s=cfg.get("EE_POLL_MAX", 5.0),
+    )
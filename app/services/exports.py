@@ -0,0 +1,107 @@
+# app/services/exports.py
+"""
+Выгрузки: состав групп, отправки, результаты по тестам.
+
+Каждая выгрузка — заголовок и генератор строк поверх запроса с yield_per
+(на Postgres — серверный курсор): строки читаются порциями и сразу уходят
+в ответ (CSV, XLSX или NDJSON, см. services/spreadsheet.py), так что память
+не растёт с объёмом, а первый байт уходит клиенту сразу.
+Новые выгрузки добавляются через @register.
+"""
+import json
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Sequence
+
+from ..models import Student, Submission
+from . import spreadsheet
+from .results import ResultsFilter, query as results_query
+from .scoring import expand_tests
+
+YIELD_PER = 1000
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ndjson": "application/x-ndjson",
+}
+
+
+@dataclass(frozen=True)
+class Export:
+    name: str
+    header: tuple
+    rows: Callable[..., Iterable[Sequence]]  # rows(args) — args как request.args
+
+
+_EXPORTS: dict[str, Export] = {}
+
+
+def register(name: str, header: Sequence):
+    def deco(fn):
+        _EXPORTS[name] = Export(name, tuple(header), fn)
+        return fn
+    return deco
+
+
+def get(name: str) -> Export:
+    try:
+        return _EXPORTS[name]
+    except KeyError:
+        raise LookupError(f"unknown export {name!r}")
+
+
+def _ndjson(header: Sequence, rows: Iterable[Sequence]) -> Iterator[bytes]:
+    for row in rows:
+        yield (json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def stream(name: str, fmt: str, args) -> Iterator[bytes]:
+    """Тело ответа выгрузки; вызывать внутри stream_with_context."""
+    export = get(name)
+    if fmt not in FORMATS:
+        raise LookupError(f"unknown format {fmt!r}")
+    rows = export.rows(args)
+    if fmt == "csv":
+        return spreadsheet.stream_csv(export.header, rows)
+    if fmt == "xlsx":
+        return spreadsheet.stream_xlsx(export.header, rows, sheet_name=export.name)
+    return _ndjson(export.header, rows)
+
+
+# ---------- выгрузки ----------
+
+@register("roster", ("full_name", "auth_code"))
+def _roster(args):
+    q = Student.query.with_entities(Student.full_name, Student.auth_code)
+    group_id = args.get("group_id", type=int)
+    if group_id:
+        q = q.filter(Student.group_id == group_id)
+    return q.order_by(Student.full_name, Student.id).execution_options(yield_per=YIELD_PER)
+
+
+@register("submissions", ("id", "created_at", "student_id", "student", "task_id", "task",
+                          "module_id", "status", "score"))
+def _submissions(args):
+    q = results_query(ResultsFilter.from_args(args)).order_by(Submission.created_at, Submission.id)
+    return (
+        (r.id, r.created_at.isoformat() if r.created_at else None, r.student_id, r.student,
+         r.task_id, r.task, r.module_id, r.status, r.score)
+        for r in q.execution_options(yield_per=YIELD_PER)
+    )
+
+
+@register("test_results", ("submission_id", "created_at", "student", "task", "test", "group",
+                           "verdict", "time_ms", "memory_kb", "diff_at", "points"))
+def _test_results(args):
+    # фильтр разбираем сразу: ошибка в параметрах — 400, а не оборванный поток
+    q = (results_query(ResultsFilter.from_args(args), Submission.result)
+         .order_by(Submission.created_at, Submission.id))
+
+    def rows():
+        for r in q.execution_options(yield_per=YIELD_PER):
+            when = r.created_at.isoformat() if r.created_at else None
+            for t in expand_tests(r.result):
+                yield (r.id, when, r.student, r.task, t["n"], t["group"],
+                       t["verdict"], t["time_ms"], t["memory_kb"], t["diff_at"], t["points"])
+
+    return rows()
@@ -0,0 +1,555 @@
+# app/services/judging.py
+"""
+Асинхронный конвейер проверки.
+
+/submit только сохраняет Submission в статусе queued и сразу отвечает.
+Отдельный процесс (`flask judge-worker`) забирает очередь из БД,
+отправляет батчи в ExecEngine, опрашивает их и выставляет оценку.
+Очередь — сама таблица submissions (SELECT ... FOR UPDATE SKIP LOCKED),
+поэтому воркеров можно запускать несколько. Что и в каком порядке
+отправлять, решает services/scheduler.py; каждая отправка уходит
+в ExecEngine одним или несколькими батчами (SubmissionBatch).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+import requests
+from flask import current_app
+from sqlalchemy.orm import aliased
+
+from ..extensions import db
+from ..models import Student, Submission, SubmissionBatch, Task
+from ..execengine_client import ExecEngineClientV2, get_client
+from . import archive, blobs, completion, metrics, payloads, scheduler, verdict_cache
+from .poller import get_poller
+from .scoring import result_ok, score_batch
+
+log = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+ERROR = "error"
+
+_LANGUAGE_IDS = {
+    "python3": 71,
+    "python": 71,
+    "py": 71,
+    "cpp": 54,
+    "c++": 54,
+    "c": 50,
+    "java": 62,
+    "js": 63,
+    "node": 63,
+}
+
+
+def resolve_language_id(task) -> Optional[int]:
+    """language_id задачи с фолбэком на алиас языка и EE_DEFAULT_LANGUAGE_ID."""
+    language_id = getattr(task, "language_id", None)
+
+    if language_id is None:
+        alias = getattr(task, "language", None)
+        if alias:
+            language_id = _LANGUAGE_IDS.get(str(alias).lower())
+
+    if language_id is None:
+        language_id = current_app.config.get("EE_DEFAULT_LANGUAGE_ID")
+
+    return int(language_id) if language_id else None
+
+
+def enqueue(student_id: int, task: Task, code: str, language_id: int) -> Submission:
+    """
+    task — Task или его снимок catalog.TaskInfo. Снимок может отставать от БД на
+    TASK_CACHE_TTL, поэтому cache_key здесь предварительный: воркер пересчитывает его
+    по живой задаче (dispatch_queued, _resolve_twins).
+    """
+    sub = Submission(
+        student_id=student_id,
+        task_id=task.id,
+        code=code,
+        language_id=language_id,
+        status=QUEUED,
+        score=0,
+        cache_key=verdict_cache.cache_key(task, language_id, code, current_app.config),
+    )
+    db.session.add(sub)
+    db.session.commit()
+    return sub
+
+
+def task_tests(task: Task) -> list[dict]:
+    """TaskTest -> контракт submit_batch ({"stdin", "expected_output"})."""
+    return [{"stdin": blobs.task_test_data(t.input_data, t.input_blob),
+             "expected_output": blobs.task_test_data(t.expected_output, t.output_blob)}
+            for t in scheduler.ordered_tests(task)]
+
+
+def to_json(sub: Submission) -> dict:
+    """Публичное представление отправки для /submissions/<id>."""
+    return {
+        "id": sub.id,
+        "task_id": sub.task_id,
+        "status": sub.status,
+        "pending": sub.is_pending,
+        "verdict": None if sub.is_pending else sub.status,
+        "points": sub.score,
+        "runtime_ms": sub.runtime_ms,
+        "created_at": sub.created_at.isoformat() if sub.created_at else None,
+        "judged_at": sub.judged_at.isoformat() if sub.judged_at else None,
+    }
+
+
+# ---------- шаги воркера ----------
+
+def _is_transient(exc: Exception) -> bool:
+    """Сетевые ошибки, 429 и 5xx — повторим на следующем тике, остальное — ошибка отправки."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError):
+        status = getattr(exc.response, "status_code", 0) or 0
+        return status == 429 or status >= 500
+    return False
+
+
+def _fail(sub: Submission, message: str) -> None:
+    sub.status = ERROR
+    sub.result = {"error": message}
+    sub.judged_at = datetime.utcnow()
+    for batch in sub.batches:  # освобождаем слоты планировщика
+        if batch.status != scheduler.BATCH_SKIPPED:
+            batch.status = scheduler.BATCH_DONE
+
+
+def get_completion() -> completion.CompletionStrategy:
+    """Стратегия ожидания батчей (одна на процесс, как и клиент ExecEngine)."""
+    strategy = current_app.extensions.get("judge_completion")
+    if strategy is None:
+        strategy = completion.from_config(current_app.config)
+        current_app.extensions["judge_completion"] = strategy
+    return strategy
+
+
+@dataclass
+class _Claim:
+    """Кусок, взятый в отправку: всё нужное для HTTP, чтобы слать без строк БД и без транзакции."""
+    batch_id: int
+    sub_id: int
+    language_id: int
+    code: str
+    fragments: list
+
+
+def _claim(batch: SubmissionBatch, payload: payloads.TaskPayload) -> _Claim:
+    """Пометить кусок sending (коммитит вызывающий): соседние воркеры его больше не берут."""
+    sub = batch.submission
+    batch.status = scheduler.BATCH_SENDING
+    batch.sent_at = datetime.utcnow()
+    db.session.flush()
+    return _Claim(batch.id, sub.id, sub.language_id, sub.code,
+                  list(payload.fragments[batch.first_test:batch.first_test + batch.n_tests]))
+
+
+def _release(claims: list[_Claim]) -> None:
+    """ExecEngine недоступен: куски снова pending, а отправки, у которых ничего не ушло, — в очередь."""
+    subs = set()
+    for c in claims:
+        batch = db.session.get(SubmissionBatch, c.batch_id)
+        if batch is None or batch.status != scheduler.BATCH_SENDING:
+            continue
+        batch.status = scheduler.BATCH_PENDING
+        batch.sent_at = None
+        subs.add(batch.submission)
+    for sub in subs:
+        if sub.status == RUNNING and all(b.status in (scheduler.BATCH_PENDING, scheduler.BATCH_HELD)
+                                         for b in sub.batches):
+            sub.batches = []
+            sub.status = QUEUED
+            sub.started_at = None
+    db.session.commit()
+
+
+def _record(claim: _Claim, strategy: completion.CompletionStrategy,
+            batch_token: Optional[str], error: Optional[str]) -> None:
+    batch = db.session.get(SubmissionBatch, claim.batch_id)
+    if batch is not None and batch.status == scheduler.BATCH_SENDING:
+        if error or not batch_token:
+            _fail(batch.submission, error or "ExecEngine returned no batch_token")
+        else:
+            batch.batch_token = batch_token
+            batch.status = scheduler.BATCH_RUNNING
+            batch.sent_at = datetime.utcnow()
+    db.session.commit()
+    if batch_token and not error:
+        strategy.track(batch_token)
+
+
+def _deliver(client: ExecEngineClientV2, strategy: completion.CompletionStrategy, claims: list[_Claim]) -> int:
+    """
+    Отправить взятые куски. HTTP идёт вне транзакции: медленный ExecEngine не держит
+    ни блокировок строк, ни открытой транзакции. Результат каждого куска записываем сразу.
+    При временной недоступности остальные куски возвращаются (см. _release).
+    """
+    failed: set[int] = set()
+    sent = 0
+    for n, claim in enumerate(claims):
+        if claim.sub_id in failed:
+            continue  # отправка уже закрыта ошибкой, её куски освободил _fail
+        try:
+            resp = client.submit_encoded(language_id=claim.language_id, source_code=claim.code,
+                                         fragments=claim.fragments)
+        except Exception as e:
+            if _is_transient(e):
+                log.warning("ExecEngine unavailable, %d batch(es) go back to the queue: %s", len(claims) - n, e)
+                _release(claims[n:])
+                break
+            log.exception("submission %s rejected by ExecEngine", claim.sub_id)
+            _record(claim, strategy, None, f"ExecEngine error: {e}")
+            failed.add(claim.sub_id)
+            sent += 1
+            continue
+        batch_token = (resp or {}).get("batch_token")
+        _record(claim, strategy, batch_token, None)
+        if not batch_token:
+            failed.add(claim.sub_id)
+        sent += 1
+    return sent
+
+
+def _claim_pending(free: int) -> list[_Claim]:
+    """Взять ожидающие куски уже принятых отправок (старые — первыми)."""
+    batches = (
+        SubmissionBatch.query
+        .join(Submission, Submission.id == SubmissionBatch.submission_id)
+        .filter(SubmissionBatch.status == scheduler.BATCH_PENDING, Submission.status == RUNNING)
+        .order_by(SubmissionBatch.submission_id.asc(), SubmissionBatch.part.asc())
+        .limit(free)
+        .with_for_update(skip_locked=True, of=SubmissionBatch)
+        .all()
+    )
+    return [_claim(batch, payloads.for_task(batch.submission.task)) for batch in batches]
+
+
+def _reclaim_stale(cfg) -> None:
+    """Куски, застрявшие в sending (воркер упал посреди отправки), — снова в pending."""
+    cutoff = datetime.utcnow() - timedelta(seconds=float(cfg.get("JUDGE_SENDING_TIMEOUT", 120)))
+    (SubmissionBatch.query
+     .filter(SubmissionBatch.status == scheduler.BATCH_SENDING, SubmissionBatch.sent_at < cutoff)
+     .update({"status": scheduler.BATCH_PENDING, "sent_at": None}, synchronize_session=False))
+
+
+def dispatch_queued(client: ExecEngineClientV2, strategy: completion.CompletionStrategy,
+                    limit: int = 50) -> int:
+    """
+    Отправить в ExecEngine столько батчей, сколько позволяет EE_MAX_CONCURRENT_SUBMISSIONS:
+    сначала хвосты уже принятых отправок, затем новые из очереди в справедливом порядке
+    (см. services/scheduler.py). Возвращает число принятых/отправленных единиц работы.
+
+    Два шага: в короткой транзакции берём работу (куски -> sending, отправки -> running)
+    и коммитим, затем шлём в ExecEngine уже без транзакции (_deliver).
+    """
+    cfg = current_app.config
+    scheduler.lock_capacity()  # до commit ниже: подсчёт слотов и взятие работы — без соседей
+    _reclaim_stale(cfg)
+    free = scheduler.capacity(cfg) - scheduler.running_batches()
+    if free <= 0:
+        db.session.commit()
+        return 0
+    claims = _claim_pending(free)
+    free -= len(claims)
+
+    # дубликаты идущей проверки не берём в окно: иначе полсотни одинаковых шаблонов
+    # занимают его каждый тик и заслоняют остальную очередь (их закроет _resolve_twins)
+    twin = aliased(Submission)
+    busy_twin = (db.session.query(twin.id)
+                 .filter(twin.cache_key == Submission.cache_key, twin.status == RUNNING)
+                 .exists())
+    candidates = (
+        db.session.query(Submission, Student.group_id)
+        .join(Student, Student.id == Submission.student_id)
+        .filter(Submission.status == QUEUED, ~busy_twin)
+        .order_by(Submission.id.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Submission)
+        .all()
+    )
+    copied = 0
+    if candidates:
+        by_student, by_group = scheduler.inflight_load()
+
+        in_flight: set[str] = set()  # cache_key, взятые на этом тике
+        for sub in scheduler.fair_order(candidates, by_student, by_group):
+            # тесты могли поменяться, пока отправка ждала: ключ — по тем, на которых будем проверять
+            if sub.cache_key:
+                sub.cache_key = _live_key(sub)
+            # дубликат: готовый вердикт копируем, идущую проверку ждём (см. _resolve_twins)
+            if sub.cache_key in in_flight:
+                continue
+            twin = verdict_cache.find_twin(sub)
+            if twin is not None and twin.status == RUNNING:
+                continue
+            if twin is not None:
+                verdict_cache.copy_verdict(sub, twin)
+                copied += 1
+                continue
+            if free <= 0:
+                break
+
+            task = sub.task
+            payload = payloads.for_task(task)
+            sub.batches = [
+                SubmissionBatch(part=i, first_test=first, n_tests=n, status=scheduler.initial_status(task, i))
+                for i, (first, n) in enumerate(scheduler.plan_for(task, payload.n_tests, payload.n_visible, cfg))
+            ]
+            sub.status = RUNNING
+            sub.started_at = datetime.utcnow()
+            if sub.cache_key:
+                in_flight.add(sub.cache_key)
+            for batch in [b for b in sub.batches if b.status == scheduler.BATCH_PENDING][:free]:
+                claims.append(_claim(batch, payload))
+                free -= 1
+
+    db.session.commit()  # работа взята, блокировки строк отпущены
+    return copied + _deliver(client, strategy, claims)
+
+
+def _live_key(sub: Submission) -> str:
+    return verdict_cache.cache_key(sub.task, sub.language_id, sub.code, current_app.config)
+
+
+def _resolve_twins(sub: Submission) -> None:
+    """Отправки с тем же ключом, ждавшие в очереди, получают этот же вердикт."""
+    if not sub.cache_key or sub.status == ERROR:
+        return
+    for twin in (
+        Submission.query
+        .filter(Submission.cache_key == sub.cache_key, Submission.status == QUEUED)
+        .with_for_update(skip_locked=True)
+        .all()
+    ):
+        # ключ дубликата мог быть посчитан по устаревшему снимку задачи — сверяем по живой
+        if _live_key(twin) == sub.cache_key:
+            verdict_cache.copy_verdict(twin, sub)
+
+
+def finish(sub: Submission, batch_result: dict) -> None:
+    """Оценить готовый батч и закрыть отправку."""
+    points, verdict, raw = score_batch(sub.task, batch_result)
+    sub.status = verdict if verdict != "PENDING" else ERROR
+    sub.score = points
+    sub.result = raw  # компактная сводка; сырой ответ — в холодное хранилище
+    results = batch_result.get("results") if isinstance(batch_result, dict) else None
+    sub.result_blob = archive.put(results) if verdict != "PENDING" and isinstance(results, list) else None
+    sub.runtime_ms = raw.get("runtime_ms") if isinstance(raw, dict) else None
+    sub.judged_at = datetime.utcnow()
+    _resolve_twins(sub)
+
+
+def raw_results(sub: Submission) -> Optional[list]:
+    """Сырые results ExecEngine отправки — из холодного хранилища (или из строки у старых записей)."""
+    results = (sub.result or {}).get("results")
+    if results is None and sub.result_blob:
+        results = archive.get(sub.result_blob)
+    return results
+
+
+_SKIPPED_RESULT = {"status": {"id": 0, "description": "Skipped"}}
+
+
+def _advance_fail_fast(sub: Submission) -> None:
+    """fail_fast: после готового куска либо отпустить следующий, либо пропустить остаток."""
+    failed = any(not result_ok(r) for b in sub.batches
+                 if b.status == scheduler.BATCH_DONE for r in (b.results or []))
+    held = [b for b in sub.batches if b.status == scheduler.BATCH_HELD]
+    if failed:
+        for b in held:
+            b.status = scheduler.BATCH_SKIPPED
+    elif held and not any(b.status in scheduler.IN_FLIGHT for b in sub.batches):
+        held[0].status = scheduler.BATCH_PENDING  # уйдёт через _claim_pending
+
+
+def _merged_results(sub: Submission) -> list:
+    out = []
+    for b in sub.batches:
+        if b.status == scheduler.BATCH_SKIPPED:
+            out.extend(dict(_SKIPPED_RESULT) for _ in range(b.n_tests))
+        else:
+            out.extend(b.results or [])
+    return out
+
+
+def _close(finished: dict) -> int:
+    """
+    Пометить готовые куски (batch_token -> ответ ExecEngine) и закрыть отправки,
+    у которых готовы все куски: их results склеиваются в порядке part
+    (пропущенные в режиме fail_fast тесты — как "Skipped").
+    """
+    batches = (
+        SubmissionBatch.query
+        .filter(SubmissionBatch.batch_token.in_(list(finished)),
+                SubmissionBatch.status == scheduler.BATCH_RUNNING)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    now = datetime.utcnow()
+    for batch in batches:
+        data = finished[batch.batch_token]
+        batch.results = data.get("results") if isinstance(data, dict) else data
+        batch.status = scheduler.BATCH_DONE
+        batch.finished_at = now
+
+    closed = 0
+    for sub in {b.submission for b in batches}:
+        if sub.status != RUNNING:
+            continue
+        if sub.task.judging_mode == scheduler.FAIL_FAST:
+            _advance_fail_fast(sub)
+        if any(b.status not in (scheduler.BATCH_DONE, scheduler.BATCH_SKIPPED) for b in sub.batches):
+            continue
+        finish(sub, {"status": "FINISHED", "results": _merged_results(sub)})
+        for b in sub.batches:
+            b.results = None  # всё уже лежит в Submission.result
+        closed += 1
+    return closed
+
+
+def collect_running(client: ExecEngineClientV2, strategy: completion.CompletionStrategy,
+                    limit: int = 500) -> int:
+    """
+    Опросить разом все батчи, которым подошёл срок по стратегии (см. services/poller.py),
+    и разнести готовые результаты по ожидающим отправкам. Возвращает число закрытых отправок.
+    """
+    tokens = [
+        token for (token,) in
+        db.session.query(SubmissionBatch.batch_token)
+        .filter(SubmissionBatch.status == scheduler.BATCH_RUNNING)
+        .all()
+    ]
+    strategy.retain(tokens)
+    due = strategy.due(tokens)[:limit]
+    if not due:
+        return 0
+
+    results = get_poller(client).poll(due)
+    finished = {token: data for token, data in results.items() if data is not None}
+    for token in due:
+        strategy.polled(token, finished=token in finished)
+    if not finished:
+        return 0
+
+    closed = _close(finished)
+    db.session.commit()
+    return closed or len(finished)
+
+
+def complete_batch(client: ExecEngineClientV2, batch_token: str) -> Optional[Submission]:
+    """
+    Push-уведомление (webhook): забрать батч сразу, не дожидаясь воркера.
+    Если кусок уже забран или ещё не готов — ничего не делаем.
+    """
+    batch = SubmissionBatch.query.filter_by(batch_token=batch_token, status=scheduler.BATCH_RUNNING).first()
+    if batch is None:
+        return None
+    data = client.get_batch_results(batch_token)
+    if data is None:
+        return None
+    _close({batch_token: data})
+    db.session.commit()
+    return batch.submission
+
+
+def _scoring_snapshot(task: Task) -> tuple:
+    """Всё, что нужно score_batch, без привязки к сессии."""
+    snap = SimpleNamespace(id=task.id, max_score=task.max_score, checker=task.checker,
+                           judging_mode=task.judging_mode)
+    tests = [SimpleNamespace(id=t.id, points=t.points, group=t.group, hidden=t.hidden)
+             for t in scheduler.ordered_tests(task)]
+    return snap, tests
+
+
+def rescore(task_id: Optional[int] = None, chunk: int = 500, dry_run: bool = False) -> dict:
+    """
+    Пересчитать оценки по сохранённым результатам, без ExecEngine (после правки баллов,
+    групп или checker'а). Тесты каждой задачи читаются один раз; отправки — порциями по chunk.
+    Отправки, у которых число результатов не совпадает с текущими тестами, пропускаются.
+    """
+    query = Submission.query.filter(Submission.status.notin_((QUEUED, RUNNING, ERROR)))
+    if task_id is not None:
+        query = query.filter(Submission.task_id == task_id)
+
+    tasks: dict[int, tuple] = {}  # task_id -> (снимок задачи, снимки тестов) — переживают expunge
+    stats = {"seen": 0, "changed": 0, "skipped": 0}
+    last_id = 0
+    while True:
+        subs = query.filter(Submission.id > last_id).order_by(Submission.id.asc()).limit(chunk).all()
+        if not subs:
+            break
+        for sub in subs:
+            last_id = sub.id
+            stats["seen"] += 1
+            if sub.task_id not in tasks:
+                tasks[sub.task_id] = _scoring_snapshot(sub.task)
+            task, tests = tasks[sub.task_id]
+            results = raw_results(sub)
+            if not isinstance(results, list) or len(results) != len(tests):
+                stats["skipped"] += 1
+                continue
+            points, verdict, raw = score_batch(task, {"results": results}, tests)
+            if (points, verdict) != (sub.score, sub.status) or raw.get("tests") != sub.result.get("tests"):
+                stats["changed"] += 1
+                if not dry_run:
+                    sub.score, sub.status = points, verdict
+                    sub.result = dict(raw, cached_from=sub.result["cached_from"]) if "cached_from" in sub.result else raw
+                    sub.runtime_ms = raw.get("runtime_ms")
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        for sub in subs:  # не копим тысячи отправок в identity map
+            db.session.expunge(sub)
+    return stats
+
+
+def run_once(client: Optional[ExecEngineClientV2] = None,
+             strategy: Optional[completion.CompletionStrategy] = None) -> int:
+    """Один тик воркера: отправить очередь и собрать готовые результаты."""
+    client = client or get_client()
+    strategy = strategy or get_completion()
+    cfg = current_app.config
+    sent = dispatch_queued(client, strategy, limit=cfg.get("JUDGE_DISPATCH_LIMIT", 50))
+    done = collect_running(client, strategy, limit=cfg.get("JUDGE_COLLECT_LIMIT", 500))
+    return sent + done
+
+
+def run_worker(interval: float = 0.5, once: bool = False) -> None:
+    """
+    Основной цикл `flask judge-worker`.
+    Без работы спим до ближайшего опроса по стратегии, но не дольше interval
+    (очередь новых отправок проверяем не реже).
+    """
+    strategy = get_completion()
+    strategy.start()
+    log.info("judge worker started (completion=%s, interval=%.2fs)", strategy.name, interval)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                busy = run_once(strategy=strategy)
+            except Exception:
+                log.exception("judge worker tick failed")
+                db.session.rollback()
+                busy = 0
+            finally:
+                db.session.remove()
+                metrics.observe_tick(time.perf_counter() - started)
+            if once:
+                return
+            if not busy:
+                wait = strategy.seconds_until_due()
+                time.sleep(interval if wait is None else min(wait, interval))
+    finally:
+        strategy.stop()
@@ -0,0 +1,19 @@
+# app/services/locks.py
+"""
+Замки на время транзакции, общие для всех процессов (веб, judge-worker'ы, CLI).
+
+Postgres — pg_advisory_xact_lock(key): у каждого замка свой ключ, отпускается
+commit/rollback. На SQLite ключей нет: пустой UPDATE берёт блокировку записи
+всего файла до конца транзакции — грубее, но так же надёжно.
+"""
+from sqlalchemy import text
+
+from ..extensions import db
+
+
+def xact_lock(key: int) -> None:
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+    elif dialect == "sqlite":
+        db.session.execute(text("UPDATE submission_batches SET id = id WHERE 0"))
@@ -0,0 +1,260 @@
+# app/services/metrics.py
+"""
+Замеры запросов: время, SQL, вызовы ExecEngine — и выдача в формате Prometheus (/metrics).
+
+На каждый HTTP-запрос заводится RequestStats (contextvar, так что потоки gunicorn не
+мешают друг другу): сколько SQL-запросов и сколько времени в них, и каждый вызов
+ExecEngineClientV2 (login, submit, poll, poll_many) с длительностью и HTTP-статусом.
+Итоги уходят в гистограммы и счётчики процесса; запрос дольше SLOW_REQUEST_MS
+пишется в лог с разбивкой.
+
+Метрики — на процесс: у каждого воркера gunicorn свои, Prometheus снимает их с того,
+кто ответил. judge-worker поднимает для них отдельный порт (`--metrics-port`), ведь
+основные вызовы ExecEngine — там.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from flask import Flask, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+# ---------- реестр ----------
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: tuple = ()):
+        self.name, self.doc, self.label_names = name, doc, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_num(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: tuple = (), buckets: tuple = TIME_BUCKETS):
+        self.name, self.doc, self.label_names = name, doc, labels
+        self.buckets = tuple(buckets)
+        self._values: dict[tuple, list] = {}  # labels -> [счётчики по корзинам..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += 1
+            row[-1] += value
+
+    def count(self, *labels) -> int:
+        row = self._values.get(labels)
+        return row[-2] if row else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        names = self.label_names + ("le",)
+        for labels, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(names, labels + (_num(bound),))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {row[-2]}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {row[-2]}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_num(row[-1])}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(Counter(
+    "execschool_http_requests_total", "HTTP-запросы", ("method", "endpoint", "status")))
+http_duration = REGISTRY.register(Histogram(
+    "execschool_http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "endpoint")))
+http_db_queries = REGISTRY.register(Histogram(
+    "execschool_http_request_db_queries", "SQL-запросов на HTTP-запрос", ("endpoint",), COUNT_BUCKETS))
+http_db_time = REGISTRY.register(Histogram(
+    "execschool_http_request_db_seconds", "Время в SQL на HTTP-запрос", ("endpoint",)))
+db_queries = REGISTRY.register(Histogram(
+    "execschool_db_query_duration_seconds", "Длительность SQL-запросов (все, включая воркер)"))
+ee_calls = REGISTRY.register(Histogram(
+    "execschool_execengine_call_duration_seconds", "Вызовы ExecEngine", ("op", "status")))
+judge_ticks = REGISTRY.register(Histogram(
+    "execschool_judge_tick_duration_seconds", "Тики judge-worker (отправка очереди и сбор результатов)"))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ---------- разбивка текущего запроса ----------
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_s: float = 0.0
+    execengine: list = field(default_factory=list)  # (op, сек., статус)
+
+    def breakdown(self) -> str:
+        parts = [f"db {self.queries} queries {self.db_s * 1000:.0f} ms"]
+        for op, seconds, status in self.execengine:
+            parts.append(f"execengine {op} {seconds * 1000:.0f} ms ({status})")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("execschool_request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def observe_execengine(op: str, seconds: float, status) -> None:
+    """Вызывается ExecEngineClientV2 на каждый HTTP-вызов; status — код ответа или "error"."""
+    ee_calls.observe(seconds, op, str(status))
+    stats = _current.get()
+    if stats is not None:
+        stats.execengine.append((op, seconds, status))
+
+
+def observe_tick(seconds: float) -> None:
+    judge_ticks.observe(seconds)
+
+
+# время старта — на контексте выполнения, а не на соединении: упавший запрос не доходит
+# до after_cursor_execute, и общий стек на соединении сдвигал бы пары старт/финиш
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._execschool_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_execschool_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    db_queries.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_s += seconds
+
+
+# ---------- Flask ----------
+
+def _start():
+    g._metrics_token = _current.set(RequestStats())
+
+
+def _finish(response):
+    stats = _current.get()
+    if stats is None:
+        return response
+    seconds = time.perf_counter() - stats.started
+    endpoint = request.endpoint or "unmatched"  # не path: иначе метка на каждый id
+    method = request.method
+    http_requests.inc(method, endpoint, str(response.status_code))
+    http_duration.observe(seconds, method, endpoint)
+    http_db_queries.observe(stats.queries, endpoint)
+    http_db_time.observe(stats.db_s, endpoint)
+
+    slow_ms = current_app.config.get("SLOW_REQUEST_MS") or 0
+    if slow_ms and seconds * 1000 >= slow_ms:
+        log.warning("slow request %s %s -> %s in %.0f ms: %s", method, request.path,
+                    response.status_code, seconds * 1000, stats.breakdown())
+    response.headers.setdefault("Server-Timing",
+                                f"app;dur={seconds * 1000:.1f}, db;dur={stats.db_s * 1000:.1f}")
+    return response
+
+
+def _reset(exc):
+    token = g.pop("_metrics_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app: Flask) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_reset)
+
+
+def serve(port: int, host: str = "0.0.0.0") -> None:
+    """/metrics этого процесса на отдельном порту (для judge-worker, у которого нет HTTP)."""
+    from werkzeug.serving import make_server
+    from werkzeug.wrappers import Response
+
+    def wsgi(environ, start_response):
+        if environ.get("PATH_INFO") != "/metrics":
+            return Response("not found", status=404)(environ, start_response)
+        return Response(render(), mimetype="text/plain; version=0.0.4")(environ, start_response)
+
+    server = make_server(host, port, wsgi, threaded=True)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("metrics on http://%s:%d/metrics", host, port)
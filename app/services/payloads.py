@@ -0,0 +1,109 @@
+# app/services/payloads.py
+"""
+Кеш готовых тестовых кусков для submit_batch.
+
+stdin/expected_output у задачи бывают по мегабайту, а base64 и JSON для них
+одинаковы у всех отправок. Поэтому на процесс храним уже закодированные куски
+(ExecEngineClientV2.encode_test) и при отправке только склеиваем их с исходником.
+
+Ключ — (задача, Task.tests_version, judging_mode, лимиты ExecEngine): правка любого
+TaskTest поднимает tests_version (см. models.py), смена лимитов меняет ключ, так что
+устаревший кусок просто перестаёт находиться. Память ограничена EE_PAYLOAD_CACHE_BYTES,
+вытесняем давно не использованные задачи.
+"""
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app
+from sqlalchemy.orm import undefer_group
+
+from ..execengine_client import ExecEngineClientV2
+from ..models import Task, TaskTest
+from . import blobs
+from .scheduler import ordered_tests
+
+
+@dataclass(frozen=True)
+class TaskPayload:
+    fragments: tuple  # bytes на каждый тест, в порядке scheduler.ordered_tests
+    n_visible: int  # сколько открытых тестов в начале (для fail_fast)
+    nbytes: int
+
+    @property
+    def n_tests(self) -> int:
+        return len(self.fragments)
+
+
+class PayloadCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._items: "OrderedDict[tuple, TaskPayload]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: tuple, payload: TaskPayload) -> None:
+        if payload.nbytes > self.max_bytes:
+            return  # не влезает целиком — кодируем каждый раз
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._items[key] = payload
+            self._bytes += payload.nbytes
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tasks": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def get_cache() -> PayloadCache:
+    cache = current_app.extensions.get("judge_payloads")
+    if cache is None:
+        cache = PayloadCache(current_app.config.get("EE_PAYLOAD_CACHE_BYTES", 256 * 1024 * 1024))
+        current_app.extensions["judge_payloads"] = cache
+    return cache
+
+
+def _build(task: Task, limits: dict) -> TaskPayload:
+    # данные тестов отложены (deferred) — подгружаем их одним запросом, а не по тесту
+    TaskTest.query.options(undefer_group("data")).filter(TaskTest.task_id == task.id).all()
+    tests = ordered_tests(task)
+    fragments = tuple(
+        ExecEngineClientV2.encode_test({"stdin": blobs.task_test_data(t.input_data, t.input_blob),
+                                        "expected_output": blobs.task_test_data(t.expected_output, t.output_blob)},
+                                       limits)
+        for t in tests
+    )
+    return TaskPayload(fragments=fragments,
+                       n_visible=sum(1 for t in tests if not t.hidden),
+                       nbytes=sum(len(f) for f in fragments))
+
+
+def for_task(task: Task) -> TaskPayload:
+    """Закодированные тесты задачи; при попадании в кеш TaskTest из БД не читаются."""
+    limits = ExecEngineClientV2.limits(current_app.config)
+    key = (task.id, task.tests_version, task.judging_mode, json.dumps(limits, sort_keys=True))
+    cache = get_cache()
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build(task, limits)
+        cache.put(key, payload)
+    return payload
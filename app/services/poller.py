@@ -0,0 +1,71 @@
+# app/services/poller.py
+"""
+Мультиплексный опрос батчей: на каждом тике воркер опрашивает все «созревшие»
+batch_token разом, а не каждую отправку отдельно.
+
+Если ExecEngine умеет ?batch_tokens= — это один GET на пачку (до EXECENGINE_STATUS_CHUNK
+токенов), и число запросов растёт с числом тиков, а не студентов. Если не умеет —
+опрашиваем по одному, но параллельно и не больше EXECENGINE_POLL_CONCURRENCY
+запросов одновременно (через общий keep-alive пул клиента).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from flask import current_app
+
+from ..execengine_client import ExecEngineClientV2
+
+log = logging.getLogger(__name__)
+
+
+class BatchPoller:
+    def __init__(self, client: ExecEngineClientV2, concurrency: int = 4, chunk: int = 100):
+        self.client = client
+        self.chunk = max(1, chunk)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ee-poll")
+
+    def _poll_one(self, token: str) -> Optional[dict]:
+        try:
+            return self.client.get_batch_results(token)
+        except Exception as e:
+            log.warning("poll of batch %s failed: %s", token, e)
+            return None
+
+    def _poll_chunk(self, tokens: list[str]) -> dict:
+        try:
+            many = self.client.get_many_batch_results(tokens)
+        except Exception as e:
+            log.warning("multi-status poll of %d batches failed: %s", len(tokens), e)
+            return dict.fromkeys(tokens)
+        if many is not None:
+            return many
+        return dict(zip(tokens, self._pool.map(self._poll_one, tokens)))
+
+    def poll(self, tokens: Iterable[str]) -> dict:
+        """{batch_token: финальный JSON | None (ещё в работе или ошибка опроса)}."""
+        tokens = list(dict.fromkeys(tokens))  # без дублей, порядок сохраняем
+        if not tokens:
+            return {}
+        out: dict = {}
+        for i in range(0, len(tokens), self.chunk):
+            out.update(self._poll_chunk(tokens[i:i + self.chunk]))
+        return out
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def get_poller(client: ExecEngineClientV2) -> BatchPoller:
+    """Поллер на процесс (пересоздаётся вместе с клиентом после fork)."""
+    ext = current_app.extensions
+    poller = ext.get("judge_poller")
+    if poller is None or poller.client is not client:
+        if poller is not None:
+            poller.shutdown()  # иначе потоки старого пула висят до конца процесса
+        cfg = current_app.config
+        poller = BatchPoller(client,
+                             concurrency=cfg.get("EXECENGINE_POLL_CONCURRENCY", 4),
+                             chunk=cfg.get("EXECENGINE_STATUS_CHUNK", 100))
+        ext["judge_poller"] = poller
+    return poller
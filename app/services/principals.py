@@ -0,0 +1,138 @@
+# app/services/principals.py
+"""
+Кто залогинен — без запроса к БД на каждый запрос.
+
+load_user Flask-Login'а получает Principal — лёгкий снимок Student (id, ФИО, группа,
+флаг админа) вместо ORM-объекта. Источники по порядку:
+  1) подписанные claims в сессии (cookie подписан SECRET_KEY), живут PRINCIPAL_TTL секунд;
+  2) TTL-кеш на процесс;
+  3) БД — и тогда claims в сессии обновляются.
+Правка студента в этом процессе (ORM-flush, StudentView, импорт состава) сбрасывает кеш
+и делает недействительными выданные раньше claims; другие процессы увидят правку
+не позже чем через PRINCIPAL_TTL.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import current_app, has_app_context, session
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Student
+
+_SESSION_KEY = "principal"
+
+
+@dataclass(frozen=True)
+class Principal(UserMixin):
+    id: int
+    full_name: str
+    group_id: Optional[int]
+    is_admin: bool = False
+
+    @classmethod
+    def of(cls, student: Student) -> "Principal":
+        return cls(student.id, student.full_name, student.group_id, bool(getattr(student, "is_admin", False)))
+
+    def claims(self, ttl: float) -> dict:
+        return {"id": self.id, "name": self.full_name, "group_id": self.group_id,
+                "admin": self.is_admin, "iat": time.time(), "exp": time.time() + ttl}
+
+    @classmethod
+    def from_claims(cls, c: dict) -> "Principal":
+        return cls(int(c["id"]), c.get("name") or "", c.get("group_id"), bool(c.get("admin")))
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._items: dict[int, tuple[float, Principal]] = {}
+        self._revoked: dict[int, float] = {}  # student_id -> когда сброшен (wall clock, для claims)
+        self._revoked_all = 0.0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, uid: int) -> Optional[Principal]:
+        item = self._items.get(uid)
+        if item is None or item[0] <= time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1]
+
+    def put(self, principal: Principal) -> None:
+        with self._lock:
+            self._items[principal.id] = (time.monotonic() + self.ttl, principal)
+
+    def invalidate(self, uid: Optional[int] = None) -> None:
+        now = time.time()
+        with self._lock:
+            if uid is None:
+                self._items.clear()
+                self._revoked.clear()
+                self._revoked_all = now
+            else:
+                self._items.pop(uid, None)
+                self._revoked[uid] = now
+
+    def claims_valid(self, c: dict) -> bool:
+        iat = c.get("iat", 0)
+        return (c.get("exp", 0) > time.time() and iat > self._revoked_all
+                and iat > self._revoked.get(c.get("id"), 0))
+
+
+def get_cache() -> PrincipalCache:
+    ext = current_app.extensions
+    cache = ext.get("principal_cache")
+    if cache is None:
+        cache = PrincipalCache(float(current_app.config.get("PRINCIPAL_TTL", 60)))
+        ext["principal_cache"] = cache
+    return cache
+
+
+def remember(principal: Principal) -> None:
+    """Выдать claims в сессию (при логине и после чтения из БД)."""
+    session[_SESSION_KEY] = principal.claims(get_cache().ttl)
+
+
+def load(uid: int) -> Optional[Principal]:
+    cache = get_cache()
+    claims = session.get(_SESSION_KEY)
+    if isinstance(claims, dict) and claims.get("id") == uid and cache.claims_valid(claims):
+        return Principal.from_claims(claims)
+
+    principal = cache.get(uid)
+    if principal is None:
+        student = db.session.get(Student, uid)
+        if student is None:
+            session.pop(_SESSION_KEY, None)
+            return None
+        principal = Principal.of(student)
+        cache.put(principal)
+    remember(principal)
+    return principal
+
+
+def forget() -> None:
+    session.pop(_SESSION_KEY, None)
+
+
+def invalidate(uid: Optional[int] = None) -> None:
+    """Сбросить кеш по студенту (или целиком) в этом процессе."""
+    if not has_app_context():
+        return
+    cache = current_app.extensions.get("principal_cache")
+    if cache is not None:
+        cache.invalidate(uid)
+
+
+@event.listens_for(Session, "after_flush")
+def _student_changed(session_, flush_context):
+    changed = [obj.id for obj in (*session_.dirty, *session_.deleted)
+               if isinstance(obj, Student) and obj.id is not None]
+    for uid in changed:
+        invalidate(uid)
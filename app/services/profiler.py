@@ -0,0 +1,167 @@
+# app/services/profiler.py
+"""
+Сэмплирующий профайлер для боевых воркеров, включается на ходу.
+
+Поток раз в PROFILER_INTERVAL_MS снимает стеки всех потоков процесса (sys._current_frames)
+и считает одинаковые стеки. Код приложения не трогается, поэтому накладные расходы —
+только на сам снимок. Через N секунд результат пишется в PROFILE_DIR в формате
+collapsed stacks (по строке «корень;...;лист число»), один файл на воркер:
+<host>-<pid>-<время>.folded. Такой файл открывают flamegraph.pl, speedscope и inferno.
+
+Как включить:
+  POST /admin/api/profile?seconds=30  — профилирует воркер, который принял запрос
+                                        (&wait=1 — дождаться и вернуть стеки в ответе);
+  kill -USR2 <pid воркера>            — то же на PROFILER_SIGNAL_SECONDS секунд; обработчик
+                                        ставит gunicorn.conf.py (post_worker_init). Мастеру
+                                        gunicorn USR2 не посылать: для него это горячая замена.
+
+Стеки ожидания (поток в threading/selectors/queue — свободные потоки gthread, ожидание
+сокета) отбрасываются, чтобы в профиле была только работа.
+"""
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+_SITE = "site-packages" + os.sep
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "socketserver.py")
+_MAX_DEPTH = 128
+
+
+class ProfileRun:
+    def __init__(self, seconds: float, path: str):
+        self.seconds = seconds
+        self.path = path
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.done = threading.Event()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    def __init__(self, interval_s: float = 0.005, out_dir: str = "profiles", max_seconds: float = 120):
+        self.interval_s = interval_s
+        self.out_dir = out_dir
+        self.max_seconds = max_seconds
+        self.current: Optional[ProfileRun] = None
+        self._lock = threading.Lock()
+        self._labels: dict = {}  # code -> подпись кадра
+
+    @property
+    def running(self) -> bool:
+        run = self.current
+        return run is not None and not run.done.is_set()
+
+    def start(self, seconds: float) -> Optional[ProfileRun]:
+        """Запустить замер на seconds (не дольше max_seconds); None — уже идёт другой."""
+        seconds = max(0.01, min(float(seconds), self.max_seconds))
+        with self._lock:
+            if self.running:
+                return None
+            name = f"{socket.gethostname()}-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S-%f}.folded"
+            run = self.current = ProfileRun(seconds, os.path.join(self.out_dir, name))
+        threading.Thread(target=self._sample, args=(run,), name="sampling-profiler", daemon=True).start()
+        log.info("profiling pid %d for %.1fs -> %s", os.getpid(), seconds, run.path)
+        return run
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            if path.startswith(_ROOT):
+                path = os.path.relpath(path, _ROOT)
+            elif _SITE in path:
+                path = path[path.rfind(_SITE) + len(_SITE):]
+            else:
+                path = os.path.basename(path)
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name}_({path}:{code.co_firstlineno})".replace(" ", "_")
+        return label
+
+    def _collapse(self, frame) -> Optional[str]:
+        if frame.f_code.co_filename.endswith(_IDLE_FILES):
+            return None
+        labels = []
+        while frame is not None and len(labels) < _MAX_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _sample(self, run: ProfileRun) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + run.seconds
+        try:
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = self._collapse(frame)
+                    if stack:
+                        run.stacks[stack] += 1
+                run.samples += 1
+                time.sleep(self.interval_s)
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(run.path, "w", encoding="utf-8") as f:
+                f.write(run.collapsed())
+            log.info("profile written: %s (%d samples, %d stacks)", run.path, run.samples, len(run.stacks))
+        except Exception:
+            log.exception("profiler failed")
+        finally:
+            run.done.set()
+
+
+_profiler: Optional[SamplingProfiler] = None
+_signal_seconds = 30.0
+
+
+def configure(cfg) -> SamplingProfiler:
+    """Профайлер процесса по настройкам приложения (create_app). Глобальный, а не в
+    current_app.extensions: обработчику сигнала контекст приложения недоступен."""
+    global _profiler, _signal_seconds
+    _profiler = SamplingProfiler(interval_s=float(cfg.get("PROFILER_INTERVAL_MS", 5)) / 1000,
+                                 out_dir=cfg.get("PROFILE_DIR", "profiles"),
+                                 max_seconds=float(cfg.get("PROFILER_MAX_SECONDS", 120)))
+    _signal_seconds = float(cfg.get("PROFILER_SIGNAL_SECONDS", 30))
+    return _profiler
+
+
+def get_profiler() -> SamplingProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
+
+
+def _on_signal(signum, frame):
+    if get_profiler().start(_signal_seconds) is None:
+        log.warning("profiler already running, signal %d ignored", signum)
+
+
+def install_signal_handler(signame: str = "SIGUSR2") -> None:
+    """Замер по сигналу; вызывать в главном потоке воркера (gunicorn post_worker_init)."""
+    signal.signal(getattr(signal, signame), _on_signal)
+
+
+def list_profiles() -> list[dict]:
+    out_dir = get_profiler().out_dir
+    try:
+        names = [n for n in os.listdir(out_dir) if n.endswith(".folded")]
+    except FileNotFoundError:
+        return []
+    items = []
+    for name in names:
+        st = os.stat(os.path.join(out_dir, name))
+        items.append({"name": name, "size": st.st_size,
+                      "created_at": datetime.fromtimestamp(st.st_mtime).isoformat(timespec="seconds")})
+    return sorted(items, key=lambda x: x["created_at"], reverse=True)
@@ -0,0 +1,144 @@
+# app/services/results.py
+"""
+Лента отправок для /admin/api/results.json.
+
+Порядок — (created_at, id) по убыванию, листаем курсором (keyset): следующая страница
+начинается строго после последней строки предыдущей, так что глубина листания не влияет
+на стоимость запроса, а новые отправки не сдвигают страницы. Под каждый фильтр есть
+составной индекс с хвостом (created_at, id) — см. миграцию f3b8a2c6d914.
+Старые строки без created_at (столбец nullable) идут в самом конце, по id.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional
+
+from ..extensions import db
+from ..models import Student, Submission, Task
+
+
+class BadQuery(ValueError):
+    """Некорректный фильтр или курсор (ответ 400)."""
+
+
+@dataclass
+class ResultsFilter:
+    student_id: Optional[int] = None
+    group_id: Optional[int] = None
+    task_id: Optional[int] = None
+    module_id: Optional[int] = None
+    statuses: list = field(default_factory=list)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    @classmethod
+    def from_args(cls, args) -> "ResultsFilter":
+        statuses = [s.strip() for s in (args.get("status") or "").split(",") if s.strip()]
+        return cls(
+            student_id=args.get("student_id", type=int),
+            group_id=args.get("group_id", type=int),
+            task_id=args.get("task_id", type=int),
+            module_id=args.get("module_id", type=int),
+            statuses=statuses,
+            since=_parse_time(args.get("since"), "since"),
+            until=_parse_time(args.get("until"), "until"),
+        )
+
+
+def _parse_time(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        raise BadQuery(f"{name}: expected ISO 8601 datetime")
+
+
+def encode_cursor(created_at: Optional[datetime], sub_id: int) -> str:
+    raw = f"{created_at.isoformat() if created_at else ''}|{sub_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        created_at, sub_id = raw.split("|")
+        return (datetime.fromisoformat(created_at) if created_at else None), int(sub_id)
+    except ValueError:
+        raise BadQuery("bad cursor")
+
+
+def query(f: ResultsFilter, *extra):
+    """Отправки под фильтром (без порядка); extra — дополнительные столбцы."""
+    q = (
+        db.session.query(
+            Submission.id,
+            Submission.created_at,
+            Submission.status,
+            Submission.score,
+            Submission.student_id,
+            Submission.task_id,
+            Student.full_name.label("student"),
+            Task.title.label("task"),
+            Task.module_id.label("module_id"),
+            *extra,
+        )
+        .join(Student, Student.id == Submission.student_id)
+        .join(Task, Task.id == Submission.task_id)
+    )
+    if f.student_id:
+        q = q.filter(Submission.student_id == f.student_id)
+    if f.group_id:
+        q = q.filter(Student.group_id == f.group_id)
+    if f.task_id:
+        q = q.filter(Submission.task_id == f.task_id)
+    if f.module_id:
+        q = q.filter(Task.module_id == f.module_id)
+    if f.statuses:
+        q = q.filter(Submission.status.in_(f.statuses))
+    if f.since:
+        q = q.filter(Submission.created_at >= f.since)
+    if f.until:
+        q = q.filter(Submission.created_at < f.until)
+    return q
+
+
+def to_json(r) -> dict:
+    return {
+        "id": r.id,
+        "when": r.created_at.isoformat() if r.created_at else None,
+        "status": r.status,
+        "score": r.score,
+        "student_id": r.student_id,
+        "student": r.student,
+        "task_id": r.task_id,
+        "task": r.task,
+        "module_id": r.module_id,
+    }
+
+
+def page(f: ResultsFilter, limit: int, cursor: Optional[str] = None) -> tuple[list, Optional[str]]:
+    """Одна страница (новые первыми) и курсор следующей (None — дальше пусто)."""
+    q = query(f)
+    if cursor:
+        created_at, sub_id = decode_cursor(cursor)
+        if created_at is None:  # уже в хвосте строк без created_at
+            q = q.filter(Submission.created_at.is_(None), Submission.id < sub_id)
+        else:
+            q = q.filter(db.or_(db.tuple_(Submission.created_at, Submission.id) < (created_at, sub_id),
+                                Submission.created_at.is_(None)))
+    rows = (q.order_by(Submission.created_at.desc().nulls_last(), Submission.id.desc())
+            .limit(limit + 1).all())
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if more else None
+    return rows, next_cursor
+
+
+def iter_all(f: ResultsFilter, chunk: int = 1000, cursor: Optional[str] = None) -> Iterator:
+    """Все строки под фильтром, страницами по chunk: память и длина транзакций не растут с выгрузкой."""
+    while True:
+        rows, cursor = page(f, chunk, cursor)
+        yield from rows
+        if cursor is None:
+            return
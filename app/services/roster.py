@@ -0,0 +1,100 @@
+# app/services/roster.py
+"""
+Импорт состава группы из CSV (full_name, auth_code).
+
+Файл читается потоково (csv поверх потока загрузки, без .read() целиком), строки
+проверяются и пишутся порциями по chunk: на порцию — один INSERT ... ON CONFLICT (auth_code)
+DO UPDATE и короткая транзакция. Существующий студент получает новое ФИО (если оно
+указано) и переводится в группу. dry_run — только проверка и подсчёт, без записи.
+"""
+import csv
+import io
+import time
+from datetime import datetime
+from typing import BinaryIO
+
+from ..extensions import db
+from ..models import Student, StudyGroup, validate_cyr_code
+from . import principals
+
+
+def _insert(bind):
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Student)
+
+
+def _write_chunk(rows: dict, group_id: int, dry_run: bool) -> tuple[int, int]:
+    """rows: auth_code -> full_name. Возвращает (создано, обновлено)."""
+    existing = {code for (code,) in db.session.query(Student.auth_code).filter(Student.auth_code.in_(list(rows)))}
+    if not dry_run:
+        now = datetime.utcnow()
+        stmt = _insert(db.session.connection()).values([
+            {"auth_code": code, "full_name": name, "group_id": group_id, "created_at": now}
+            for code, name in rows.items()
+        ])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[Student.auth_code],
+            set_={
+                # пустое ФИО в файле не затирает имеющееся
+                "full_name": db.func.coalesce(db.func.nullif(stmt.excluded.full_name, ""), Student.full_name),
+                "group_id": stmt.excluded.group_id,
+            },
+        ))
+        db.session.commit()
+        if existing:
+            principals.invalidate()  # upsert мимо ORM — сбрасываем кеш входа целиком
+    return len(rows) - len(existing), len(existing)
+
+
+def import_csv(fileobj: BinaryIO, group: StudyGroup, *, dry_run: bool = False, chunk: int = 500,
+               encoding: str = "utf-8-sig") -> dict:
+    """
+    Импорт в группу. Ошибки — построчно ("Строка N: ..."), такие строки пропускаются.
+    Повтор кода внутри файла — тоже ошибка (иначе непонятно, какое ФИО верное).
+    """
+    started = time.perf_counter()
+    group_id = group.id
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    reader = csv.DictReader(text)
+
+    stats = {"created": 0, "updated": 0, "errors": [], "rows": 0, "dry_run": dry_run}
+    seen: set[str] = set()
+    pending: dict[str, str] = {}
+
+    def flush():
+        created, updated = _write_chunk(pending, group_id, dry_run)
+        stats["created"] += created
+        stats["updated"] += updated
+        pending.clear()
+
+    try:
+        for i, row in enumerate(reader, start=1):
+            stats["rows"] += 1
+            name = (row.get("full_name") or "").strip()
+            code = (row.get("auth_code") or "").strip().upper()
+            try:
+                validate_cyr_code(code)
+            except ValueError as e:
+                stats["errors"].append(f"Строка {i}: {e}")
+                continue
+            if code in seen:
+                stats["errors"].append(f"Строка {i}: код {code} уже встречался в файле")
+                continue
+            seen.add(code)
+            pending[code] = name
+            if len(pending) >= chunk:
+                flush()
+        if pending:
+            flush()
+    except UnicodeDecodeError:
+        stats["errors"].append(f"Файл не в кодировке {encoding}")
+    finally:
+        text.detach()  # поток загрузки закроет Flask
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_s"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else None
+    return stats
@@ -0,0 +1,168 @@
+# app/services/scheduler.py
+"""
+Планировщик перед ExecEngine.
+
+ExecEngine держит не больше MAX_CONCURRENT_SUBMISSIONS батчей одновременно
+и не больше MAX_BATCH_SIZE тестов в батче (execengine.ini). Поэтому:
+  - в работе одновременно не больше EE_MAX_CONCURRENT_SUBMISSIONS батчей
+    (считаем по БД под общим замком lock_capacity, так что лимит общий для всех
+    judge-worker'ов);
+  - из очереди берём по справедливости: сначала группы, у которых меньше
+    всего в работе, внутри группы — студенты с наименьшим числом батчей в работе,
+    дальше — кто раньше отправил. Один студент, жмущий «Отправить», не займёт все слоты;
+  - задачи с числом тестов > EE_MAX_BATCH_SIZE режутся на несколько батчей,
+    результаты склеиваются по порядку кусков (см. judging.collect_running);
+  - задачи в режиме fail_fast идут кусками: сначала открытые тесты, затем
+    по EE_FAIL_FAST_CHUNK. Следующий кусок отпускается (held -> pending),
+    только если все предыдущие тесты прошли, иначе остаток пропускается.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from ..extensions import db
+from ..models import Student, Submission, SubmissionBatch
+from .locks import xact_lock
+
+BATCH_HELD = "held"  # fail_fast: ждёт, пока пройдут предыдущие куски
+BATCH_PENDING = "pending"
+BATCH_SENDING = "sending"  # взят воркером, HTTP-запрос в ExecEngine в пути
+BATCH_RUNNING = "running"
+BATCH_DONE = "done"
+BATCH_SKIPPED = "skipped"  # fail_fast: вердикт решён раньше, не отправляли
+
+FAIL_FAST = "fail_fast"
+
+# занимают слот ExecEngine (или вот-вот займут)
+OCCUPYING = (BATCH_SENDING, BATCH_RUNNING)
+IN_FLIGHT = (BATCH_PENDING, BATCH_SENDING, BATCH_RUNNING)
+
+
+_CAPACITY_LOCK = 0x6A756467  # ключ advisory lock Postgres ("judg")
+
+
+def lock_capacity() -> None:
+    """
+    Замок над слотами ExecEngine до конца текущей транзакции, общий для всех процессов:
+    подсчёт занятых слотов и взятие работы не должны перемежаться у двух воркеров.
+    """
+    xact_lock(_CAPACITY_LOCK)
+
+
+def capacity(cfg) -> int:
+    return max(1, int(cfg.get("EE_MAX_CONCURRENT_SUBMISSIONS", 5)))
+
+
+def ordered_tests(task) -> list:
+    """Тесты в порядке проверки (и в порядке results): в режиме fail_fast открытые идут первыми."""
+    tests = list(task.tests)
+    if task.judging_mode == FAIL_FAST:
+        tests.sort(key=lambda t: bool(t.hidden))  # sort стабилен — порядок внутри сохраняется
+    return tests
+
+
+def plan_chunks(n_tests: int, max_batch_size: int) -> list[tuple[int, int]]:
+    """[(first_test, n_tests), ...]; задача без тестов — один пустой кусок."""
+    size = max(1, int(max_batch_size))
+    if n_tests <= 0:
+        return [(0, 0)]
+    return [(i, min(size, n_tests - i)) for i in range(0, n_tests, size)]
+
+
+def plan_for(task, n_tests: int, n_visible: int, cfg) -> list[tuple[int, int]]:
+    """
+    Куски для задачи. Тесты — в порядке ordered_tests: для fail_fast
+    первые n_visible из них открытые.
+    """
+    max_size = int(cfg.get("EE_MAX_BATCH_SIZE", 50))
+    if getattr(task, "judging_mode", None) != FAIL_FAST or n_tests <= 0:
+        return plan_chunks(n_tests, max_size)
+
+    step = min(max_size, max(1, int(cfg.get("EE_FAIL_FAST_CHUNK", 5))))
+    chunks = plan_chunks(n_visible, max_size) if n_visible else []
+    chunks += [(n_visible + first, n) for first, n in plan_chunks(n_tests - n_visible, step)
+               if n]
+    return chunks
+
+
+def initial_status(task, part: int) -> str:
+    if getattr(task, "judging_mode", None) == FAIL_FAST and part > 0:
+        return BATCH_HELD
+    return BATCH_PENDING
+
+
+def running_batches() -> int:
+    return SubmissionBatch.query.filter(SubmissionBatch.status.in_(OCCUPYING)).count()
+
+
+def inflight_load() -> tuple[Counter, Counter]:
+    """Сколько батчей в работе/ожидании у каждого студента и у каждой группы."""
+    rows = (
+        db.session.query(Submission.student_id, Student.group_id, db.func.count(SubmissionBatch.id))
+        .join(Submission, Submission.id == SubmissionBatch.submission_id)
+        .join(Student, Student.id == Submission.student_id)
+        .filter(SubmissionBatch.status.in_(IN_FLIGHT))
+        .group_by(Submission.student_id, Student.group_id)
+        .all()
+    )
+    by_student, by_group = Counter(), Counter()
+    for student_id, group_id, n in rows:
+        by_student[student_id] += n
+        by_group[group_id] += n
+    return by_student, by_group
+
+
+def fair_order(candidates: Iterable[tuple[Submission, int]], by_student: Counter, by_group: Counter) -> list:
+    """
+    Справедливый порядок кандидатов (Submission, group_id): на каждом шаге берём того,
+    у чьей группы, а затем у кого самого, меньше всего уже в работе (с учётом выбранных
+    на этом шаге), при равенстве — более раннюю отправку.
+    """
+    by_student, by_group = Counter(by_student), Counter(by_group)
+    left = list(candidates)
+    ordered = []
+    while left:
+        best = min(left, key=lambda c: (by_group[c[1]], by_student[c[0].student_id], c[0].id))
+        left.remove(best)
+        ordered.append(best[0])
+        by_group[best[1]] += 1
+        by_student[best[0].student_id] += 1
+    return ordered
+
+
+def queue_metrics(cfg, window_s: int = 900) -> dict:
+    """Глубина очереди и время ожидания (по БД — общие для всех процессов)."""
+    now = datetime.utcnow()
+    queued = Submission.query.filter(Submission.status == "queued")
+    oldest = queued.with_entities(db.func.min(Submission.created_at)).scalar()
+    by_status = dict(
+        db.session.query(SubmissionBatch.status, db.func.count(SubmissionBatch.id))
+        .filter(SubmissionBatch.status.in_(IN_FLIGHT))
+        .group_by(SubmissionBatch.status)
+        .all()
+    )
+    waits = sorted(
+        (started - created).total_seconds()
+        for created, started in db.session.query(Submission.created_at, Submission.started_at)
+        .filter(Submission.started_at >= now - timedelta(seconds=window_s))
+        .order_by(Submission.started_at.desc())
+        .limit(2000)
+        .all()
+        if created and started
+    )
+    return {
+        "queued": queued.count(),
+        "oldest_queued_s": (now - oldest).total_seconds() if oldest else 0.0,
+        "batches_running": by_status.get(BATCH_RUNNING, 0) + by_status.get(BATCH_SENDING, 0),
+        "batches_pending": by_status.get(BATCH_PENDING, 0),
+        "capacity": capacity(cfg),
+        "max_batch_size": int(cfg.get("EE_MAX_BATCH_SIZE", 50)),
+        "wait_s": {
+            "window_s": window_s,
+            "count": len(waits),
+            "avg": sum(waits) / len(waits) if waits else 0.0,
+            "p50": waits[len(waits) // 2] if waits else 0.0,
+            "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "max": waits[-1] if waits else 0.0,
+        },
+    }
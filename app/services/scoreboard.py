@@ -0,0 +1,230 @@
+# app/services/scoreboard.py
+"""
+Сводная по лучшим результатам.
+
+best_scores — по строке на (студент, задача) с лучшей оценкой и отправкой, которая её дала.
+Таблица ведётся инкрементально: после каждого flush, в котором у проверенной отправки
+поменялись score/status (finish, копия из кеша вердиктов, rescore, правка в админке),
+пара (студент, задача) обновляется upsert'ом в той же транзакции. Если оценка лучшей
+отправки упала или её удалили — пара пересчитывается по submissions.
+
+Сводки по модулям и группам считаются из best_scores, поэтому их стоимость зависит от
+числа студентов и задач, а не от числа отправок. `flask scoreboard-rebuild` пересобирает
+таблицу целиком (после импорта, ручных правок в БД и т. п.).
+"""
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import BestScore, Discipline, Module, Student, StudyGroup, Submission, Task
+
+# не оценки: ещё не проверено или сбой инфраструктуры
+_UNSCORED = ("queued", "running", "error")
+
+Choice = namedtuple("Choice", "id name")
+
+
+def _insert(bind):
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(BestScore)
+
+
+def _ranked(where=None):
+    """Лучшая отправка по каждой паре: больше баллов, при равенстве — более ранняя."""
+    score = db.func.coalesce(Submission.score, 0)
+    rank = db.func.row_number().over(
+        partition_by=(Submission.student_id, Submission.task_id),
+        order_by=(score.desc(), Submission.id.asc()),
+    ).label("rank")
+    q = (
+        db.select(Submission.student_id, Submission.task_id, score.label("score"),
+                  Submission.status, Submission.id.label("submission_id"), rank)
+        .where(Submission.status.notin_(_UNSCORED))
+    )
+    if where is not None:
+        q = q.where(where)
+    ranked = q.subquery()
+    return db.select(ranked.c.student_id, ranked.c.task_id, ranked.c.score, ranked.c.status,
+                     ranked.c.submission_id).where(ranked.c.rank == 1)
+
+
+def _upsert(conn, student_id: int, task_id: int, score: int, status: str, submission_id: int) -> None:
+    stmt = _insert(conn).values(student_id=student_id, task_id=task_id, score=score or 0,
+                                status=status, submission_id=submission_id, updated_at=datetime.utcnow())
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[BestScore.student_id, BestScore.task_id],
+        set_={"score": stmt.excluded.score, "status": stmt.excluded.status,
+              "submission_id": stmt.excluded.submission_id, "updated_at": stmt.excluded.updated_at},
+        where=(stmt.excluded.score > BestScore.score) | (BestScore.submission_id == stmt.excluded.submission_id),
+    ))
+
+
+def _recompute(conn, student_id: int, task_id: int) -> None:
+    conn.execute(db.delete(BestScore).where(BestScore.student_id == student_id, BestScore.task_id == task_id))
+    best = conn.execute(_ranked((Submission.student_id == student_id) & (Submission.task_id == task_id))).first()
+    if best is not None:
+        _upsert(conn, best.student_id, best.task_id, best.score, best.status, best.submission_id)
+
+
+def _effect(sub: Submission) -> Optional[str]:
+    """Что сделать с парой после flush: None — ничего, "upsert" — оценка могла только вырасти, "recompute"."""
+    state = inspect(sub)
+    score, status = state.attrs.score.history, state.attrs.status.history
+    if not score.has_changes() and not status.has_changes():
+        return None
+    old_status = status.deleted[0] if status.deleted else sub.status
+    if sub.status in _UNSCORED:
+        # перепроверка или сбой: если раньше была оценка, она могла быть лучшей
+        return "recompute" if old_status not in _UNSCORED else None
+    old_score = score.deleted[0] if score.deleted else None
+    if old_score is None or old_status in _UNSCORED or (sub.score or 0) >= old_score:
+        return "upsert"
+    return "recompute"
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain(session, flush_context):
+    todo = [(sub, _effect(sub)) for sub in session.new | session.dirty
+            if isinstance(sub, Submission) and sub.id is not None]
+    todo = [(sub, effect) for sub, effect in todo if effect]
+    todo += [(sub, "recompute") for sub in session.deleted if isinstance(sub, Submission)]
+    if not todo:
+        return
+
+    conn = session.connection()
+    for sub, effect in todo:
+        if effect == "upsert":
+            _upsert(conn, sub.student_id, sub.task_id, sub.score, sub.status, sub.id)
+        else:
+            _recompute(conn, sub.student_id, sub.task_id)
+
+
+def rebuild() -> int:
+    """Пересобрать best_scores по всем отправкам. Возвращает число строк."""
+    db.session.execute(db.delete(BestScore))
+    cols = ("student_id", "task_id", "score", "status", "submission_id", "updated_at")
+    best = _ranked().add_columns(db.literal(datetime.utcnow(), db.DateTime).label("updated_at"))
+    db.session.execute(db.insert(BestScore).from_select(cols, best))
+    db.session.commit()
+    return db.session.query(db.func.count()).select_from(BestScore).scalar()
+
+
+# ---------- сводки ----------
+
+def modules_for(discipline_id: Optional[int] = None) -> list[tuple[int, str]]:
+    """Столбцы сводной: [(module_id, name)] в порядке дисциплины и Module.order."""
+    q = db.session.query(Module.id, Module.name)
+    if discipline_id:
+        q = q.filter(Module.discipline_id == discipline_id)
+    return [tuple(r) for r in q.order_by(Module.discipline_id, Module.order, Module.id)]
+
+
+def _students(group_id: Optional[int]):
+    q = db.session.query(Student.id)
+    if group_id:
+        q = q.filter(Student.group_id == group_id)
+    return q
+
+
+def students_page(group_id: Optional[int], page: int, per_page: int) -> tuple[list[int], int]:
+    """id студентов страницы (по ФИО) и общее число студентов под фильтром."""
+    q = _students(group_id)
+    total = q.count()
+    ids = [sid for (sid,) in q.order_by(Student.full_name, Student.id)
+           .offset(max(0, page - 1) * per_page).limit(per_page)]
+    return ids, total
+
+
+def iter_matrix(modules: list[tuple[int, str]], group_id: Optional[int] = None,
+                student_ids: Optional[list[int]] = None, yield_per: int = 1000) -> Iterator[tuple]:
+    """
+    Строки сводной (student_id, ФИО, [баллы по modules], итого) в порядке ФИО — за один проход
+    по одному упорядоченному запросу, без накопления: подходит и для потоковой выгрузки.
+    Студенты без единой оценки тоже попадают (нулями).
+    """
+    column = {mid: i for i, (mid, _) in enumerate(modules)}
+    if not column:
+        return
+    sums = (
+        db.session.query(BestScore.student_id, Task.module_id, db.func.sum(BestScore.score).label("score"))
+        .join(Task, Task.id == BestScore.task_id)
+        .filter(Task.module_id.in_(list(column)))
+        .group_by(BestScore.student_id, Task.module_id)
+        .subquery()
+    )
+    q = (
+        db.session.query(Student.id, Student.full_name, sums.c.module_id, sums.c.score)
+        .outerjoin(sums, sums.c.student_id == Student.id)
+        .order_by(Student.full_name, Student.id)
+    )
+    if group_id:
+        q = q.filter(Student.group_id == group_id)
+    if student_ids is not None:
+        q = q.filter(Student.id.in_(student_ids))
+
+    current, name, scores = None, None, None
+    for student_id, full_name, module_id, score in q.execution_options(yield_per=yield_per):
+        if student_id != current:
+            if current is not None:
+                yield current, name, scores, sum(scores)
+            current, name, scores = student_id, full_name, [0] * len(modules)
+        if module_id is not None:
+            scores[column[module_id]] = int(score or 0)
+    if current is not None:
+        yield current, name, scores, sum(scores)
+
+
+def filter_choices(ttl: float = 60.0) -> tuple[list, list]:
+    """Списки групп и дисциплин для фильтров (кешируются на процесс на ttl секунд)."""
+    ext = current_app.extensions
+    cached = ext.get("scoreboard_choices")
+    now = time.monotonic()
+    if cached is None or cached[0] <= now:
+        groups = [Choice(*r) for r in db.session.query(StudyGroup.id, StudyGroup.name).order_by(StudyGroup.name)]
+        disciplines = [Choice(*r) for r in db.session.query(Discipline.id, Discipline.name).order_by(Discipline.name)]
+        cached = (now + ttl, groups, disciplines)
+        ext["scoreboard_choices"] = cached
+    return cached[1], cached[2]
+
+
+def group_module_scores(discipline_id: Optional[int] = None) -> list:
+    """По группам и модулям: сколько студентов что-то сдали, средний и суммарный балл."""
+    per_student = (
+        db.session.query(
+            Student.group_id.label("group_id"),
+            Task.module_id.label("module_id"),
+            db.func.sum(BestScore.score).label("score"),
+        )
+        .join(Student, Student.id == BestScore.student_id)
+        .join(Task, Task.id == BestScore.task_id)
+        .group_by(Student.id, Student.group_id, Task.module_id)
+    )
+    if discipline_id:
+        per_student = per_student.join(Module, Module.id == Task.module_id).filter(
+            Module.discipline_id == discipline_id)
+    per_student = per_student.subquery()
+    return (
+        db.session.query(
+            StudyGroup.id.label("group_id"),
+            StudyGroup.name.label("group_name"),
+            Module.id.label("module_id"),
+            Module.name.label("module_name"),
+            db.func.count().label("students"),
+            db.func.avg(per_student.c.score).label("avg_score"),
+            db.func.sum(per_student.c.score).label("total_score"),
+        )
+        .join(StudyGroup, StudyGroup.id == per_student.c.group_id)
+        .join(Module, Module.id == per_student.c.module_id)
+        .group_by(StudyGroup.id, StudyGroup.name, Module.id, Module.name)
+        .order_by(StudyGroup.name, Module.id)
+        .all()
+    )
@@ -1,22 +1,101 @@
 # app/services/scoring.py
-import base64
-from math import floor
+from types import SimpleNamespace
+from typing import Optional
 
-def _b64dec(s):
-    if s is None:
-        return None
+from . import checker
+from .scheduler import ordered_tests
+
+_PASSED = ("OK", "SUCCESS")
+# статусы, при которых вывод сверяем сами: ExecEngine сравнивает строго,
+# а у задачи может быть другой режим (см. services/checker.py)
+_CHECKABLE = ("", "WRONG ANSWER", "WA")
+_VERDICTS = (("WRONG", "WA"), ("TIME LIMIT", "TLE"), ("MEMORY", "MLE"), ("RUNTIME", "RE"),
+             ("COMPIL", "CE"), ("SKIP", "SKIP"), ("INTERNAL", "IE"))
+_NO_TEST = SimpleNamespace(points=0)
+
+# Submission.result["tests"] — по строке на тест, столбцы фиксированы (n — номер строки + 1):
+# verdict — короткий код (test_verdict), diff_at — смещение первого расхождения вывода
+TEST_COLUMNS = ("verdict", "time_ms", "memory_kb", "diff_at", "points", "group")
+
+
+def result_ok(r: dict, spec: Optional[str] = None) -> bool:
+    """Прошёл ли тест: по статусу ExecEngine, а без явного вердикта — сравнением stdout с ожидаемым."""
+    status = (r.get("status") or {}).get("description") or r.get("verdict") or ""
+    status = str(status).upper()
+    if "ACCEPT" in status or status in _PASSED:
+        return True
+    if status not in _CHECKABLE:
+        return False  # TLE, RE, CE, Skipped...
+
+    # Если мы отправляли expected_output, ExecEngine обычно сравнивает сам,
+    # но на случай отсутствия явного флага — сравним stdout/expected_output сами по доступным полям.
+    if r.get("stdout") is None or r.get("expected_output") is None:  # некоторые API возвращают echo ожидаемого
+        return False
+    check = checker.compare(r.get("stdout"), r.get("expected_output"), spec)
+    if not check.ok:
+        r["diff"] = check.to_json()
+    return check.ok
+
+
+def test_verdict(r: dict, ok: bool) -> str:
+    """Короткий вердикт теста: OK / WA / TLE / MLE / RE / CE / SKIP / ..."""
+    if ok:
+        return "OK"
+    status = str((r.get("status") or {}).get("description") or r.get("verdict") or "").upper()
+    for marker, code in _VERDICTS:
+        if marker in status:
+            return code
+    return status or "WA"
+
+
+def expand_tests(result: Optional[dict]) -> list[dict]:
+    """Сводка по тестам как список словарей {"n", "verdict", "time_ms", ...}."""
+    rows = (result or {}).get("tests") or []
+    out = []
+    for i, row in enumerate(rows, start=1):
+        if isinstance(row, dict):  # ещё не сжатая запись
+            out.append({"n": i, **{c: row.get(c) for c in TEST_COLUMNS}})
+        else:
+            out.append({"n": i, **dict(zip(TEST_COLUMNS, row))})
+    return out
+
+
+def _memory_kb(r: dict) -> Optional[int]:
     try:
-        return base64.b64decode(s).decode("utf-8", errors="replace")
-    except Exception:
+        return int(r["memory"]) if r.get("memory") is not None else None
+    except (TypeError, ValueError):
         return None
 
-def score_batch(task, batch_result: dict) -> tuple[int, str, dict]:
+
+def _runtime_ms(r: dict) -> int:
+    try:
+        return int(round(float(r.get("time") or 0) * 1000))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _weights(tests: list, max_score: int) -> list[float]:
+    """Баллы тестов в долях max_score: по TaskTest.points, а если они не заданы — поровну."""
+    points = [max(0, t.points or 0) for t in tests]
+    total = sum(points)
+    if total <= 0:
+        return [max_score / len(tests)] * len(tests)
+    return [max_score * p / total for p in points]
+
+
+def score_batch(task, batch_result: dict, tests: Optional[list] = None) -> tuple[int, str, dict]:
     """
     Возвращает (points, verdict, summary_json).
     Ожидаем формат batch_result["results"] = [{ "stdout": <b64>, "status": {...}, ...}, ...]
     Если формата нет — ставим 'PENDING'.
+
+    i-й результат — i-й тест в порядке scheduler.ordered_tests (tests, если передан).
+    Тест приносит свою долю TaskTest.points; тесты с общим TaskTest.group — подзадача,
+    её баллы начисляются, только если прошли все её тесты. summary_json — компактная
+    сводка без сырых results: "tests" (строки по TEST_COLUMNS), "runtime_ms" и "memory_kb"
+    (максимумы по тестам). Сырые results хранит вызывающий (см. services/archive.py).
     """
-    results = batch_result
+    results = batch_result.get("results") if isinstance(batch_result, dict) else batch_result
     if not isinstance(results, list):
         return 0, "PENDING", batch_result or {}
 
@@ -24,30 +103,38 @@ def score_batch(task, batch_result: dict) -> tuple[int, str, dict]:
     if n == 0:
         return 0, "PENDING", batch_result
 
-    # Равномерно распределим баллы
-    per = max(1, floor(task.max_points / n))
-    gained = 0
-    all_ok = True
+    if tests is None:
+        tests = ordered_tests(task)
+    if len(tests) != n:
+        # тесты задачи поменялись после отправки — сопоставить нельзя, считаем поровну
+        tests = [None] * n
+    weights = _weights([t or _NO_TEST for t in tests], task.max_score)
+    spec = getattr(task, "checker", None)
 
-    # Если мы отправляли expected_output, ExecEngine обычно сравнивает сам,
-    # но на случай отсутствия явного флага — сравним stdout/expected_output сами по доступным полям.
-    for r in results:
-        status = (r.get("status") or {}).get("description") or r.get("verdict") or ""
-        status = str(status).upper()
-        if "ACCEPT" in status or status in ("OK", "SUCCESS"):
-            gained += per
-            continue
-
-        # fallback: сравнить stdout vs expected_output, если присутствуют
-        out = _b64dec(r.get("stdout"))
-        exp = _b64dec(r.get("expected_output"))  # некоторые API возвращают echo ожидаемого
-        if exp is not None and out is not None and out.strip() == exp.strip():
-            gained += per
-        else:
-            all_ok = False
+    per_test = []
+    group_ok: dict = {}
+    for r, t, w in zip(results, tests, weights):
+        ok = result_ok(r, spec)
+        group = getattr(t, "group", None)
+        if group:
+            group_ok[group] = group_ok.get(group, True) and ok
+        per_test.append((test_verdict(r, ok), _runtime_ms(r), _memory_kb(r),
+                         (r.get("diff") or {}).get("position"), w, ok, group))
+
+    gained = 0.0
+    rows = []
+    for code, time_ms, memory_kb, diff_at, w, ok, group in per_test:
+        passed = group_ok[group] if group else ok
+        points = round(w if passed else 0.0, 2)
+        gained += points
+        rows.append([code, time_ms, memory_kb, diff_at, points, group])
+
+    all_ok = all(row[0] == "OK" for row in rows)
+    # если все тесты прошли — ровно max_score, без хвостов округления
+    points = task.max_score if all_ok else min(task.max_score, int(gained + 1e-9))
+    verdict = "OK" if all_ok else ("PARTIAL" if gained > 0 else "WA")
 
-    verdict = "OK" if all_ok and gained >= task.max_points else ("PARTIAL" if gained > 0 else "WA")
-    # округлим вверх до max_points если все тесты прошли
-    if verdict == "OK":
-        gained = task.max_points
-    return int(gained), verdict, batch_result
+    memory = [row[2] for row in rows if row[2] is not None]
+    summary = {"tests": rows, "runtime_ms": max(row[1] for row in rows),
+               "memory_kb": max(memory) if memory else None}
+    return int(points), verdict, summary
@@ -0,0 +1,316 @@
+# app/services/tasks_loader.py
+"""
+Загрузка задач пакетами — каталогом или zip-архивом.
+
+Пакет задачи — каталог:
+    task.json (или task.yaml)  метаданные: discipline, module, title, [order, max_score,
+                               judging_mode, checker, input_format, output_format, examples,
+                               points — число или список по тестам, visible — номера открытых
+                               тестов, groups — {имя: [номера тестов]}]
+    statement.md               условие (необязательно)
+    tests/NN.in, tests/NN.out  тесты (можно и в корне пакета)
+Источник — один пакет, каталог с пакетами или zip с тем же содержимым.
+
+Файлы тестов не читаются целиком: хеш считается потоково, а на Postgres тесты
+идут одним COPY FROM STDIN, куда содержимое файлов пишется кусками. На других
+СУБД — executemany порциями. Файлы крупнее BLOB_INLINE_BYTES уходят в хранилище
+(services/blobs.py), в строке теста — только их sha256. Пакет с тем же sha256, что уже в БД (Task.package_hash),
+пропускается — повторный импорт без изменений только читает файлы для хеша.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from ..extensions import db
+from ..models import Discipline, Module, Task, TaskTest
+from . import blobs, catalog, checker
+from .scheduler import FAIL_FAST
+
+_META_FILES = ("task.json", "task.yaml", "task.yml")
+_STATEMENT_FILES = ("statement.md", "statement.html", "statement.txt")
+_TEST_RE = re.compile(r"^(?:tests/)?(\d+)\.in$")
+_READ_BYTES = 1024 * 1024
+_INSERT_CHUNK = 100  # тестов на executemany без COPY
+
+
+class PackageError(ValueError):
+    """Пакет не разобрать (ошибка попадает в отчёт импорта, пакет пропускается)."""
+
+
+# ---------- источники ----------
+
+@dataclass
+class Package:
+    name: str
+    files: list  # относительные пути внутри пакета, через "/"
+    open: Callable[[str], BinaryIO]
+    size: Callable[[str], int]
+
+
+def _dir_package(path: str) -> Package:
+    files = []
+    for root, _, names in os.walk(path):
+        for n in names:
+            files.append(os.path.relpath(os.path.join(root, n), path).replace(os.sep, "/"))
+    return Package(os.path.basename(os.path.normpath(path)), sorted(files),
+                   lambda rel: open(os.path.join(path, *rel.split("/")), "rb"),
+                   lambda rel: os.path.getsize(os.path.join(path, *rel.split("/"))))
+
+
+def _zip_packages(zf: zipfile.ZipFile, default_name: str) -> Iterator[Package]:
+    names = [n for n in zf.namelist() if not n.endswith("/")]
+    roots = sorted({n.rsplit("/", 1)[0] if "/" in n else "" for n in names
+                    if n.rsplit("/", 1)[-1] in _META_FILES})
+    for root in roots:
+        prefix = root + "/" if root else ""
+        files = sorted(n[len(prefix):] for n in names if n.startswith(prefix))
+        yield Package(root.rsplit("/", 1)[-1] if root else default_name, files,
+                      lambda rel, prefix=prefix: zf.open(prefix + rel),
+                      lambda rel, prefix=prefix: zf.getinfo(prefix + rel).file_size)
+
+
+def _has_meta(path: str) -> bool:
+    return any(os.path.isfile(os.path.join(path, m)) for m in _META_FILES)
+
+
+def iter_packages(source: str) -> Iterator[Package]:
+    """Пакеты из каталога (один пакет или каталог пакетов) или zip-архива."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            yield from _zip_packages(zf, os.path.splitext(os.path.basename(source))[0])
+    elif _has_meta(source):
+        yield _dir_package(source)
+    elif os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.isdir(path) and _has_meta(path):
+                yield _dir_package(path)
+    else:
+        raise PackageError(f"{source}: not a directory or zip archive")
+
+
+# ---------- разбор пакета ----------
+
+@dataclass(frozen=True)
+class PackagedTest:
+    order: int
+    input: str
+    output: str
+    points: int
+    hidden: bool
+    group: Optional[str]
+
+
+def _read_meta(pkg: Package) -> dict:
+    for name in _META_FILES:
+        if name in pkg.files:
+            with pkg.open(name) as f:
+                raw = f.read().decode("utf-8-sig")
+            if name == "task.json":
+                meta = json.loads(raw)
+            else:
+                try:
+                    import yaml  # опциональная зависимость: pip install pyyaml
+                except ImportError as e:
+                    raise PackageError(f"{name} requires the 'pyyaml' package") from e
+                meta = yaml.safe_load(raw)
+            if not isinstance(meta, dict):
+                raise PackageError(f"{name}: expected a mapping")
+            return meta
+    raise PackageError("no task.json")
+
+
+def _tests(pkg: Package, meta: dict) -> list[PackagedTest]:
+    found = {}
+    for rel in pkg.files:
+        m = _TEST_RE.match(rel)
+        if m:
+            out = rel[:-3] + ".out"
+            if out not in pkg.files:
+                raise PackageError(f"{rel}: no matching .out")
+            found[int(m.group(1))] = (rel, out)
+    if not found:
+        raise PackageError("no tests (NN.in/NN.out)")
+
+    numbers = sorted(found)
+    points = meta.get("points", 0)
+    if isinstance(points, list):
+        if len(points) != len(numbers):
+            raise PackageError(f"points: {len(points)} values for {len(numbers)} tests")
+        by_number = dict(zip(numbers, points))
+    else:
+        by_number = dict.fromkeys(numbers, points)
+    visible = set(meta.get("visible") or ())
+    group_of = {int(n): str(g) for g, ns in (meta.get("groups") or {}).items() for n in ns}
+
+    return [PackagedTest(order=i, input=found[n][0], output=found[n][1], points=int(by_number[n] or 0),
+                         hidden=n not in visible, group=group_of.get(n))
+            for i, n in enumerate(numbers, start=1)]
+
+
+def _chunks(pkg: Package, rel: str) -> Iterator[bytes]:
+    with pkg.open(rel) as f:
+        while True:
+            chunk = f.read(_READ_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+
+def package_hash(pkg: Package) -> str:
+    """sha256 по всем файлам пакета (имя + содержимое), читается кусками."""
+    h = hashlib.sha256()
+    for rel in pkg.files:
+        h.update(rel.encode("utf-8") + b"\0")
+        for chunk in _chunks(pkg, rel):
+            h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# ---------- запись ----------
+
+def _module(discipline_name: str, module_name: str, order: int) -> Module:
+    discipline = Discipline.query.filter_by(name=discipline_name).one_or_none()
+    if discipline is None:
+        discipline = Discipline(name=discipline_name)
+        db.session.add(discipline)
+    module = None
+    if discipline.id is not None:
+        module = Module.query.filter_by(discipline_id=discipline.id, name=module_name).one_or_none()
+    if module is None:
+        module = Module(discipline=discipline, name=module_name, order=order)
+        db.session.add(module)
+    return module
+
+
+_COPY_ESCAPES = ((b"\\", b"\\\\"), (b"\n", b"\\n"), (b"\r", b"\\r"), (b"\t", b"\\t"))
+
+
+def _copy_escape(data: bytes) -> bytes:
+    for raw, esc in _COPY_ESCAPES:
+        data = data.replace(raw, esc)
+    return data
+
+
+def _offload(pkg: Package, tests: list[PackagedTest]) -> dict:
+    """Файлы тестов крупнее BLOB_INLINE_BYTES — в хранилище (services/blobs.py): rel -> sha256."""
+    limit = blobs.inline_limit()
+    store = blobs.get_store()
+    return {rel: store.put_stream(_chunks(pkg, rel))
+            for t in tests for rel in (t.input, t.output) if pkg.size(rel) > limit}
+
+
+def _copy_tests(pkg: Package, task_id: int, tests: list[PackagedTest], stored: dict) -> None:
+    """COPY в текстовом формате; input/expected_output пишутся из файлов кусками."""
+    def field(copy, rel):
+        if rel in stored:
+            copy.write(b"\\N")
+        else:
+            for chunk in _chunks(pkg, rel):
+                copy.write(_copy_escape(chunk))
+
+    def nullable(value):
+        return _copy_escape(value.encode("utf-8")) if value is not None else b"\\N"
+
+    dbapi = db.session.connection().connection.dbapi_connection
+    with dbapi.cursor() as cur, cur.copy(
+            'COPY task_tests (task_id, "order", input_data, expected_output, input_blob, output_blob, '
+            'points, hidden, "group") FROM STDIN') as copy:
+        for t in tests:
+            copy.write(f"{task_id}\t{t.order}\t".encode())
+            field(copy, t.input)
+            copy.write(b"\t")
+            field(copy, t.output)
+            copy.write(b"\t" + nullable(stored.get(t.input)) + b"\t" + nullable(stored.get(t.output)))
+            copy.write(f"\t{t.points}\t{'t' if t.hidden else 'f'}\t".encode() + nullable(t.group) + b"\n")
+
+
+def _insert_tests(pkg: Package, task_id: int, tests: list[PackagedTest], stored: dict) -> None:
+    def text(rel):
+        return None if rel in stored else b"".join(_chunks(pkg, rel)).decode("utf-8")
+
+    for i in range(0, len(tests), _INSERT_CHUNK):
+        db.session.execute(db.insert(TaskTest), [
+            {"task_id": task_id, "order": t.order, "input_data": text(t.input), "expected_output": text(t.output),
+             "input_blob": stored.get(t.input), "output_blob": stored.get(t.output),
+             "points": t.points, "hidden": t.hidden, "group": t.group}
+            for t in tests[i:i + _INSERT_CHUNK]
+        ])
+
+
+def load_package(pkg: Package, *, force: bool = False, dry_run: bool = False) -> str:
+    """Загрузить один пакет; возвращает created | updated | unchanged."""
+    meta = _read_meta(pkg)
+    code = str(meta.get("code") or pkg.name)
+    digest = package_hash(pkg)
+    task = Task.query.filter_by(package=code).one_or_none()
+    if task is not None and task.package_hash == digest and not force:
+        return "unchanged"
+
+    for key in ("discipline", "module", "title"):
+        if not meta.get(key):
+            raise PackageError(f"task metadata: {key!r} is required")
+    mode = meta.get("judging_mode", "full")
+    if mode not in ("full", FAIL_FAST):
+        raise PackageError(f"judging_mode: unknown mode {mode!r}")
+    spec = meta.get("checker", "exact")
+    checker.validate(spec)
+    tests = _tests(pkg, meta)
+    statement = next((s for s in _STATEMENT_FILES if s in pkg.files), None)
+    if statement:
+        with pkg.open(statement) as f:
+            description = f.read().decode("utf-8-sig")
+    else:
+        description = meta.get("description", "")
+    status = "created" if task is None else "updated"
+    if dry_run:
+        return status
+
+    module = _module(meta["discipline"], meta["module"], int(meta.get("module_order", 1)))
+    if task is None:
+        task = Task(package=code, tests_version=0)
+        db.session.add(task)
+    task.module = module
+    task.title = meta["title"]
+    task.description = description
+    task.input_format = meta.get("input_format", "")
+    task.output_format = meta.get("output_format", "")
+    task.examples = meta.get("examples") or []
+    task.order = int(meta.get("order", 1))
+    task.max_score = int(meta.get("max_score", 100))
+    task.judging_mode = mode
+    task.checker = spec
+    task.package_hash = digest
+    # тесты пишем мимо ORM — _bump_tests_version их не видит, версию поднимаем сами
+    task.tests_version = (task.tests_version or 0) + 1
+    db.session.flush()
+
+    stored = _offload(pkg, tests)  # до COPY: бэкенд pg пишет через то же соединение
+    db.session.execute(db.delete(TaskTest).where(TaskTest.task_id == task.id))
+    if db.session.get_bind().dialect.name == "postgresql":
+        _copy_tests(pkg, task.id, tests, stored)
+    else:
+        _insert_tests(pkg, task.id, tests, stored)
+    db.session.commit()
+    catalog.bump()  # после commit: до него каталог мог перечитать старые тесты
+    return status
+
+
+def import_path(source: str, *, force: bool = False, dry_run: bool = False) -> dict:
+    """Импорт всех пакетов источника; пакет — отдельная транзакция, ошибки — в отчёт."""
+    started = time.perf_counter()
+    stats = {"created": 0, "updated": 0, "unchanged": 0, "errors": [], "dry_run": dry_run}
+    for pkg in iter_packages(source):
+        try:
+            stats[load_package(pkg, force=force, dry_run=dry_run)] += 1
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            stats["errors"].append(f"{pkg.name}: {e}")
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,72 @@
+# app/services/verdict_cache.py
+"""
+Кеш вердиктов: одинаковый код на одних и тех же тестах проверяем один раз.
+
+Ключ — sha256 от нормализованного исходника, language_id, лимитов ExecEngine,
+задачи, её Task.tests_version (растёт при любой правке TaskTest, см. models.py)
+и настроек проверки (judging_mode, checker, max_score — от него зависит сам балл).
+Отдельной таблицы нет: кеш — это индекс submissions.cache_key.
+  - есть проверенная отправка с тем же ключом — копируем её вердикт без ExecEngine;
+  - такая же отправка ещё в работе — дубликат остаётся в очереди (queued), а когда
+    оригинал закроется, judging._resolve_twins скопирует его вердикт всем ожидающим.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Optional
+
+from ..extensions import db
+from ..models import Submission, Task
+from . import archive
+
+_LIMIT_KEYS = ("EE_TIME_LIMIT", "EE_EXTRA_TIME", "EE_WALL_TIME_LIMIT", "EE_MEMORY_LIMIT",
+               "EE_REDIRECT_STDERR", "EE_ENABLE_NETWORK", "EE_MAX_FILE_SIZE")
+
+# эти статусы не переиспользуем: queued ещё не проверен, error — сбой инфраструктуры, а не вердикт
+_NOT_REUSABLE = ("queued", "error")
+
+
+def normalize_source(code: str) -> str:
+    """Переводы строк, хвостовые пробелы и пустые строки в конце на вердикт не влияют."""
+    lines = (code or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).rstrip("\n")
+
+
+def limits(cfg) -> list:
+    return [cfg.get(k) for k in _LIMIT_KEYS]
+
+
+def cache_key(task: Task, language_id: int, code: str, cfg) -> str:
+    source_hash = hashlib.sha256(normalize_source(code).encode("utf-8")).hexdigest()
+    stamp = [source_hash, int(language_id), limits(cfg), task.id, task.tests_version,
+             task.judging_mode, task.checker, task.max_score]
+    return hashlib.sha256(json.dumps(stamp, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def find_twin(sub: Submission) -> Optional[Submission]:
+    """Ближайшая отправка с тем же ключом: уже проверенная или отправленная в ExecEngine."""
+    if not sub.cache_key:
+        return None
+    return (
+        Submission.query
+        .filter(Submission.cache_key == sub.cache_key,
+                Submission.id != sub.id,
+                Submission.status.notin_(_NOT_REUSABLE))
+        .order_by(Submission.id.desc())
+        .first()
+    )
+
+
+def copy_verdict(sub: Submission, twin: Submission) -> None:
+    sub.status = twin.status
+    sub.score = twin.score
+    sub.runtime_ms = twin.runtime_ms
+    sub.result = dict(twin.result or {}, cached_from=twin.id)
+    # блоб общий (хранилище адресуется содержимым); ссылку берём из БД под замком:
+    # archive.evict мог уже отвязать его у twin и удалить
+    blob = twin.result_blob
+    if blob:
+        archive.lock_blobs()
+        blob = db.session.query(Submission.result_blob).filter(Submission.id == twin.id).scalar()
+    sub.result_blob = blob
+    sub.judged_at = datetime.utcnow()
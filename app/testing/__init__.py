@@ -0,0 +1,2 @@
+# app/testing/__init__.py
+# Вспомогательное для локальной разработки и тестов (фейковый ExecEngine и т.п.).
@@ -0,0 +1,219 @@
+# app/testing/fake_execengine.py
+"""
+Локальный фейковый ExecEngine v2 для тестов и разработки без сети.
+
+Реализует тот же контракт, что ожидает ExecEngineClientV2:
+  - POST /v2/auth/login/               -> {"access_token": "..."}
+  - POST /v2/submissions/batch/        -> 201 {"batch_token": "..."}
+  - GET  /v2/submissions/batch/<token>/ -> {"status": "...", "results": [...]}
+
+Решения запускаются функцией judge(source, stdin) -> stdout.
+По умолчанию это настоящий python-процесс (как python3 в ExecEngine),
+для нагрузочных сценариев есть judge_expected — просто эхо ожидаемого вывода.
+
+Для нагрузочных прогонов (app/testing/loadbench.py) настраиваются задержка батча
+с разбросом, доля ответов 503 и число одновременно выполняемых батчей — лишние
+ждут своей очереди, как в настоящем ExecEngine (MAX_CONCURRENT_SUBMISSIONS).
+Отдельным процессом: python -m app.testing.fake_execengine --port 8001 --delay 0.5
+"""
+import argparse
+import base64
+import heapq
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+ACCEPTED = {"id": 3, "description": "Accepted"}
+WRONG_ANSWER = {"id": 4, "description": "Wrong Answer"}
+RUNTIME_ERROR = {"id": 11, "description": "Runtime Error (NZEC)"}
+TIME_LIMIT = {"id": 5, "description": "Time Limit Exceeded"}
+
+
+def _dec(s: Optional[str]) -> Optional[str]:
+    return None if s is None else base64.b64decode(s).decode("utf-8", errors="replace")
+
+
+def _enc(s: Optional[str]) -> Optional[str]:
+    return None if s is None else base64.b64encode(s.encode("utf-8")).decode("ascii")
+
+
+def judge_python(source: str, stdin: Optional[str], time_limit: float = 2.0) -> tuple[str, dict]:
+    """Запуск решения интерпретатором python (только для локальной разработки!)."""
+    try:
+        proc = subprocess.run([sys.executable, "-c", source], input=stdin or "",
+                              capture_output=True, text=True, timeout=time_limit)
+    except subprocess.TimeoutExpired:
+        return "", TIME_LIMIT
+    if proc.returncode != 0:
+        return proc.stdout + proc.stderr, RUNTIME_ERROR
+    return proc.stdout, ACCEPTED
+
+
+def judge_expected(source: str, stdin: Optional[str], time_limit: float = 2.0) -> tuple[Optional[str], dict]:
+    """«Идеальное» решение: stdout = None, вердикт выставит сравнение ниже."""
+    return None, ACCEPTED
+
+
+def create_fake_app(*, judge: Callable = judge_python, delay_s: float = 0.0, jitter_s: float = 0.0,
+                    error_rate: float = 0.0, max_concurrent: int = 0, seed: Optional[int] = None,
+                    api_prefix: str = "/v2", status_route: str = "path", multi_status: bool = True) -> Flask:
+    """
+    delay_s — сколько «выполняется» батч: до истечения GET отдаёт PENDING; jitter_s — случайная добавка к нему.
+    error_rate — доля запросов submit/status, на которые отвечаем 503 (ExecEngine перегружен).
+    max_concurrent — сколько батчей выполняется одновременно (0 — без ограничения), остальные ждут.
+    status_route — "path" (/batch/<token>/) или "query" (/batch/?batch_token=) — как в разных сборках ExecEngine.
+    multi_status — отвечать ли на ?batch_tokens=a,b,c списком статусов (мультиплексный опрос).
+    Состояние хранится в app.extensions["fake_execengine"] (удобно смотреть в тестах).
+    """
+    app = Flask("fake_execengine")
+    state = {"batches": {}, "tokens": set(), "logins": 0, "submits": 0, "polls": 0, "not_found": 0,
+             "errors": 0, "lock": threading.Lock()}
+    app.extensions["fake_execengine"] = state
+    rng = random.Random(seed)
+    slots: list[float] = []  # когда освободится каждый из max_concurrent исполнителей (куча)
+
+    def _schedule() -> float:
+        """Момент готовности нового батча: ждёт свободного исполнителя, затем delay_s (+ разброс)."""
+        now = time.time()
+        run_s = delay_s + (rng.uniform(0, jitter_s) if jitter_s else 0.0)
+        if max_concurrent <= 0:
+            return now + run_s
+        start = now if len(slots) < max_concurrent else max(now, heapq.heappop(slots))
+        heapq.heappush(slots, start + run_s)
+        return start + run_s
+
+    def _overloaded() -> bool:
+        if error_rate and rng.random() < error_rate:
+            state["errors"] += 1
+            return True
+        return False
+
+    @app.after_request
+    def count_404(resp):
+        if resp.status_code == 404:
+            state["not_found"] += 1
+        return resp
+
+    @app.post(f"{api_prefix}/auth/login/")
+    def login():
+        token = uuid.uuid4().hex
+        with state["lock"]:
+            state["logins"] += 1
+            state["tokens"].add(token)
+        return jsonify({"access_token": token, "token_type": "bearer"})
+
+    def _authorized() -> bool:
+        # «отозвать» все токены в тесте можно через state["tokens"].clear()
+        auth = request.headers.get("Authorization", "")
+        return auth.startswith("Bearer ") and auth[len("Bearer "):] in state["tokens"]
+
+    @app.post(f"{api_prefix}/submissions/batch/")
+    def submit_batch():
+        if not _authorized():
+            return jsonify({"detail": "Not authenticated"}), 401
+        with state["lock"]:
+            if _overloaded():
+                return jsonify({"detail": "Service Unavailable"}), 503
+        subs = (request.get_json(silent=True) or {}).get("submissions") or []
+        token = uuid.uuid4().hex
+        with state["lock"]:
+            state["submits"] += 1
+            state["batches"][token] = {"ready_at": _schedule(), "submissions": subs, "results": None}
+        return jsonify({"batch_token": token}), 201
+
+    def _batch_json(token: str):
+        batch = state["batches"].get(token)
+        if batch is None:
+            return None
+        if time.time() < batch["ready_at"]:
+            return {"status": "PENDING", "batch_token": token}
+        if batch["results"] is None:
+            batch["results"] = [_run_one(judge, s) for s in batch["submissions"]]
+        return {"status": "FINISHED", "batch_token": token, "results": batch["results"]}
+
+    def batch_status(token: str):
+        if not _authorized():
+            return jsonify({"detail": "Not authenticated"}), 401
+        with state["lock"]:
+            if _overloaded():
+                return jsonify({"detail": "Service Unavailable"}), 503
+        state["polls"] += 1
+        data = _batch_json(token)
+        if data is None:
+            return jsonify({"detail": "Not found"}), 404
+        return jsonify(data)
+
+    def batch_list():
+        tokens = request.args.get("batch_tokens")
+        if tokens is None or not multi_status:
+            if status_route == "query":
+                return batch_status(request.args.get("batch_token", ""))
+            return jsonify({"detail": "Method Not Allowed"}), 405
+        if not _authorized():
+            return jsonify({"detail": "Not authenticated"}), 401
+        with state["lock"]:
+            if _overloaded():
+                return jsonify({"detail": "Service Unavailable"}), 503
+        state["polls"] += 1
+        items = [_batch_json(t) for t in tokens.split(",") if t]
+        return jsonify([item for item in items if item is not None])
+
+    app.add_url_rule(f"{api_prefix}/submissions/batch/", "batch_list", batch_list, methods=["GET"])
+    if status_route == "path":
+        app.add_url_rule(f"{api_prefix}/submissions/batch/<token>/", "batch_status", batch_status, methods=["GET"])
+
+    return app
+
+
+def _run_one(judge: Callable, sub: dict) -> dict:
+    source = _dec(sub.get("source_code")) or ""
+    stdin = _dec(sub.get("stdin"))
+    expected = _dec(sub.get("expected_output"))
+    started = time.perf_counter()
+    stdout, status = judge(source, stdin, float(sub.get("time_limit") or 2.0))
+    if stdout is None:
+        stdout = expected or ""
+    if status is ACCEPTED and expected is not None and stdout.strip() != expected.strip():
+        status = WRONG_ANSWER
+    return {
+        "status": status,
+        "stdout": _enc(stdout),
+        "expected_output": sub.get("expected_output"),
+        "time": f"{time.perf_counter() - started:.3f}",
+        "memory": 1024,
+    }
+
+
+def serve_in_thread(app: Flask, host: str = "127.0.0.1", port: int = 0):
+    """Поднять app в фоновом потоке. Возвращает (server, base_url); остановка — server.shutdown()."""
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Фейковый ExecEngine v2 для локальных прогонов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="время выполнения батча, сек.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к --delay, сек.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="батчей одновременно (0 — без лимита)")
+    parser.add_argument("--run-python", action="store_true",
+                        help="запускать решения python'ом (иначе — эхо ожидаемого вывода)")
+    args = parser.parse_args(argv)
+    app = create_fake_app(judge=judge_python if args.run_python else judge_expected, delay_s=args.delay,
+                          jitter_s=args.jitter, error_rate=args.error_rate, max_concurrent=args.max_concurrent)
+    print(f"fake ExecEngine on http://{args.host}:{args.port}/v2")
+    make_server(args.host, args.port, app, threaded=True).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# app/testing/loadbench.py
+"""
+Сквозной нагрузочный прогон: N студентов отправляют решения через /submit,
+judge-worker проверяет их в фейковом ExecEngine (fake_execengine.py), студенты
+опрашивают /submissions/<id> до вердикта.
+
+Меряем то, что видит студент: задержку от /submit до вердикта (p50/p95/p99),
+пропускную способность (вердиктов в секунду) и число SQL-запросов — отдельно
+веб-запросов и воркера, в пересчёте на отправку. Отчёт в JSON (--json) удобно
+сохранять между релизами и сравнивать.
+
+    python -m app.testing.loadbench --students 50 --submissions 4 --delay 0.3 --error-rate 0.05
+
+По умолчанию БД — временный файл SQLite; --database-url — отдельная пустая БД
+(например, Postgres из docker-compose): таблицы создаются, данные прогона остаются.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+
+from ..config import Config
+from ..extensions import db
+from .fake_execengine import create_fake_app, judge_expected, serve_in_thread
+
+_LETTERS = "АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+
+
+def student_code(n: int) -> str:
+    """n-й код входа: шесть заглавных кириллических букв."""
+    chars = []
+    for _ in range(6):
+        n, i = divmod(n, len(_LETTERS))
+        chars.append(_LETTERS[i])
+    return "".join(reversed(chars))
+
+
+def percentile(values: list, p: float) -> Optional[float]:
+    """Перцентиль по ближайшему рангу; None для пустого списка."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, min(len(ordered), math.ceil(p / 100 * len(ordered))) - 1)
+    return ordered[k]
+
+
+def _sqlite_jsonb() -> None:
+    # как в conftest.py: JSONB моделей на SQLite — это JSON
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, "sqlite")
+    def _jsonb_sqlite(element, compiler, **kw):
+        return "JSON"
+
+
+def make_app(database_url: str, ee_url: str, blob_dir: str, max_concurrent: int = 5):
+    """Приложение для прогонов вне pytest: своя БД, фейковый ExecEngine по ee_url."""
+    from .. import create_app
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        EXECENGINE_BASE_URL = ee_url
+        EXECENGINE_USERNAME = "bench"
+        EXECENGINE_PASSWORD = "bench"
+        EE_DEFAULT_LANGUAGE_ID = 71
+        EE_MAX_CONCURRENT_SUBMISSIONS = max_concurrent
+        BLOB_DIR = blob_dir
+        SECRET_KEY = uuid.uuid4().hex
+
+    if database_url.startswith("sqlite"):
+        _sqlite_jsonb()
+        # веб-потоки и воркер пишут в один файл — ждём блокировку, а не падаем
+        BenchConfig.SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30, "check_same_thread": False}}
+    return create_app(BenchConfig)
+
+
+def seed(n_students: int, n_tests: int) -> int:
+    """Группа, студенты и задача на n_tests тестов; возвращает id задачи."""
+    from ..models import Discipline, Module, Student, StudyGroup, Task, TaskTest
+
+    group = StudyGroup(name=f"bench-{uuid.uuid4().hex[:8]}")
+    codes = [student_code(i) for i in range(n_students)]
+    existing = {s.auth_code: s for s in Student.query.filter(Student.auth_code.in_(codes))}
+    for code in codes:
+        st = existing.get(code)
+        if st is None:
+            st = Student(full_name=f"Студент {code}")
+            st.set_auth_code(code)
+        st.group = group
+        db.session.add(st)
+    module = Module(discipline=Discipline(name=group.name), name="Нагрузка", order=1)
+    task = Task(module=module, title="Эхо", description="Выведите ввод", max_score=100)
+    task.tests = [TaskTest(order=i + 1, input_data=f"{i}\n", expected_output=f"{i}\n",
+                           points=0, hidden=i > 0) for i in range(n_tests)]
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def _worker(app, stop: threading.Event, errors: Counter) -> None:
+    from ..services import judging
+
+    with app.app_context():
+        strategy = judging.get_completion()
+        while not stop.is_set():
+            try:
+                busy = judging.run_once(strategy=strategy)
+            except Exception:
+                db.session.rollback()
+                errors["worker"] += 1
+                busy = 0
+            finally:
+                db.session.remove()
+            if not busy:
+                stop.wait(0.01)
+
+
+def _student(app, code: str, task_id: int, n: int, poll_s: float, timeout_s: float,
+             latencies: list, verdicts: Counter) -> None:
+    client = app.test_client()
+    client.post("/auth/login", data={"code": code})
+    for i in range(n):
+        started = time.perf_counter()
+        resp = client.post("/submit", data={"task_id": task_id, "code": f"print(input())  # {code} {i}"})
+        if resp.status_code != 202:
+            verdicts[f"http_{resp.status_code}"] += 1
+            continue
+        status_url = resp.get_json()["status_url"]
+        while True:
+            data = client.get(status_url).get_json()
+            if not data.get("pending", data.get("status") in ("queued", "running")):
+                latencies.append(time.perf_counter() - started)
+                verdicts[data.get("status")] += 1
+                break
+            if time.perf_counter() - started > timeout_s:
+                verdicts["timeout"] += 1
+                break
+            time.sleep(poll_s)
+
+
+def run(students: int = 20, submissions: int = 3, tests: int = 10, delay: float = 0.1, jitter: float = 0.0,
+        error_rate: float = 0.0, ee_concurrency: int = 5, max_concurrent: int = 5, poll: float = 0.02,
+        timeout: float = 120.0, database_url: Optional[str] = None) -> dict:
+    """
+    Один прогон. ee_concurrency — сколько батчей фейковый ExecEngine выполняет одновременно,
+    max_concurrent — EE_MAX_CONCURRENT_SUBMISSIONS приложения.
+    """
+    fake = create_fake_app(judge=judge_expected, delay_s=delay, jitter_s=jitter, error_rate=error_rate,
+                           max_concurrent=ee_concurrency, seed=0)
+    server, base_url = serve_in_thread(fake)
+    tmp = tempfile.TemporaryDirectory(prefix="loadbench-")
+    database_url = database_url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    app = make_app(database_url, base_url, os.path.join(tmp.name, "blobs"), max_concurrent)
+    queries = Counter()
+    stop = threading.Event()
+    try:
+        with app.app_context():
+            db.create_all()
+            task_id = seed(students, tests)
+            engine = db.engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            kind = "worker" if threading.current_thread().name == "loadbench-worker" else "web"
+            queries[kind] += 1
+
+        latencies: list = []
+        verdicts: Counter = Counter()
+        errors: Counter = Counter()
+        worker = threading.Thread(target=_worker, args=(app, stop, errors), name="loadbench-worker", daemon=True)
+        threads = [threading.Thread(target=_student, name=f"loadbench-student-{i}",
+                                    args=(app, student_code(i), task_id, submissions, poll, timeout,
+                                          latencies, verdicts))
+                   for i in range(students)]
+        started = time.perf_counter()
+        worker.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+        stop.set()
+        worker.join()
+        event.remove(engine, "before_cursor_execute", _count)
+    finally:
+        stop.set()
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        tmp.cleanup()
+
+    ee = fake.extensions["fake_execengine"]
+    total = students * submissions
+    ms = [x * 1000 for x in latencies]
+    return {
+        "students": students,
+        "submissions": total,
+        "tests_per_task": tests,
+        "ee": {"delay_s": delay, "jitter_s": jitter, "error_rate": error_rate, "concurrency": ee_concurrency,
+               "submits": ee["submits"], "polls": ee["polls"], "errors_503": ee["errors"]},
+        "verdicts": dict(verdicts),
+        "worker_errors": errors["worker"],
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "latency_ms": {"p50": _round(percentile(ms, 50)), "p95": _round(percentile(ms, 95)),
+                       "p99": _round(percentile(ms, 99)), "max": _round(max(ms) if ms else None)},
+        "queries": {"web": queries["web"], "worker": queries["worker"],
+                    "web_per_submission": round(queries["web"] / total, 1) if total else None,
+                    "worker_per_submission": round(queries["worker"] / total, 1) if total else None},
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def format_report(r: dict) -> str:
+    lat, q = r["latency_ms"], r["queries"]
+    return "\n".join([
+        f"students={r['students']} submissions={r['submissions']} tests={r['tests_per_task']} "
+        f"ee(delay={r['ee']['delay_s']}s, 503={r['ee']['error_rate']:.0%}, concurrency={r['ee']['concurrency']})",
+        f"verdicts: {r['verdicts']}  worker errors: {r['worker_errors']}",
+        f"latency ms: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}",
+        f"throughput: {r['throughput_per_s']} verdicts/s over {r['wall_s']}s",
+        f"queries: web={q['web']} ({q['web_per_submission']}/sub) worker={q['worker']} "
+        f"({q['worker_per_submission']}/sub)",
+        f"execengine: submits={r['ee']['submits']} polls={r['ee']['polls']} 503={r['ee']['errors_503']}",
+    ])
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный прогон /submit -> вердикт")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--submissions", type=int, default=3, help="отправок на студента")
+    parser.add_argument("--tests", type=int, default=10, help="тестов в задаче")
+    parser.add_argument("--delay", type=float, default=0.1, help="время выполнения батча в ExecEngine, сек.")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503 от ExecEngine")
+    parser.add_argument("--ee-concurrency", type=int, default=5, help="батчей одновременно в ExecEngine")
+    parser.add_argument("--max-concurrent", type=int, default=5, help="EE_MAX_CONCURRENT_SUBMISSIONS")
+    parser.add_argument("--poll", type=float, default=0.02, help="период опроса статуса студентом, сек.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="сколько ждать одного вердикта, сек.")
+    parser.add_argument("--database-url", help="отдельная БД вместо временного SQLite")
+    parser.add_argument("--json", dest="json_path", help="сохранить отчёт в файл (JSON)")
+    args = parser.parse_args(argv)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # лог каждого запроса к фейку не нужен
+
+    report = run(students=args.students, submissions=args.submissions, tests=args.tests, delay=args.delay,
+                 jitter=args.jitter, error_rate=args.error_rate, ee_concurrency=args.ee_concurrency,
+                 max_concurrent=args.max_concurrent, poll=args.poll, timeout=args.timeout,
+                 database_url=args.database_url)
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
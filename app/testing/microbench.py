@@ -0,0 +1,292 @@
+# app/testing/microbench.py
+"""
+Микробенчмарки горячих путей без сети и Postgres.
+
+  encode_tests       — ExecEngineClientV2.encode_test: 50 тестов по 64 КБ (холодный services/payloads.py)
+  batch_body         — ExecEngineClientV2.encode_body: склейка 50 готовых кусков с исходником (каждая отправка)
+  score_accepted     — scoring.score_batch: 50 результатов с вердиктом ExecEngine
+  score_checked      — то же, но вывод по 64 КБ сверяем сами (services/checker.py)
+  scoreboard_page    — страница сводной /admin/scoreboard: 5000 студентов, SQLite в памяти
+  scoreboard_export  — вся сводная (iter_matrix) для выгрузки в CSV/XLSX
+
+Замеры сравниваются с записанной базой (microbench_baseline.json рядом):
+
+    python -m app.testing.microbench                 # замерить и сравнить, код 1 при регрессии
+    python -m app.testing.microbench --threshold 15  # допустимое замедление, % (по умолчанию 25)
+    python -m app.testing.microbench --save          # перезаписать базу
+
+Сравнивается лучшее время вызова (min по раундам) — оно меньше всего шумит. База
+зависит от машины: перезаписывать её стоит на той же машине (CI-раннере), где сравнивают.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microbench_baseline.json")
+
+N_TESTS = 50
+OUTPUT_BYTES = 64 * 1024
+N_STUDENTS = 5000
+N_MODULES = 8
+TASKS_PER_MODULE = 3
+
+# имя -> setup(scale) -> вызов без аргументов; подготовка в замер не входит
+BENCHMARKS: dict[str, Callable[[float], Callable[[], object]]] = {}
+
+
+def bench(name: str):
+    def deco(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return deco
+
+
+# ---------- данные ----------
+
+def _output(i: int, size: int) -> str:
+    """Вывод теста: строки чисел, как у типичной задачи, ровно size байт."""
+    line = " ".join(str(i * 1000 + k) for k in range(12)) + "\n"
+    return (line * (size // len(line) + 1))[:size - 1] + "\n"
+
+
+def _tests(scale: float) -> list[dict]:
+    size = max(64, int(OUTPUT_BYTES * scale))
+    return [{"stdin": f"{i}\n", "expected_output": _output(i, size)} for i in range(N_TESTS)]
+
+
+def _limits() -> dict:
+    from ..config import Config
+    from ..execengine_client import ExecEngineClientV2
+
+    return ExecEngineClientV2.limits({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+
+
+def _results(tests: list[dict], status: str) -> list[dict]:
+    return [{"stdout": base64.b64encode(t["expected_output"].encode()).decode("ascii"),
+             "expected_output": base64.b64encode(t["expected_output"].encode()).decode("ascii"),
+             "status": {"id": 3 if status else 0, "description": status},
+             "time": "0.012", "memory": 9400} for t in tests]
+
+
+def _task():
+    tests = [SimpleNamespace(points=2, group=None, hidden=i > 0, order=i + 1) for i in range(N_TESTS)]
+    return SimpleNamespace(max_score=100, checker="exact", tests=tests), tests
+
+
+# ---------- ExecEngine: кодирование батча ----------
+
+@bench("encode_tests")
+def _encode_tests(scale: float):
+    from ..execengine_client import ExecEngineClientV2
+
+    tests, limits = _tests(scale), _limits()
+    return lambda: [ExecEngineClientV2.encode_test(t, limits) for t in tests]
+
+
+@bench("batch_body")
+def _batch_body(scale: float):
+    from ..execengine_client import ExecEngineClientV2
+
+    limits = _limits()
+    fragments = [ExecEngineClientV2.encode_test(t, limits) for t in _tests(scale)]
+    source = "n = int(input())\nprint(n * 2)\n" * 20
+    return lambda: ExecEngineClientV2.encode_body(71, source, fragments)
+
+
+# ---------- оценка ----------
+
+@bench("score_accepted")
+def _score_accepted(scale: float):
+    from ..services.scoring import score_batch
+
+    task, tests = _task()
+    results = _results(_tests(scale), "Accepted")
+    return lambda: score_batch(task, {"results": results}, tests)
+
+
+@bench("score_checked")
+def _score_checked(scale: float):
+    from ..services.scoring import score_batch
+
+    task, tests = _task()
+    results = _results(_tests(scale), "")
+    return lambda: score_batch(task, {"results": results}, tests)
+
+
+# ---------- сводная ----------
+
+_SCOREBOARD = {}
+
+
+def _scoreboard_app(scale: float):
+    """Приложение на SQLite в памяти с N_STUDENTS*scale студентами и best_scores; одно на процесс."""
+    if scale in _SCOREBOARD:
+        return _SCOREBOARD[scale]
+    from ..extensions import db
+    from ..models import BestScore, Discipline, Module, Student, StudyGroup, Task
+    from .loadbench import make_app, student_code
+
+    tmp = tempfile.mkdtemp(prefix="microbench-")
+    app = make_app("sqlite://", "http://127.0.0.1:9", os.path.join(tmp, "blobs"))
+    with app.app_context():
+        db.create_all()
+        groups = [StudyGroup(name=f"ИВТ-{100 + i}") for i in range(20)]
+        discipline = Discipline(name="Программирование")
+        modules = [Module(discipline=discipline, name=f"Модуль {m + 1}", order=m + 1) for m in range(N_MODULES)]
+        tasks = [Task(module=m, title=f"Задача {k + 1}", description="", order=k + 1)
+                 for m in modules for k in range(TASKS_PER_MODULE)]
+        db.session.add_all([*groups, *tasks])
+        db.session.commit()
+        n = max(1, int(N_STUDENTS * scale))
+        db.session.execute(db.insert(Student), [
+            {"full_name": f"Студент {(i * 7919) % n:05d}", "auth_code": student_code(i),
+             "group_id": groups[i % len(groups)].id} for i in range(n)])
+        ids = [sid for (sid,) in db.session.query(Student.id)]
+        # у каждого студента оценены ~2/3 задач
+        db.session.execute(db.insert(BestScore), [
+            {"student_id": sid, "task_id": t.id, "score": (sid * 31 + t.id * 17) % 101, "status": "OK"}
+            for sid in ids for t in tasks if (sid + t.id) % 3])
+        db.session.commit()
+    _SCOREBOARD[scale] = app
+    return app
+
+
+@bench("scoreboard_page")
+def _scoreboard_page(scale: float):
+    from ..services import scoreboard
+
+    app = _scoreboard_app(scale)
+
+    def run():
+        with app.app_context():
+            modules = scoreboard.modules_for()
+            ids, _ = scoreboard.students_page(None, 3, 100)
+            return list(scoreboard.iter_matrix(modules, None, ids))
+    return run
+
+
+@bench("scoreboard_export")
+def _scoreboard_export(scale: float):
+    from ..services import scoreboard
+
+    app = _scoreboard_app(scale)
+
+    def run():
+        with app.app_context():
+            return sum(1 for _ in scoreboard.iter_matrix(scoreboard.modules_for()))
+    return run
+
+
+# ---------- замер и сравнение ----------
+
+def measure(fn: Callable[[], object], rounds: int = 7, min_time: float = 0.05) -> dict:
+    """Время одного вызова, сек.: подбираем число вызовов в раунде (не короче min_time), берём min и медиану."""
+    fn()  # прогрев: импорты, кеши
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    timings = [elapsed / loops]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - started) / loops)
+    return {"min_s": min(timings), "median_s": statistics.median(timings), "loops": loops, "rounds": rounds}
+
+
+def run(names: Optional[list] = None, scale: float = 1.0, rounds: int = 7, min_time: float = 0.05) -> dict:
+    out = {}
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise KeyError(f"unknown benchmark {name!r}; known: {', '.join(BENCHMARKS)}")
+        out[name] = measure(BENCHMARKS[name](scale), rounds=rounds, min_time=min_time)
+    return out
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Строки сравнения с базой; regression=True — медленнее базы больше чем на threshold %."""
+    rows = []
+    for name, r in results.items():
+        base = (baseline.get("benchmarks") or {}).get(name)
+        change = None
+        if base and base.get("min_s"):
+            change = (r["min_s"] / base["min_s"] - 1) * 100
+        rows.append({"name": name, "min_s": r["min_s"], "base_s": base["min_s"] if base else None,
+                     "change_pct": change, "regression": change is not None and change > threshold})
+    return rows
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: dict, path: str = BASELINE_PATH) -> None:
+    data = {"python": platform.python_version(), "machine": platform.machine(),
+            "benchmarks": {name: {"min_s": r["min_s"], "median_s": r["median_s"]} for name, r in results.items()}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, k in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds * k >= 1:
+            return f"{seconds * k:.2f} {unit}"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячих путей")
+    parser.add_argument("names", nargs="*", help=f"какие запускать (по умолчанию все: {', '.join(BENCHMARKS)})")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("MICROBENCH_THRESHOLD", "25")),
+                        help="допустимое замедление относительно базы, %%")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="записать результаты как новую базу")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="минимальная длительность раунда, сек.")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, rounds=args.rounds, min_time=args.min_time)
+    if args.save:
+        baseline = load_baseline(args.baseline) if args.names else {}
+        merged = {**(baseline.get("benchmarks") or {}), **results}
+        save_baseline(merged, args.baseline)
+        for name, r in results.items():
+            print(f"{name:<20} {_fmt(r['min_s']):>12}  (median {_fmt(r['median_s'])})")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    rows = compare(results, load_baseline(args.baseline), args.threshold)
+    for row in rows:
+        change = "   new" if row["change_pct"] is None else f"{row['change_pct']:+6.1f}%"
+        mark = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<20} {_fmt(row['min_s']):>12}  base {_fmt(row['base_s']):>12}  {change}{mark}")
+    failed = [row["name"] for row in rows if row["regression"]]
+    if failed:
+        print(f"slower than baseline by more than {args.threshold:g}%: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
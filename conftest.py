@@ -0,0 +1,81 @@
+# conftest.py — общие фикстуры: приложение на SQLite и локальный фейковый ExecEngine
+import pytest
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Discipline, Module, Student, StudyGroup, Task, TaskTest
+from app.testing.fake_execengine import create_fake_app, serve_in_thread
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    EXECENGINE_USERNAME = "admin"
+    EXECENGINE_PASSWORD = "admin"
+    EE_DEFAULT_LANGUAGE_ID = 71
+    ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"  # async-тесты (@pytest.mark.anyio) — только на asyncio
+
+
+@pytest.fixture
+def fake_ee():
+    fake = create_fake_app()
+    server, base_url = serve_in_thread(fake)
+    fake.config["BASE_URL"] = base_url
+    yield fake
+    server.shutdown()
+
+
+@pytest.fixture
+def app(fake_ee, tmp_path):
+    TestConfig.EXECENGINE_BASE_URL = fake_ee.config["BASE_URL"]
+    TestConfig.BLOB_DIR = str(tmp_path / "blobs")
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def student(app):
+    group = StudyGroup(name="ИВТ-101")
+    st = Student(full_name="Иванов Иван", group=group)
+    st.set_auth_code("АБВГДЕ")
+    db.session.add(st)
+    db.session.commit()
+    return st
+
+
+@pytest.fixture
+def task(app):
+    d = Discipline(name="Программирование")
+    m = Module(discipline=d, name="Ввод-вывод", order=1)
+    t = Task(module=m, title="Удвоение", description="Выведите 2*n", max_score=100)
+    t.tests = [
+        TaskTest(order=1, input_data="2\n", expected_output="4\n", points=50, hidden=False),
+        TaskTest(order=2, input_data="21\n", expected_output="42\n", points=50),
+    ]
+    db.session.add(t)
+    db.session.commit()
+    return t
+
+
+@pytest.fixture
+def client(app, student):
+    c = app.test_client()
+    c.post("/auth/login", data={"code": student.auth_code})
+    return c
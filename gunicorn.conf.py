@@ -3,3 +3,11 @@ workers = 2
 threads = 4
 timeout = 60
 graceful_timeout = 30
+
+
+def post_worker_init(worker):
+    # kill -USR2 <pid воркера> — профиль этого воркера на PROFILER_SIGNAL_SECONDS (см. app/services/profiler.py)
+    from app.services import profiler
+
+    config = getattr(worker.wsgi, "config", {})
+    profiler.install_signal_handler(config.get("PROFILER_SIGNAL", "SIGUSR2"))
@@ -0,0 +1,34 @@
+"""async judging: batch_token, language_id, judged_at on submissions
+
+Revision ID: 3f1c2a7d9b10
+Revises: 9adee9b5f57d
+Create Date: 2025-09-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b10'
+down_revision = '9adee9b5f57d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('language_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('batch_token', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('judged_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_submissions_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_batch_token'), ['batch_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_batch_token'))
+        batch_op.drop_index(batch_op.f('ix_submissions_status'))
+        batch_op.drop_column('judged_at')
+        batch_op.drop_column('batch_token')
+        batch_op.drop_column('language_id')
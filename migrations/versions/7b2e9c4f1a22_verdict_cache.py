@@ -0,0 +1,34 @@
+"""verdict cache: tasks.tests_version, submissions.cache_key
+
+Revision ID: 7b2e9c4f1a22
+Revises: 3f1c2a7d9b10
+Create Date: 2025-09-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e9c4f1a22'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tests_version', sa.Integer(), nullable=False, server_default='1'))
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cache_key', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_submissions_cache_key'), ['cache_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_cache_key'))
+        batch_op.drop_column('cache_key')
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_column('tests_version')
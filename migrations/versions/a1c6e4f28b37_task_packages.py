@@ -0,0 +1,30 @@
+"""tasks.package, tasks.package_hash — загрузчик пакетов задач
+
+Revision ID: a1c6e4f28b37
+Revises: f3b8a2c6d914
+Create Date: 2025-10-14 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c6e4f28b37'
+down_revision = 'f3b8a2c6d914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('package', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('package_hash', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_tasks_package', ['package'])
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_tasks_package', type_='unique')
+        batch_op.drop_column('package_hash')
+        batch_op.drop_column('package')
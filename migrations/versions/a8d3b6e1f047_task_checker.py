@@ -0,0 +1,26 @@
+"""tasks.checker (exact / tokens / float[:eps])
+
+Revision ID: a8d3b6e1f047
+Revises: e5a7f0b3c912
+Create Date: 2025-10-03 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3b6e1f047'
+down_revision = 'e5a7f0b3c912'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checker', sa.String(length=32), nullable=False, server_default='exact'))
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_column('checker')
@@ -0,0 +1,26 @@
+"""task_tests.group — подзадачи «всё или ничего»
+
+Revision ID: b2f94c7d1e58
+Revises: a8d3b6e1f047
+Create Date: 2025-10-06 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f94c7d1e58'
+down_revision = 'a8d3b6e1f047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_tests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('group', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('task_tests', schema=None) as batch_op:
+        batch_op.drop_column('group')
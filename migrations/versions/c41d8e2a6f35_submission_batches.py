@@ -0,0 +1,77 @@
+"""scheduler: submission_batches, submissions.started_at
+
+Revision ID: c41d8e2a6f35
+Revises: 7b2e9c4f1a22
+Create Date: 2025-09-27 15:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8e2a6f35'
+down_revision = '7b2e9c4f1a22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('submission_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('part', sa.Integer(), nullable=False),
+    sa.Column('first_test', sa.Integer(), nullable=False),
+    sa.Column('n_tests', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=True),
+    sa.Column('batch_token', sa.String(length=64), nullable=True),
+    sa.Column('results', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('submission_batches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_submission_batches_submission_id'), ['submission_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submission_batches_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submission_batches_batch_token'), ['batch_token'], unique=False)
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('started_at', sa.DateTime(), nullable=True))
+
+    # отправки, которые сейчас в ExecEngine, переносим в новую таблицу одним куском
+    op.execute("""
+        INSERT INTO submission_batches (submission_id, part, first_test, n_tests, status, batch_token, created_at, sent_at)
+        SELECT s.id, 0, 0, (SELECT count(*) FROM task_tests t WHERE t.task_id = s.task_id),
+               'running', s.batch_token, s.created_at, s.created_at
+        FROM submissions s
+        WHERE s.status = 'running' AND s.batch_token IS NOT NULL
+    """)
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_batch_token'))
+        batch_op.drop_column('batch_token')
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_token', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_submissions_batch_token'), ['batch_token'], unique=False)
+
+    op.execute("""
+        UPDATE submissions SET batch_token = b.batch_token
+        FROM submission_batches b
+        WHERE b.submission_id = submissions.id AND b.part = 0
+    """)
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_column('started_at')
+
+    with op.batch_alter_table('submission_batches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submission_batches_batch_token'))
+        batch_op.drop_index(batch_op.f('ix_submission_batches_status'))
+        batch_op.drop_index(batch_op.f('ix_submission_batches_submission_id'))
+
+    op.drop_table('submission_batches')
@@ -0,0 +1,48 @@
+"""хранилище больших данных: blobs, task_tests.*_blob, submissions.result_blob
+
+Revision ID: c9e2d5a7b418
+Revises: a1c6e4f28b37
+Create Date: 2025-10-15 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e2d5a7b418'
+down_revision = 'a1c6e4f28b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('oid', sa.BigInteger(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    with op.batch_alter_table('task_tests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_blob', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('output_blob', sa.String(length=64), nullable=True))
+        batch_op.alter_column('input_data', existing_type=sa.Text(), nullable=True)
+        batch_op.alter_column('expected_output', existing_type=sa.Text(), nullable=True)
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('result_blob', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    # данные из хранилища обратно в строки не переносим: сначала верните их вручную
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_column('result_blob')
+    op.execute("UPDATE task_tests SET input_data = '' WHERE input_data IS NULL")
+    op.execute("UPDATE task_tests SET expected_output = '' WHERE expected_output IS NULL")
+    with op.batch_alter_table('task_tests', schema=None) as batch_op:
+        batch_op.alter_column('expected_output', existing_type=sa.Text(), nullable=False)
+        batch_op.alter_column('input_data', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('output_blob')
+        batch_op.drop_column('input_blob')
+    op.drop_table('blobs')
@@ -0,0 +1,53 @@
+"""best_scores: лучший результат по (студент, задача) для сводной
+
+Revision ID: d7c1e9a4b263
+Revises: b2f94c7d1e58
+Create Date: 2025-10-08 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7c1e9a4b263'
+down_revision = 'b2f94c7d1e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'best_scores',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=32), nullable=True),
+        sa.Column('submission_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('student_id', 'task_id'),
+    )
+    with op.batch_alter_table('best_scores', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_best_scores_task_id'), ['task_id'], unique=False)
+
+    # заполняем по уже проверенным отправкам (то же, что flask scoreboard-rebuild)
+    op.execute("""
+        INSERT INTO best_scores (student_id, task_id, score, status, submission_id, updated_at)
+        SELECT student_id, task_id, COALESCE(score, 0), status, id, CURRENT_TIMESTAMP
+        FROM (
+            SELECT s.*, row_number() OVER (PARTITION BY student_id, task_id
+                                           ORDER BY COALESCE(score, 0) DESC, id ASC) AS rank
+            FROM submissions s
+            WHERE s.status NOT IN ('queued', 'running', 'error')
+        ) ranked
+        WHERE rank = 1
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('best_scores', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_best_scores_task_id'))
+    op.drop_table('best_scores')
@@ -0,0 +1,26 @@
+"""tasks.judging_mode (full / fail_fast)
+
+Revision ID: e5a7f0b3c912
+Revises: c41d8e2a6f35
+Create Date: 2025-10-01 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7f0b3c912'
+down_revision = 'c41d8e2a6f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('judging_mode', sa.String(length=16), nullable=False, server_default='full'))
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_column('judging_mode')
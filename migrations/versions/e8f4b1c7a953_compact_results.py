@@ -0,0 +1,138 @@
+"""компактные сводки в submissions.result, сырые results — в холодное хранилище
+
+Revision ID: e8f4b1c7a953
+Revises: c9e2d5a7b418
+Create Date: 2025-10-16 12:30:00.000000
+
+Схема не меняется: переписываем Submission.result старого вида (копия ответа ExecEngine
++ "tests" словарями) в компактный ({"tests": строки по scoring.TEST_COLUMNS, "runtime_ms",
+"memory_kb"}), а сами results сжимаем в хранилище — как services/archive.py на момент
+миграции. Код приложения не импортируем: запись в хранилище (fs или large objects pg)
+повторена здесь и читает те же переменные окружения BLOB_BACKEND, BLOB_DIR и
+RAW_RESULTS_KEEP с теми же умолчаниями. Порции по 500 строк.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f4b1c7a953'
+down_revision = 'c9e2d5a7b418'
+branch_labels = None
+depends_on = None
+
+_CHUNK = 500
+_KEEP = ("error", "cached_from")
+
+_BLOB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                         "var", "blobs")
+
+submissions = sa.table(
+    'submissions',
+    sa.column('id', sa.Integer),
+    sa.column('result', JSONB),
+    sa.column('result_blob', sa.String),
+)
+
+
+def _memory_kb(r):
+    try:
+        return int(r["memory"]) if r.get("memory") is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _compact(result):
+    results = result.get("results") if isinstance(result.get("results"), list) else []
+    rows = []
+    for i, t in enumerate(result.get("tests") or []):
+        if not isinstance(t, dict):
+            return None  # уже компактная
+        r = results[i] if i < len(results) and isinstance(results[i], dict) else {}
+        rows.append([t.get("verdict"), t.get("time_ms"), _memory_kb(r),
+                     (r.get("diff") or {}).get("position"), t.get("points"), t.get("group")])
+    out = {k: result[k] for k in _KEEP if k in result}
+    if rows:
+        memory = [row[2] for row in rows if row[2] is not None]
+        out.update(tests=rows, runtime_ms=result.get("runtime_ms"), memory_kb=max(memory) if memory else None)
+    return out
+
+
+def _put_fs(root, data):
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(root, digest[:2], digest[2:4], digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=root, prefix=".put-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return digest
+
+
+def _put_pg(bind, data):
+    digest = hashlib.sha256(data).hexdigest()
+    exists = bind.execute(sa.text("SELECT 1 FROM blobs WHERE sha256 = :d"), {"d": digest}).first()
+    if exists is None:
+        oid = bind.execute(sa.text("SELECT lo_from_bytea(0, :data)"), {"data": data}).scalar_one()
+        bind.execute(sa.text("INSERT INTO blobs (sha256, oid, size, created_at) VALUES (:d, :oid, :size, now())"),
+                     {"d": digest, "oid": oid, "size": len(data)})
+    return digest
+
+
+def _archiver(bind):
+    """Функция results -> sha256 блоба (None — сырые ответы не храним)."""
+    if os.getenv("RAW_RESULTS_KEEP", "true").lower() != "true":
+        return lambda results: None
+    backend = os.getenv("BLOB_BACKEND", "fs")
+    root = os.getenv("BLOB_DIR", _BLOB_DIR)
+    if backend not in ("fs", "pg"):
+        raise RuntimeError(f"BLOB_BACKEND: unknown backend {backend!r}")
+
+    def put(results):
+        data = zlib.compress(json.dumps(results, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        if backend == "pg":
+            return _put_pg(bind, data)
+        os.makedirs(root, exist_ok=True)
+        return _put_fs(root, data)
+    return put
+
+
+def upgrade():
+    bind = op.get_bind()
+    archive_put = _archiver(bind)
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(submissions.c.id, submissions.c.result, submissions.c.result_blob)
+            .where(submissions.c.id > last_id, submissions.c.result.isnot(None))
+            .order_by(submissions.c.id).limit(_CHUNK)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for row in rows:
+            result = row.result if isinstance(row.result, dict) else {}
+            if "results" not in result and not any(isinstance(t, dict) for t in result.get("tests") or []):
+                continue
+            compact = _compact(result)
+            if compact is None:
+                continue
+            blob = row.result_blob
+            if blob is None and isinstance(result.get("results"), list):
+                blob = archive_put(result["results"])
+            bind.execute(submissions.update().where(submissions.c.id == row.id)
+                         .values(result=compact, result_blob=blob))
+
+
+def downgrade():
+    # сводки обратно в ответы ExecEngine не разворачиваем (scoring.expand_tests читает оба вида),
+    # а молча «откатиться», оставив данные в новом виде, хуже явной ошибки
+    raise RuntimeError("e8f4b1c7a953 (compact results) is irreversible: restore from a backup instead")
@@ -0,0 +1,34 @@
+"""составные индексы для ленты отправок (keyset по created_at, id)
+
+Revision ID: f3b8a2c6d914
+Revises: d7c1e9a4b263
+Create Date: 2025-10-10 16:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8a2c6d914'
+down_revision = 'd7c1e9a4b263'
+branch_labels = None
+depends_on = None
+
+_INDEXES = (
+    ('ix_submissions_created_at_id', ['created_at', 'id']),
+    ('ix_submissions_student_created', ['student_id', 'created_at', 'id']),
+    ('ix_submissions_task_created', ['task_id', 'created_at', 'id']),
+    ('ix_submissions_status_created', ['status', 'created_at', 'id']),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        for name, columns in _INDEXES:
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        for name, _ in reversed(_INDEXES):
+            batch_op.drop_index(name)
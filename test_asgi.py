@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+import anyio
+import httpx
+import pytest
+
+from app.asgi import create_asgi_app
+from app.extensions import db
+from app.services import judging
+from app.testing import loadbench
+from app.testing.fake_execengine import create_fake_app, judge_expected, serve_in_thread
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Приложение на файловом SQLite (ASGI ходит в БД из разных потоков) и фейковый ExecEngine."""
+    server, base_url = serve_in_thread(create_fake_app(judge=judge_expected))
+    flask_app = loadbench.make_app(f"sqlite:///{tmp_path / 'db.sqlite'}", base_url, str(tmp_path / "blobs"))
+    flask_app.config["ASYNC_WATCH_INTERVAL"] = 0.02
+    with flask_app.app_context():
+        db.create_all()
+        task_id = loadbench.seed(1, 2)
+    yield flask_app, task_id
+    server.shutdown()
+
+
+def _judge_worker(flask_app, stop):
+    with flask_app.app_context():
+        while not stop.is_set():
+            judging.run_once()
+            db.session.remove()
+            time.sleep(0.01)
+
+
+def _client(asgi):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi), base_url="http://test")
+
+
+async def _login(c):
+    resp = await c.post("/auth/login", data={"code": loadbench.student_code(0)})
+    assert resp.status_code == 302
+
+
+async def test_submit_waits_for_verdict(site):
+    flask_app, task_id = site
+    asgi = create_asgi_app(flask_app)
+    stop = threading.Event()
+    worker = threading.Thread(target=_judge_worker, args=(flask_app, stop))
+    worker.start()
+    try:
+        async with _client(asgi) as c:
+            await _login(c)
+            assert (await c.get("/healthz")).json() == {"status": "ok"}  # остальное — во Flask как есть
+
+            resp = await c.post("/submit?wait=10", data={"task_id": task_id, "code": "print(input())"})
+            assert resp.status_code == 200
+            data = resp.json()
+            assert data["pending"] is False and data["verdict"] == "OK" and data["status_url"]
+
+            resp = await c.get(f"{data['status_url']}?wait=10")
+            assert resp.status_code == 200 and resp.json()["verdict"] == "OK"
+    finally:
+        stop.set()
+        worker.join()
+
+
+async def test_many_long_polls_share_one_watcher(site):
+    flask_app, task_id = site
+    asgi = create_asgi_app(flask_app)
+    async with _client(asgi) as c:
+        await _login(c)
+        ids = [(await c.post("/submit", data={"task_id": task_id, "code": f"print(input())  # {i}"})).json()["id"]
+               for i in range(30)]
+
+        # без воркера: не дождались — исходный ответ Flask
+        resp = await c.get(f"/submissions/{ids[0]}?wait=0.1")
+        assert resp.status_code == 200 and resp.json()["pending"] is True
+
+        results = {}
+
+        async def poll(sub_id):
+            results[sub_id] = (await c.get(f"/submissions/{sub_id}?wait=20")).json()
+
+        stop = threading.Event()
+        worker = threading.Thread(target=_judge_worker, args=(flask_app, stop))
+        try:
+            async with anyio.create_task_group() as tg:
+                for sub_id in ids:
+                    tg.start_soon(poll, sub_id)
+                await anyio.sleep(0.2)
+                assert asgi.watcher.waiting == len(ids)  # ждут в event loop, не в потоках
+                worker.start()
+        finally:
+            stop.set()
+            if worker.is_alive():
+                worker.join()
+    assert all(r["verdict"] == "OK" for r in results.values()) and len(results) == len(ids)
+    assert asgi.watcher.waiting == 0
+
+
+async def test_long_poll_respects_auth(site):
+    flask_app, task_id = site
+    asgi = create_asgi_app(flask_app)
+    async with _client(asgi) as c:
+        resp = await c.post("/submit?wait=1", data={"task_id": task_id, "code": "print(1)"},
+                            headers={"Accept": "application/json"})
+        assert resp.status_code == 401
+
+
+async def test_long_poll_stops_when_client_disconnects(site):
+    flask_app, task_id = site
+    asgi = create_asgi_app(flask_app)
+    async with _client(asgi) as c:
+        await _login(c)
+        sub_id = (await c.post("/submit", data={"task_id": task_id, "code": "print(input())"})).json()["id"]
+        cookie = "; ".join(f"{k}={v}" for k, v in c.cookies.items())
+        agent = c.headers["user-agent"]  # session_protection="strong" сверяет адрес и User-Agent
+
+    gone, sent = anyio.Event(), []
+
+    async def receive():
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": f"/submissions/{sub_id}", "raw_path": f"/submissions/{sub_id}".encode(),
+             "query_string": b"wait=30", "root_path": "", "server": ("test", 80), "client": ("127.0.0.1", 123),
+             "headers": [(b"host", b"test"), (b"user-agent", agent.encode()), (b"cookie", cookie.encode())]}
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(asgi, scope, receive, send)
+            while not asgi.watcher.waiting:
+                await anyio.sleep(0.01)
+            gone.set()
+    assert asgi.watcher.waiting == 0
+    assert sent[0]["status"] == 200 and json.loads(sent[1]["body"])["pending"] is True
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from app.extensions import db
+from app.models import Submission, Task, TaskTest
+from app.services import archive, blobs, judging
+from app.services.scoring import expand_tests
+from test_judging import XHR, _judge_until_done
+
+
+def test_large_tests_and_results_live_out_of_row(app, client, task):
+    app.config["BLOB_INLINE_BYTES"] = 16
+    big_in, big_out = "7\n" + " " * 40 + "\n", "14\n"
+    task.tests[1].input_data = big_in
+    task.tests[1].expected_output = big_out
+    db.session.commit()
+    assert blobs.offload_tests() == 1
+
+    db.session.expire_all()
+    t = TaskTest.query.filter_by(task_id=task.id, order=2).one()
+    assert t.input_data is None and t.output_blob is None
+    assert bytes(blobs.task_test_data(t.input_data, t.input_blob)) == big_in.encode()
+    # одинаковое содержимое хранится один раз
+    assert blobs.get_store().put(big_in.encode()) == t.input_blob
+    assert len(os.listdir(os.path.dirname(blobs.get_store().path(t.input_blob)))) == 1
+
+    data = client.post("/submit", data={"task_id": task.id, "code": "print(int(input()) * 2)"},
+                       headers=XHR).get_json()
+    sub = _judge_until_done(data["id"])
+    assert (sub.status, sub.score) == ("OK", 100)
+    assert sub.result_blob and "results" not in sub.result
+    assert len(judging.raw_results(sub)) == 2
+
+    db.session.get(Task, task.id).tests[0].points = 0
+    db.session.commit()
+    assert judging.rescore(task_id=task.id)["changed"] == 1
+    sub = db.session.get(Submission, data["id"])
+    assert sub.score == 100 and [x["points"] for x in expand_tests(sub.result)] == [0, 100]
+
+
+def test_raw_results_are_compressed_and_evicted(app, task, student):
+    sub = judging.enqueue(student.id, task, "print(4)", 71)
+    judging.finish(sub, {"status": "FINISHED", "results": [{"status": {"description": "Accepted"}, "memory": 900},
+                                                           {"status": {"description": "Accepted"}}]})
+    db.session.commit()
+    assert sub.result == {"tests": [["OK", 0, 900, None, 50.0, None], ["OK", 0, None, None, 50.0, None]],
+                          "runtime_ms": 0, "memory_kb": 900}
+    assert blobs.get_store().read(sub.result_blob)[:1] != b"["  # сжато
+    assert judging.raw_results(sub)[0]["memory"] == 900
+
+    assert archive.evict(ttl_days=1) == {"evicted": 0, "deleted": 0}
+    assert archive.evict(ttl_days=-1) == {"evicted": 1, "deleted": 1}
+    db.session.expire_all()
+    assert judging.raw_results(sub) is None
+    assert judging.rescore()["skipped"] == 1
+
+    app.config["RAW_RESULTS_KEEP"] = False
+    other = judging.enqueue(student.id, task, "print(5)", 71)
+    judging.finish(other, {"results": [{"status": {"description": "Accepted"}}] * 2})
+    assert other.result_blob is None and other.status == "OK"
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoDelete(blobs.BlobStore):
+        def put_stream(self, chunks):
+            return ""
+
+        def view(self, digest):
+            return b""
+
+        def open(self, digest):
+            raise FileNotFoundError(digest)
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete()
+
+
+def test_verdict_copy_does_not_share_evicted_blob(app, task, student):
+    from app.services.verdict_cache import copy_verdict
+
+    twin = judging.enqueue(student.id, task, "print(4)", 71)
+    judging.finish(twin, {"results": [{"status": {"description": "Accepted"}}] * 2})
+    db.session.commit()
+    sub = judging.enqueue(student.id, task, "print(4)", 71)
+    digest = twin.result_blob
+    # evict уже отвязал блоб и удалил его, а в памяти twin ещё держит старую ссылку
+    db.session.execute(db.update(Submission).where(Submission.id == twin.id).values(result_blob=None),
+                       execution_options={"synchronize_session": False})
+    blobs.get_store().delete(digest)
+    assert twin.result_blob == digest
+
+    copy_verdict(sub, twin)
+    db.session.commit()
+    assert sub.status == "OK" and sub.result_blob is None
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+
+from app.extensions import db
+from app.services import catalog
+
+
+def _task_queries(app, fn):
+    seen = []
+
+    def on_execute(conn, cursor, statement, *args):
+        if "FROM tasks" in statement or "FROM task_tests" in statement:
+            seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", on_execute)
+    return seen
+
+
+def test_submit_reads_task_from_catalog(app, client, task):
+    task_id = task.id
+
+    def submit():
+        r = client.post("/submit", data={"task_id": task_id, "code": "print(2*int(input()))"})
+        assert r.status_code == 202
+
+    assert len(_task_queries(app, submit)) == 2  # задача и её тесты, один раз
+    assert _task_queries(app, submit) == []
+    assert client.post("/submit", data={"task_id": 999, "code": "x"}).status_code == 404
+
+    info = catalog.get(task_id)
+    assert [t.order for t in info.tests] == [1, 2] and info.max_score == 100
+    version = catalog.get_catalog().version
+    task.tests[1].points = 70
+    db.session.commit()
+    assert catalog.get_catalog().version > version
+    assert catalog.get(task_id).tests[1].points == 70
+    assert catalog.first().id == task_id
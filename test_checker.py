@@ -0,0 +1,40 @@
+import base64
+
+from app.services import checker
+from app.services.scoring import result_ok
+
+
+def _b64(s, wrap=False):
+    out = base64.b64encode(s.encode()).decode()
+    if wrap:  # Judge0 переносит base64 каждые 60 символов
+        out = "\n".join(out[i:i + 60] for i in range(0, len(out), 60))
+    return out
+
+
+def test_chunked_decode_matches_full():
+    text = "строка 1\n" * 5000
+    assert b"".join(checker.b64_chunks(_b64(text, wrap=True), step=7)) == text.encode()
+
+
+def test_exact_reports_first_mismatch():
+    assert checker.compare(_b64("\n1 2\n3\n\n"), _b64("1 2\n3")).ok
+    res = checker.compare(_b64("1 2\n3 5\n"), _b64("1 2\n3 4\n"))
+    assert not res.ok and res.position == 6 and res.line == 2 and res.got == "5"
+    assert not checker.compare(_b64("1 2"), _b64("1 2 3")).ok
+
+
+def test_tokens_and_float_modes():
+    big = " ".join(str(i) for i in range(20000))
+    assert checker.compare(_b64(big.replace(" ", "\n")), _b64(big), "tokens").ok
+    assert not checker.compare(_b64("1  2"), _b64("12"), "tokens").ok
+    assert checker.compare(_b64("0.3333334 x"), _b64("0.3333333 x"), "float").ok
+    res = checker.compare(_b64("0.34"), _b64("0.3333333"), "float:1e-3")
+    assert not res.ok and res.position == 1
+
+
+def test_result_ok_uses_task_checker():
+    r = {"status": {"description": "Wrong Answer"}, "stdout": _b64("1\n2\n"), "expected_output": _b64("1 2")}
+    assert not result_ok(dict(r))
+    assert result_ok(dict(r), "tokens")
+    # вердикт среды выполнения не перепроверяем
+    assert not result_ok(dict(r, status={"description": "Time Limit Exceeded"}), "tokens")
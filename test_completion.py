@@ -0,0 +1,40 @@
+from app.services.completion import CompletionStrategy, RabbitMQCompletion
+
+
+def test_backoff_grows_until_max():
+    s = CompletionStrategy(initial_s=0.1, factor=2.0, max_s=0.5)
+    s.track("t", now=0.0)
+    assert s.due(["t"], now=0.05) == []
+    assert s.due(["t"], now=0.1) == ["t"]
+
+    now, delays = 0.1, []
+    for _ in range(4):
+        s.polled("t", finished=False, now=now)
+        delays.append(round(s.seconds_until_due(now=now), 3))
+    assert delays == [0.2, 0.4, 0.5, 0.5]
+
+    s.polled("t", finished=True, now=now)
+    assert s.seconds_until_due(now=now) is None
+
+
+def test_push_notification_makes_token_due_now():
+    s = CompletionStrategy(initial_s=30.0)
+    s.track("t", now=0.0)
+    assert s.due(["t"], now=1.0) == []
+    s.notify("t")
+    assert s.due(["t"], now=1.0) == ["t"]
+
+
+def test_batches_closed_elsewhere_leave_schedule():
+    s = CompletionStrategy(initial_s=15.0)
+    s.track("a", now=0.0)
+    s.track("b", now=0.0)
+    s.retain(["b"])  # "a" закрыт webhook'ом или другим воркером
+    assert s.due([], now=100.0) == []
+    s.retain([])
+    assert s.seconds_until_due(now=100.0) is None
+
+
+def test_rabbitmq_message_formats():
+    assert RabbitMQCompletion.token_from_message(b'{"batch_token": "abc"}') == "abc"
+    assert RabbitMQCompletion.token_from_message(b"abc\n") == "abc"
@@ -0,0 +1,118 @@
+import pytest
+
+from app.execengine_client import get_client
+
+
+def _state(fake_ee):
+    return fake_ee.extensions["fake_execengine"]
+
+
+def test_client_is_shared_and_logs_in_once(app, fake_ee):
+    client = get_client()
+    assert get_client() is client
+
+    for _ in range(3):
+        token = client.submit_batch(language_id=71, source_code="print(1)", tests=[])["batch_token"]
+        assert client.get_batch_results(token) is not None
+    assert _state(fake_ee)["logins"] == 1
+
+
+def test_client_relogs_in_once_on_401(app, fake_ee):
+    client = get_client()
+    client.submit_batch(language_id=71, source_code="print(1)", tests=[])
+    _state(fake_ee)["tokens"].clear()  # ExecEngine «забыл» токен
+
+    assert client.submit_batch(language_id=71, source_code="print(1)", tests=[])["batch_token"]
+    assert _state(fake_ee)["logins"] == 2
+
+
+def test_status_route_is_probed_once_per_process(app):
+    from app.execengine_client import ExecEngineClientV2
+    from app.testing.fake_execengine import create_fake_app, serve_in_thread
+
+    fake = create_fake_app(status_route="query")
+    server, base_url = serve_in_thread(fake)
+    try:
+        client = ExecEngineClientV2(base_url, username="admin", password="admin")
+        for _ in range(3):
+            token = client.submit_batch(language_id=71, source_code="print(1)", tests=[])["batch_token"]
+            assert client.get_batch_results(token) is not None
+        assert fake.extensions["fake_execengine"]["not_found"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_task_payload_is_cached_and_invalidated(app, task):
+    from app.extensions import db
+    from app.models import TaskTest
+    from app.services import payloads
+
+    first = payloads.for_task(task)
+    assert payloads.for_task(task) is first
+    # склейка совпадает с тем, что собрал бы submit_batch
+    client = get_client()
+    common = client.limits(app.config)
+    assert first.fragments[0] == client.encode_test({"stdin": "2\n", "expected_output": "4\n"}, common)
+
+    task.tests.append(TaskTest(order=3, input_data="5\n", expected_output="10\n"))
+    db.session.commit()
+    assert payloads.for_task(task).n_tests == 3
+
+    app.config["EE_TIME_LIMIT"] = 7
+    assert b'"time_limit":7.0' in payloads.for_task(task).fragments[0]
+    assert payloads.get_cache().stats()["hits"] == 1
+
+
+def test_submit_encoded_body_is_valid_json(app, fake_ee):
+    client = get_client()
+    client.submit_batch(language_id=71, source_code="print('ё')",
+                        tests=[{"stdin": "1\n", "expected_output": "2\n"}, {"stdin": None, "expected_output": None}])
+    (batch,) = _state(fake_ee)["batches"].values()
+    subs = batch["submissions"]
+    assert len(subs) == 2 and subs[1]["stdin"] is None
+    assert subs[0]["language_id"] == 71 and subs[0]["time_limit"] == float(app.config["EE_TIME_LIMIT"])
+
+
+@pytest.mark.anyio
+async def test_async_client_round_trip(app, fake_ee):
+    from app.execengine_client import AsyncExecEngineClientV2
+
+    async with AsyncExecEngineClientV2.from_config(app.config) as client:
+        tokens = [(await client.submit_batch(language_id=71, source_code="print(input())",
+                                             tests=[{"stdin": "5\n", "expected_output": "5\n"}]))["batch_token"]
+                  for _ in range(3)]
+        result = await client.wait_batch_results(tokens[0], max_wait_s=10)
+        assert result["status"] == "FINISHED" and result["results"][0]["stdout"]
+        many = await client.get_many_batch_results(tokens)
+        assert set(many) == set(tokens) and all(many.values())
+
+        _state(fake_ee)["tokens"].clear()  # 401 -> перелогин
+        assert await client.get_batch_results(tokens[1]) is not None
+    assert _state(fake_ee)["logins"] == 2
+
+
+@pytest.mark.anyio
+async def test_async_client_shares_token_and_probes_route_once(app):
+    import anyio
+
+    from app.execengine_client import AsyncExecEngineClientV2
+    from app.testing.fake_execengine import create_fake_app, serve_in_thread
+
+    fake = create_fake_app(status_route="query")
+    server, base_url = serve_in_thread(fake)
+    try:
+        async with AsyncExecEngineClientV2(base_url, username="admin", password="admin", config=app.config) as client:
+            tokens = []
+
+            async def submit():
+                tokens.append((await client.submit_batch(language_id=71, source_code="print(1)"))["batch_token"])
+
+            async with anyio.create_task_group() as tg:
+                for _ in range(5):
+                    tg.start_soon(submit)
+            for token in tokens:
+                assert await client.get_batch_results(token) is not None
+        state = fake.extensions["fake_execengine"]
+        assert state["logins"] == 1 and state["not_found"] == 1
+    finally:
+        server.shutdown()
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app.extensions import db
+from app.services import exports, judging
+from app.services.results import BadQuery
+
+
+def test_exports_stream_rows(app, task, student):
+    sub = judging.enqueue(student.id, task, "print(4)", 71)
+    judging.finish(sub, {"results": [{"status": {"description": "Accepted"}, "time": "0.01"},
+                                     {"status": {"description": "Wrong Answer"}}]})
+    db.session.commit()
+
+    roster = b"".join(exports.stream("roster", "csv", MultiDict({"group_id": student.group_id})))
+    assert roster.decode("utf-8-sig").splitlines() == ["full_name,auth_code", "Иванов Иван,АБВГДЕ"]
+
+    subs = b"".join(exports.stream("submissions", "ndjson", MultiDict({"task_id": task.id}))).splitlines()
+    assert [json.loads(line)["status"] for line in subs] == ["PARTIAL"]
+
+    tests = b"".join(exports.stream("test_results", "ndjson", MultiDict())).splitlines()
+    assert [json.loads(line)["verdict"] for line in tests] == ["OK", "WA"]
+
+
+def test_bad_export_arguments_fail_before_streaming(app):
+    with pytest.raises(LookupError):
+        exports.stream("grades", "csv", MultiDict())
+    with pytest.raises(BadQuery):
+        exports.stream("test_results", "csv", MultiDict({"since": "вчера"}))
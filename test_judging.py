@@ -0,0 +1,132 @@
+import time
+
+from app.extensions import db
+from app.models import Student, Submission
+from app.services import judging
+
+XHR = {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}
+
+
+def _judge_until_done(sub_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        judging.run_once()
+        sub = db.session.get(Submission, sub_id)
+        if not sub.is_pending:
+            return sub
+        time.sleep(0.05)
+    raise AssertionError("submission was not judged in time")
+
+
+def test_submit_returns_immediately_and_worker_judges(client, task, fake_ee):
+    resp = client.post("/submit", data={"task_id": task.id, "code": "print(int(input()) * 2)"}, headers=XHR)
+    assert resp.status_code == 202
+    data = resp.get_json()
+    assert data["status"] == "queued"
+    assert fake_ee.extensions["fake_execengine"]["submits"] == 0
+
+    status = client.get(data["status_url"], headers=XHR).get_json()
+    assert status["pending"] is True
+
+    sub = _judge_until_done(data["id"])
+    assert sub.status == "OK"
+    assert sub.score == 100
+
+    status = client.get(data["status_url"], headers=XHR).get_json()
+    assert status["verdict"] == "OK" and status["points"] == 100
+
+
+def test_wrong_answer_is_scored(client, task):
+    data = client.post("/submit", data={"task_id": task.id, "code": "print(4)"}, headers=XHR).get_json()
+    sub = _judge_until_done(data["id"])
+    assert sub.status == "PARTIAL"
+    assert 0 < sub.score < 100
+
+
+def test_status_of_foreign_submission_is_hidden(client, task):
+    other = Student(full_name="Петров Пётр")
+    other.set_auth_code("ЖЗИКЛМ")
+    db.session.add(other)
+    db.session.commit()
+    sub = judging.enqueue(other.id, task, "print(1)", 71)
+    assert client.get(f"/submissions/{sub.id}", headers=XHR).status_code == 404
+
+
+def test_webhook_finishes_batch_without_worker_poll(client, task, app):
+    app.config["EXECENGINE_WEBHOOK_SECRET"] = "s3cret"
+    data = client.post("/submit", data={"task_id": task.id, "code": "print(int(input()) * 2)"}, headers=XHR).get_json()
+    strategy = judging.get_completion()
+    strategy.initial_s = 60.0  # опрос воркером «не скоро» — результат должен прийти через webhook
+    judging.run_once(strategy=strategy)
+    sub = db.session.get(Submission, data["id"])
+    assert sub.status == "running"
+
+    token = sub.batches[0].batch_token
+    assert client.post(f"/hooks/execengine/{token}").status_code == 403
+    resp = client.post(f"/hooks/execengine/{token}", headers={"X-Webhook-Secret": "s3cret"})
+    assert resp.get_json()["submission_id"] == sub.id
+    db.session.expire_all()
+    assert db.session.get(Submission, data["id"]).status == "OK"
+
+    # батч закрыт не воркером: следующий тик убирает его из расписания, а не ждёт 0 секунд
+    judging.run_once(strategy=strategy)
+    assert strategy.seconds_until_due() is None
+
+
+def test_webhook_token_from_body(client, task, app):
+    app.config["EXECENGINE_WEBHOOK_SECRET"] = "s3cret"
+    hdr = {"X-Webhook-Secret": "s3cret"}
+    assert client.post("/hooks/execengine", json={}, headers=hdr).status_code == 400
+    resp = client.post("/hooks/execengine", json={"batch_token": "unknown"}, headers=hdr)
+    assert resp.status_code == 202
+    assert resp.get_json() == {"batch_token": "unknown", "submission_id": None}
+
+
+def test_execengine_is_called_outside_a_transaction(app, task, student):
+    sub = judging.enqueue(student.id, task, "print(int(input()) * 2)", 71)
+    client = judging.get_client()
+    real, seen = client.submit_encoded, []
+
+    def submit_encoded(**kw):
+        seen.append(db.session().in_transaction())  # ни транзакции, ни блокировок строк на время HTTP
+        return real(**kw)
+
+    client.submit_encoded = submit_encoded
+    try:
+        judging.dispatch_queued(client, judging.get_completion())
+    finally:
+        del client.submit_encoded
+    assert seen == [False]
+    assert [b.status for b in db.session.get(Submission, sub.id).batches] == ["running"]
+
+
+def test_unavailable_execengine_returns_submission_to_queue(app, task, student):
+    import requests
+
+    sub = judging.enqueue(student.id, task, "print(int(input()) * 2)", 71)
+    client = judging.get_client()
+
+    def down(**kw):
+        raise requests.ConnectionError("execengine is down")
+
+    client.submit_encoded = down
+    try:
+        assert judging.dispatch_queued(client, judging.get_completion()) == 0
+    finally:
+        del client.submit_encoded
+    db.session.expire_all()
+    sub = db.session.get(Submission, sub.id)
+    assert sub.status == "queued" and sub.batches == [] and sub.started_at is None
+    assert _judge_until_done(sub.id).status == "OK"
+
+
+def test_stale_sending_batch_is_reclaimed(app, task, student):
+    from datetime import datetime, timedelta
+
+    sub = judging.enqueue(student.id, task, "print(int(input()) * 2)", 71)
+    judging.dispatch_queued(judging.get_client(), judging.get_completion())
+    batch = db.session.get(Submission, sub.id).batches[0]
+    batch.status, batch.batch_token = "sending", None  # воркер упал между взятием и ответом ExecEngine
+    batch.sent_at = datetime.utcnow() - timedelta(seconds=app.config["JUDGE_SENDING_TIMEOUT"] + 1)
+    db.session.commit()
+    assert _judge_until_done(sub.id).status == "OK"
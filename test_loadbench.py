@@ -0,0 +1,39 @@
+from app.testing import loadbench
+from app.testing.fake_execengine import create_fake_app, judge_expected
+
+
+def test_student_codes_are_valid_and_distinct():
+    codes = [loadbench.student_code(i) for i in range(100)]
+    assert len(set(codes)) == 100
+    assert all(len(c) == 6 and c.isupper() for c in codes)
+
+
+def test_percentile():
+    assert loadbench.percentile([], 50) is None
+    values = list(range(1, 101))
+    assert loadbench.percentile(values, 50) == 50
+    assert loadbench.percentile(values, 99) == 99
+
+
+def test_fake_concurrency_cap_and_errors():
+    fake = create_fake_app(judge=judge_expected, delay_s=1.0, max_concurrent=1, error_rate=1.0, seed=1)
+    c = fake.test_client()
+    token = c.post("/v2/auth/login/").get_json()["access_token"]
+    resp = c.post("/v2/submissions/batch/", json={"submissions": []}, headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 503
+    assert fake.extensions["fake_execengine"]["errors"] == 1
+
+    fake = create_fake_app(judge=judge_expected, delay_s=1.0, max_concurrent=1)
+    c = fake.test_client()
+    headers = {"Authorization": f"Bearer {c.post('/v2/auth/login/').get_json()['access_token']}"}
+    for _ in range(2):
+        c.post("/v2/submissions/batch/", json={"submissions": []}, headers=headers)
+    first, second = sorted(b["ready_at"] for b in fake.extensions["fake_execengine"]["batches"].values())
+    assert second - first >= 0.99  # второй батч ждёт, пока освободится единственный исполнитель
+
+
+def test_end_to_end_smoke():
+    report = loadbench.run(students=3, submissions=2, tests=3, delay=0.0, error_rate=0.1, poll=0.005, timeout=30)
+    assert report["verdicts"] == {"OK": 6}
+    assert report["latency_ms"]["p50"] is not None and report["throughput_per_s"] > 0
+    assert report["queries"]["web"] > 0 and report["queries"]["worker"] > 0
@@ -0,0 +1,72 @@
+import logging
+import time
+
+from app.execengine_client import get_client
+from app.extensions import db
+from app.services import judging, metrics
+
+
+def test_metrics_endpoint_reports_requests_and_sql(client, task):
+    resp = client.post("/submit", data={"task_id": task.id, "code": "print(int(input()) * 2)"})
+    assert resp.status_code == 202
+    assert "db;dur=" in resp.headers["Server-Timing"]
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE execschool_http_request_duration_seconds histogram" in body
+    assert 'execschool_http_requests_total{method="POST",endpoint="main.submit",status="202"}' in body
+    assert 'execschool_http_request_db_queries_count{endpoint="main.submit"}' in body
+    assert "execschool_db_query_duration_seconds_count" in body
+
+
+def test_metrics_token(app, client):
+    app.config["METRICS_TOKEN"] = "s3cret"
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_execengine_calls_are_timed(app, task, student):
+    before = {op: metrics.ee_calls.count(op, "201" if op == "submit" else "200")
+              for op in ("login", "submit", "poll_many")}
+    sub = judging.enqueue(student.id, task, "print(int(input()) * 2)", 71)
+    for _ in range(200):
+        judging.run_once()
+        db.session.expire_all()
+        if not sub.is_pending:
+            break
+        time.sleep(0.02)
+    assert metrics.ee_calls.count("login", "200") > before["login"]
+    assert metrics.ee_calls.count("submit", "201") > before["submit"]
+    assert metrics.ee_calls.count("poll_many", "200") > before["poll_many"]
+
+
+def test_slow_request_log_has_breakdown(app, student, caplog):
+    @app.get("/_slow")
+    def slow():
+        get_client().submit_batch(language_id=71, source_code="print(1)", tests=[{"stdin": "", "expected_output": "1\n"}])
+        return "ok"
+
+    app.config["SLOW_REQUEST_MS"] = 1e-6
+    with caplog.at_level(logging.WARNING, logger="app.services.metrics"):
+        assert app.test_client().get("/_slow").status_code == 200
+    message = next(r.getMessage() for r in caplog.records if "slow request" in r.getMessage())
+    assert "GET /_slow" in message and "db " in message
+    assert "execengine login" in message and "execengine submit" in message
+
+
+def test_failed_statement_does_not_skew_sql_timing(app):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    stats = metrics.RequestStats()
+    token = metrics._current.set(stats)
+    try:
+        with db.engine.connect() as conn:
+            try:
+                conn.execute(text("select * from no_such_table"))
+            except OperationalError:
+                pass
+            conn.execute(text("select 1"))
+            assert not [k for k in conn.info if k.startswith("execschool")]
+    finally:
+        metrics._current.reset(token)
+    assert stats.queries == 1
@@ -0,0 +1,23 @@
+from app.testing import microbench
+
+
+def test_benchmarks_run_on_small_fixtures():
+    results = microbench.run(scale=0.01, rounds=1, min_time=0)
+    assert set(results) == set(microbench.BENCHMARKS)
+    assert all(r["min_s"] > 0 for r in results.values())
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"benchmarks": {"fast": {"min_s": 1.0}, "slow": {"min_s": 1.0}}}
+    results = {"fast": {"min_s": 1.1}, "slow": {"min_s": 1.5}, "new": {"min_s": 2.0}}
+    rows = {r["name"]: r for r in microbench.compare(results, baseline, threshold=25)}
+    assert not rows["fast"]["regression"] and rows["slow"]["regression"]
+    assert rows["new"]["change_pct"] is None and not rows["new"]["regression"]
+
+
+def test_main_exits_nonzero_on_regression(tmp_path):
+    path = tmp_path / "baseline.json"
+    microbench.save_baseline({"score_accepted": {"min_s": 1e-12, "median_s": 1e-12}}, str(path))
+    argv = ["score_accepted", "--baseline", str(path), "--rounds", "1", "--min-time", "0"]
+    assert microbench.main(argv + ["--threshold", "10"]) == 1
+    assert microbench.main(argv + ["--threshold", "1e15"]) == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from app.execengine_client import ExecEngineClientV2
+from app.extensions import db
+from app.models import Submission
+from app.services import judging
+from app.testing.fake_execengine import create_fake_app, serve_in_thread
+
+
+@pytest.fixture
+def make_fake():
+    servers = []
+
+    def make(**kw):
+        fake = create_fake_app(**kw)
+        server, base_url = serve_in_thread(fake)
+        servers.append(server)
+        return fake, ExecEngineClientV2(base_url, username="admin", password="admin")
+
+    yield make
+    for server in servers:
+        server.shutdown()
+
+
+def _submit_many(task, student, n):
+    return [judging.enqueue(student.id, task, f"print(int(input()) * 2)  # {i}", 71) for i in range(n)]
+
+
+@pytest.mark.parametrize("multi_status, expected_polls", [(True, 1), (False, 6)])
+def test_one_tick_polls_all_pending_batches(app, task, student, make_fake, multi_status, expected_polls):
+    fake, ee = make_fake(multi_status=multi_status)
+    app.config["EE_MAX_CONCURRENT_SUBMISSIONS"] = 10
+    strategy = judging.get_completion()
+    subs = _submit_many(task, student, 6)
+
+    judging.dispatch_queued(ee, strategy, limit=10)
+    strategy.initial_s = 0  # все батчи созрели к одному тику
+    for s in subs:
+        strategy.track(s.batches[0].batch_token)
+
+    assert judging.collect_running(ee, strategy) == 6
+    assert fake.extensions["fake_execengine"]["polls"] == expected_polls
+    db.session.expire_all()
+    assert {s.status for s in Submission.query.all()} == {"OK"}
+
+
+def test_new_client_shuts_down_old_pool(app):
+    from app.services.poller import get_poller
+
+    first = get_poller(ExecEngineClientV2("http://127.0.0.1:9", username="a", password="a"))
+    second = get_poller(ExecEngineClientV2("http://127.0.0.1:9", username="a", password="a"))
+    assert second is not first
+    with pytest.raises(RuntimeError):
+        first._pool.submit(print)
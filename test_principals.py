@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.services import principals
+
+
+@contextmanager
+def _count_queries():
+    seen = []
+
+    def on_execute(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    try:
+        yield seen
+    finally:
+        event.remove(db.engine, "before_cursor_execute", on_execute)
+
+
+def test_load_skips_db_until_student_changes(app, student):
+    with app.test_request_context():
+        principals.remember(principals.Principal.of(student))
+        with _count_queries() as seen:
+            p = principals.load(student.id)
+        assert seen == [] and p.full_name == "Иванов Иван" and p.get_id() == str(student.id)
+
+        student.full_name = "Иванов Иван Иванович"
+        db.session.commit()  # flush сбрасывает кеш и выданные claims
+        with _count_queries() as seen:
+            assert principals.load(student.id).full_name == "Иванов Иван Иванович"
+        assert len(seen) == 1
+        with _count_queries() as seen:
+            principals.load(student.id)
+        assert seen == []
+
+        principals.forget()
+        with _count_queries() as seen:
+            principals.load(student.id)  # claims нет, но есть кеш процесса
+        assert seen == [] and principals.get_cache().hits == 1
+
+        db.session.delete(student)
+        db.session.commit()
+        assert principals.load(student.id) is None
+
+
+def test_login_issues_claims(app, student):
+    c = app.test_client()
+    c.post("/auth/login", data={"code": student.auth_code})
+    with c.session_transaction() as s:
+        assert s["principal"]["id"] == student.id and s["principal"]["group_id"] == student.group_id
+    c.get("/auth/logout")
+    with c.session_transaction() as s:
+        assert "principal" not in s
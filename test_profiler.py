@@ -0,0 +1,68 @@
+import os
+import signal
+import threading
+import time
+
+from app.services import profiler
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def _with_busy_thread(fn):
+    stop = threading.Event()
+    t = threading.Thread(target=_busy_loop, args=(stop,))
+    t.start()
+    try:
+        return fn()
+    finally:
+        stop.set()
+        t.join()
+
+
+def test_sampling_writes_collapsed_stacks(tmp_path):
+    prof = profiler.SamplingProfiler(interval_s=0.001, out_dir=str(tmp_path))
+    run = _with_busy_thread(lambda: (prof.start(0.2), prof.start(0.2))[0])
+    assert run is not None and prof.current is run  # второй запуск не начался
+    assert run.done.wait(5)
+    lines = open(run.path, encoding="utf-8").read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy_loop_(test_profiler.py" in line for line in lines)
+    assert not any("threading.py" in line.rsplit(";", 1)[-1] for line in lines)  # ожидание отброшено
+
+
+def test_admin_endpoint(app, client, tmp_path):
+    profiler.get_profiler().out_dir = str(tmp_path)
+    assert client.post("/admin/api/profile?seconds=0.1").status_code == 403
+
+    resp = _with_busy_thread(lambda: client.post("/admin/api/profile?seconds=0.2&wait=1", headers=ADMIN))
+    assert resp.status_code == 200 and "_busy_loop" in resp.get_data(as_text=True)
+
+    resp = client.post("/admin/api/profile?seconds=0.3", headers=ADMIN)
+    assert resp.status_code == 202 and resp.get_json()["pid"] == os.getpid()
+    assert client.post("/admin/api/profile?seconds=0.3", headers=ADMIN).status_code == 409
+    assert profiler.get_profiler().current.done.wait(5)
+
+    names = [p["name"] for p in client.get("/admin/api/profiles", headers=ADMIN).get_json()]
+    assert resp.get_json()["file"] in names and len(names) == 2
+    assert client.get(f"/admin/api/profiles/{names[0]}", headers=ADMIN).status_code == 200
+    assert client.get("/admin/api/profiles/..%2Fsecret.folded", headers=ADMIN).status_code == 404
+
+
+def test_signal_starts_profile(app, tmp_path):
+    prof = profiler.get_profiler()
+    prof.out_dir = str(tmp_path)
+    old = signal.getsignal(signal.SIGUSR2)
+    try:
+        profiler.install_signal_handler("SIGUSR2")
+        profiler._signal_seconds = 0.05
+        os.kill(os.getpid(), signal.SIGUSR2)
+        time.sleep(0.01)
+        assert prof.current is not None and prof.current.done.wait(5)
+        assert os.path.exists(prof.current.path)
+    finally:
+        signal.signal(signal.SIGUSR2, old)
@@ -1,14 +1,30 @@
-import pytest
+# test_queue.py — батчи через ExecEngine v2 по HTTP.
+# По умолчанию — локальный фейковый ExecEngine (app/testing/fake_execengine.py), сеть не нужна;
+# настоящий сервер: EXECENGINE_TEST_URL=http://host:8000/v2 (и EXECENGINE_TEST_USER/EXECENGINE_TEST_PASSWORD).
+import os
+
 import httpx
+import pytest
+
+from app.testing.fake_execengine import create_fake_app, judge_expected, serve_in_thread
+
 
-API_URL = "http://wiosna97.fvds.ru:8000/v2"
+@pytest.fixture(scope="module")
+def api_url():
+    url = os.environ.get("EXECENGINE_TEST_URL")
+    if url:
+        yield url.rstrip("/")
+        return
+    server, base_url = serve_in_thread(create_fake_app(judge=judge_expected))
+    yield f"{base_url}/v2"
+    server.shutdown()
 
-@pytest.mark.asyncio
-async def test_simple_batch_submission():
+@pytest.mark.anyio
+async def test_simple_batch_submission(api_url):
     print()
     user_data = {
-        "username": "test",
-        "password": "test"
+        "username": os.environ.get("EXECENGINE_TEST_USER", "test"),
+        "password": os.environ.get("EXECENGINE_TEST_PASSWORD", "test")
     }
     batch_data = {"submissions": []}
     submission_data = {
@@ -30,22 +46,22 @@ async def test_simple_batch_submission():
         batch_data["submissions"].append(submission_data)
     async with httpx.AsyncClient() as client:
         print("Тест 1: Создание пакетной отправки")
-        resp = await client.post(f"{API_URL}/auth/login/", json=user_data)
+        resp = await client.post(f"{api_url}/auth/login/", json=user_data)
         assert resp.status_code == 200, f"Auth error: {resp.text}"
         tokens = resp.json()
         access_token = tokens["access_token"]
         
         headers = {"Authorization": f"Bearer {access_token}"}
-        resp = await client.post(f"{API_URL}/submissions/batch/", json=batch_data, headers=headers)
+        resp = await client.post(f"{api_url}/submissions/batch/", json=batch_data, headers=headers)
         assert resp.status_code == 201, resp.text
         print(f"Результаты теста: HTTP {resp.status_code} => {resp.json()['batch_token']}")
 
-@pytest.mark.asyncio
-async def test_complex_batch_submission():
+@pytest.mark.anyio
+async def test_complex_batch_submission(api_url):
     print()
     user_data = {
-        "username": "test",
-        "password": "test"
+        "username": os.environ.get("EXECENGINE_TEST_USER", "test"),
+        "password": os.environ.get("EXECENGINE_TEST_PASSWORD", "test")
     }
     batch_data = {"submissions": []}
     submission_data = {
@@ -67,12 +83,12 @@ async def test_complex_batch_submission():
         batch_data["submissions"].append(submission_data)
     async with httpx.AsyncClient() as client:
         print("Тест 2: Создание пакетной отправки")
-        resp = await client.post(f"{API_URL}/auth/login/", json=user_data)
+        resp = await client.post(f"{api_url}/auth/login/", json=user_data)
         assert resp.status_code == 200, f"Auth error: {resp.text}"
         tokens = resp.json()
         access_token = tokens["access_token"]
         
         headers = {"Authorization": f"Bearer {access_token}"}
-        resp = await client.post(f"{API_URL}/submissions/batch/", json=batch_data, headers=headers)
+        resp = await client.post(f"{api_url}/submissions/batch/", json=batch_data, headers=headers)
         assert resp.status_code == 201, resp.text
         print(f"Результаты теста: HTTP {resp.status_code} => {resp.json()['batch_token']}")
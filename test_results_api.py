@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Submission
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+def _subs(student, task, n):
+    base = datetime(2025, 10, 1, 12, 0, 0)
+    for i in range(n):
+        db.session.add(Submission(student_id=student.id, task_id=task.id, code=f"# {i}",
+                                  status="OK" if i % 2 else "WA", score=i, created_at=base + timedelta(minutes=i)))
+    db.session.commit()
+
+
+def test_keyset_pages_cover_everything_once(client, student, task):
+    _subs(student, task, 7)
+    seen, cursor = [], None
+    while True:
+        resp = client.get("/admin/api/results.json", headers=ADMIN,
+                          query_string={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        seen += [r["id"] for r in resp.get_json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True) and len(set(seen)) == 7
+
+    ok = client.get("/admin/api/results.json", headers=ADMIN,
+                    query_string={"status": "OK", "since": "2025-10-01T12:02:00"}).get_json()
+    assert [r["score"] for r in ok] == [5, 3]
+    assert client.get("/admin/api/results.json?cursor=***", headers=ADMIN).status_code == 400
+
+
+def test_rows_without_created_at_are_paged_last(client, student, task):
+    _subs(student, task, 3)
+    for i in range(3):
+        db.session.add(Submission(student_id=student.id, task_id=task.id, code=f"# old {i}", status="OK"))
+    db.session.flush()
+    Submission.query.filter(Submission.code.like("# old%")).update({"created_at": None}, synchronize_session=False)
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        resp = client.get("/admin/api/results.json", headers=ADMIN,
+                          query_string={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        seen += [(r["when"] is None, r["id"]) for r in resp.get_json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len({sid for _, sid in seen}) == 6
+    assert [when_null for when_null, _ in seen] == [False] * 3 + [True] * 3
+    assert [sid for null, sid in seen if null] == sorted((sid for null, sid in seen if null), reverse=True)
+
+
+def test_ndjson_streams_all_rows(client, student, task):
+    _subs(student, task, 5)
+    resp = client.get("/admin/api/results.json", headers=ADMIN,
+                      query_string={"format": "ndjson", "task_id": task.id})
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(lines) == 5 and lines[0]["student"] == student.full_name
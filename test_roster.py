@@ -0,0 +1,32 @@
+import io
+
+from app.extensions import db
+from app.models import Student, StudyGroup
+from app.services import roster
+
+
+def _csv(rows):
+    text = "full_name,auth_code\n" + "".join(f"{n},{c}\n" for n, c in rows)
+    return io.BytesIO(text.encode("utf-8-sig"))
+
+
+def test_import_upserts_in_chunks(app, student):
+    other = StudyGroup(name="ИВТ-102")
+    db.session.add(other)
+    db.session.commit()
+    rows = [("", student.auth_code), ("Петров Пётр", "жзиклм"), ("Сидоров", "ABCDEF"),
+            ("Кузнецов", "НОПРСТ"), ("Повтор", "ЖЗИКЛМ")]
+
+    dry = roster.import_csv(_csv(rows), other, dry_run=True, chunk=2)
+    assert (dry["created"], dry["updated"]) == (2, 1)
+    assert Student.query.count() == 1
+
+    stats = roster.import_csv(_csv(rows), other, chunk=2)
+    assert (stats["created"], stats["updated"], stats["rows"]) == (2, 1, 5)
+    assert [e.split(":")[0] for e in stats["errors"]] == ["Строка 3", "Строка 5"]
+    assert stats["rows_per_s"] > 0
+
+    db.session.expire_all()
+    moved = Student.query.filter_by(auth_code=student.auth_code).one()
+    assert moved.group_id == other.id and moved.full_name == "Иванов Иван"
+    assert Student.query.filter_by(group_id=other.id).count() == 3
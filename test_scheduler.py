@@ -0,0 +1,133 @@
+from app.extensions import db
+from app.models import Student, StudyGroup, Submission, SubmissionBatch, TaskTest
+from app.services import judging, scheduler
+
+
+def _student(code, group):
+    st = Student(full_name=code, group=group)
+    st.set_auth_code(code)
+    db.session.add(st)
+    return st
+
+
+def test_plan_chunks():
+    assert scheduler.plan_chunks(0, 50) == [(0, 0)]
+    assert scheduler.plan_chunks(120, 50) == [(0, 50), (50, 50), (100, 20)]
+
+
+def test_capacity_and_fair_share(app, task, student, fake_ee):
+    app.config["EE_MAX_CONCURRENT_SUBMISSIONS"] = 2
+    other_group = StudyGroup(name="ИВТ-102")
+    calm = _student("ЖЗИКЛМ", student.group)
+    stranger = _student("НОПРСТ", other_group)
+    db.session.commit()
+
+    spam = [judging.enqueue(student.id, task, f"print(int(input()) * 2)  # {i}", 71) for i in range(5)]
+    judging.enqueue(calm.id, task, "print(int(input()) * 2)  # calm", 71)
+    judging.enqueue(stranger.id, task, "print(int(input()) * 2)  # other", 71)
+
+    judging.dispatch_queued(judging.get_client(), judging.get_completion())
+    assert scheduler.running_batches() == 2
+    started = {s.student_id for s in Submission.query.filter_by(status="running")}
+    # по слоту: другой группе и первому студенту «своей» группы, а не пять подряд спамеру
+    assert stranger.id in started and len(started) == 2
+    assert spam[-1].status == "queued"
+
+    metrics = scheduler.queue_metrics(app.config)
+    assert metrics["queued"] == 5 and metrics["batches_running"] == 2
+
+
+def test_large_task_is_split_and_merged(app, task, student):
+    app.config["EE_MAX_BATCH_SIZE"] = 2
+    task.max_score = 90
+    task.tests.append(TaskTest(order=3, input_data="5\n", expected_output="10\n", points=0))
+    db.session.commit()
+
+    sub = judging.enqueue(student.id, task, "print(int(input()) * 2)", 71)
+    for _ in range(200):
+        judging.run_once()
+        db.session.expire_all()
+        if not db.session.get(Submission, sub.id).is_pending:
+            break
+    sub = db.session.get(Submission, sub.id)
+    assert [(b.first_test, b.n_tests) for b in sub.batches] == [(0, 2), (2, 1)]
+    assert sub.status == "OK"
+    assert len(judging.raw_results(sub)) == 3 and len(sub.result["tests"]) == 3
+    assert SubmissionBatch.query.filter(SubmissionBatch.results.isnot(None)).count() == 0
+
+
+def _judge(sub_id):
+    for _ in range(200):
+        judging.run_once()
+        db.session.expire_all()
+        if not db.session.get(Submission, sub_id).is_pending:
+            break
+    return db.session.get(Submission, sub_id)
+
+
+def test_fail_fast_stops_after_first_failure(app, task, student, fake_ee):
+    app.config["EE_FAIL_FAST_CHUNK"] = 1
+    task.judging_mode = "fail_fast"
+    task.max_score = 90
+    task.tests.append(TaskTest(order=0, input_data="5\n", expected_output="10\n", points=0))
+    db.session.commit()
+    state = fake_ee.extensions["fake_execengine"]
+
+    wrong = _judge(judging.enqueue(student.id, task, "print(0)", 71).id)
+    # открытый тест идёт первым и падает — скрытые не отправляем
+    assert state["submits"] == 1
+    assert wrong.status == "WA"
+    assert [b.status for b in wrong.batches] == ["done", "skipped", "skipped"]
+    assert [r["status"]["description"] for r in judging.raw_results(wrong)][1:] == ["Skipped", "Skipped"]
+    assert [t[0] for t in wrong.result["tests"]] == ["WA", "SKIP", "SKIP"]
+
+    right = _judge(judging.enqueue(student.id, task, "print(int(input()) * 2)", 71).id)
+    assert state["submits"] == 4
+    assert right.status == "OK" and len(judging.raw_results(right)) == 3
+
+
+def test_capacity_holds_across_concurrent_dispatchers(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    from app.models import Task
+    from app.testing import loadbench
+    from app.testing.fake_execengine import create_fake_app, judge_expected, serve_in_thread
+
+    server, base_url = serve_in_thread(create_fake_app(judge=judge_expected))
+    app = loadbench.make_app(f"sqlite:///{tmp_path / 'db.sqlite'}", base_url, str(tmp_path / "blobs"),
+                             max_concurrent=2)
+    try:
+        with app.app_context():
+            db.create_all()
+            task = db.session.get(Task, loadbench.seed(6, 1))
+            for st in Student.query.all():
+                judging.enqueue(st.id, task, f"print(input())  # {st.id}", 71)
+            db.session.remove()
+
+        counted = scheduler.running_batches
+
+        def slow_count():
+            n = counted()
+            time.sleep(0.2)  # оба воркера успели бы прочитать одно и то же число свободных слотов
+            return n
+
+        monkeypatch.setattr(scheduler, "running_batches", slow_count)
+
+        def dispatcher():
+            with app.app_context():
+                judging.dispatch_queued(judging.get_client(), judging.get_completion())
+                db.session.remove()
+
+        threads = [threading.Thread(target=dispatcher) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with app.app_context():
+            assert counted() == 2
+            assert Submission.query.filter_by(status="running").count() == 2
+    finally:
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
@@ -0,0 +1,85 @@
+import io
+import zipfile
+from xml.etree import ElementTree
+
+from app.extensions import db
+from app.models import BestScore, Module, Student, Submission
+from app.services import judging, scoreboard, spreadsheet
+
+OK = {"status": {"description": "Accepted"}}
+WA = {"status": {"description": "Wrong Answer"}}
+
+
+def _scored(student, task, results):
+    sub = judging.enqueue(student.id, task, f"# {len(results)} {results!r}", 71)
+    judging.finish(sub, {"results": results})
+    db.session.commit()
+    return sub
+
+
+def _best(student, task):
+    return db.session.get(BestScore, (student.id, task.id))
+
+
+def test_best_score_is_maintained_incrementally(app, task, student):
+    first = _scored(student, task, [dict(OK), dict(WA)])
+    assert _best(student, task).score == 50
+
+    best = _scored(student, task, [dict(OK), dict(OK)])
+    _scored(student, task, [dict(WA), dict(WA)])
+    assert (_best(student, task).score, _best(student, task).submission_id) == (100, best.id)
+
+    # лучшая отправка подешевела (rescore/правка) — пара пересчитывается
+    best.score = 10
+    db.session.commit()
+    assert (_best(student, task).score, _best(student, task).submission_id) == (50, first.id)
+
+    db.session.delete(first)
+    db.session.commit()
+    assert _best(student, task).score == 10
+
+    modules = scoreboard.modules_for()
+    (row,) = scoreboard.iter_matrix(modules, group_id=student.group_id)
+    assert row == (student.id, student.full_name, [10], 10)
+    (group_row,) = scoreboard.group_module_scores()
+    assert group_row.students == 1 and group_row.total_score == 10
+
+
+def test_rebuild_matches_incremental(app, task, student):
+    _scored(student, task, [dict(OK), dict(WA)])
+    best = _scored(student, task, [dict(OK), dict(OK)])
+    db.session.query(BestScore).delete()
+    db.session.commit()
+
+    assert scoreboard.rebuild() == 1
+    assert _best(student, task).submission_id == best.id
+    assert Submission.query.count() == 2
+
+
+def test_matrix_pages_and_exports(app, task, student):
+    extra = Module(discipline=task.module.discipline, name="Циклы", order=2)
+    db.session.add(extra)
+    for i in range(3):
+        st = Student(full_name=f"Яковлев {i}", group=student.group)
+        st.set_auth_code("ЯЯЯЯЯ" + "АБВ"[i])
+        db.session.add(st)
+    db.session.commit()
+    _scored(student, task, [dict(OK), dict(WA)])
+
+    modules = scoreboard.modules_for(task.module.discipline_id)
+    assert [name for _, name in modules] == ["Ввод-вывод", "Циклы"]
+    ids, total = scoreboard.students_page(student.group_id, page=1, per_page=2)
+    assert total == 4 and ids[0] == student.id
+    rows = list(scoreboard.iter_matrix(modules, student_ids=ids))
+    assert [r[2] for r in rows] == [[50, 0], [0, 0]]
+
+    header = ["ФИО", "Ввод-вывод", "Циклы", "Итого"]
+    matrix = [[name, *scores, t] for _, name, scores, t in scoreboard.iter_matrix(modules)]
+    csv_text = b"".join(spreadsheet.stream_csv(header, matrix)).decode("utf-8-sig")
+    assert csv_text.splitlines()[1] == "Иванов Иван,50,0,50"
+
+    xlsx = zipfile.ZipFile(io.BytesIO(b"".join(spreadsheet.stream_xlsx(header, matrix, "Сводка"))))
+    sheet = ElementTree.fromstring(xlsx.read("xl/worksheets/sheet1.xml"))
+    ns = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    assert len(sheet.findall(".//x:row", ns)) == 5
+    assert "[Content_Types].xml" in xlsx.namelist()
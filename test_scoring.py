@@ -0,0 +1,50 @@
+import base64
+from types import SimpleNamespace
+
+from app.extensions import db
+from app.models import Submission, TaskTest
+from app.services import judging
+from app.services.scoring import expand_tests, score_batch
+
+OK = {"status": {"id": 3, "description": "Accepted"}, "time": "0.012"}
+WA = {"status": {"id": 4, "description": "Wrong Answer"}, "time": "0.250",
+      "stdout": base64.b64encode(b"1").decode(), "expected_output": base64.b64encode(b"2").decode()}
+
+
+def _task(*tests, max_score=100):
+    return SimpleNamespace(max_score=max_score, checker="exact", judging_mode="full",
+                           tests=[SimpleNamespace(id=i + 1, points=p, group=g, hidden=True)
+                                  for i, (p, g) in enumerate(tests)])
+
+
+def test_points_and_groups():
+    task = _task((10, None), (30, "A"), (30, "A"), (30, None))
+    points, verdict, raw = score_batch(task, {"results": [dict(OK), dict(OK), dict(WA), dict(OK)]})
+    # группа A не прошла целиком — её 60 баллов не начисляются
+    assert (points, verdict) == (40, "PARTIAL")
+    assert [t["verdict"] for t in expand_tests(raw)] == ["OK", "OK", "WA", "OK"]
+    assert [t["points"] for t in expand_tests(raw)] == [10, 0, 0, 30]
+    assert expand_tests(raw)[2]["diff_at"] == 0 and "results" not in raw
+    assert raw["runtime_ms"] == 250
+
+    assert score_batch(_task((0, None), (0, None), (0, None)), {"results": [dict(OK)] * 3})[:2] == (100, "OK")
+    assert score_batch(_task((1, None), (1, None), (1, None)), {"results": [dict(OK), dict(OK), dict(WA)]})[0] == 66
+
+
+def test_rescore_uses_stored_results(app, task, student):
+    sub = judging.enqueue(student.id, task, "print(4)", 71)
+    judging.finish(sub, {"status": "FINISHED", "results": [dict(OK), dict(WA)]})
+    db.session.commit()
+    assert (sub.score, sub.status) == (50, "PARTIAL")
+    sub_id = sub.id
+
+    task.tests[0].points, task.tests[1].points = 20, 80
+    db.session.commit()
+    assert judging.rescore(dry_run=True)["changed"] == 1
+    assert judging.rescore() == {"seen": 1, "changed": 1, "skipped": 0}
+    sub = db.session.get(Submission, sub_id)
+    assert sub.score == 20 and sub.runtime_ms == 250
+
+    task.tests.append(TaskTest(order=3, input_data="1\n", expected_output="2\n", points=10))
+    db.session.commit()
+    assert judging.rescore()["skipped"] == 1
@@ -0,0 +1,56 @@
+import json
+import zipfile
+
+from app.extensions import db
+from app.models import Task, TaskTest
+from app.services import catalog, tasks_loader
+
+
+def _package(root, name="double", **meta):
+    pkg = root / name
+    (pkg / "tests").mkdir(parents=True)
+    meta = {"discipline": "Программирование", "module": "Ввод-вывод", "title": "Удвоение",
+            "points": [10, 20, 30], "visible": [1], "groups": {"big": [2, 3]}, **meta}
+    (pkg / "task.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    (pkg / "statement.md").write_text("Выведите 2*n", encoding="utf-8")
+    for n, x in enumerate((2, 21, 1000), start=1):
+        (pkg / "tests" / f"{n:02}.in").write_text(f"{x}\n")
+        (pkg / "tests" / f"{n:02}.out").write_text(f"{2 * x}\n")
+    return pkg
+
+
+def test_import_is_idempotent_by_hash(app, tmp_path):
+    pkg = _package(tmp_path)
+    stats = tasks_loader.import_path(str(tmp_path))
+    assert (stats["created"], stats["errors"]) == (1, [])
+
+    task = Task.query.filter_by(package="double").one()
+    tests = TaskTest.query.filter_by(task_id=task.id).order_by(TaskTest.order).all()
+    assert [(t.input_data, t.expected_output, t.points, t.hidden, t.group) for t in tests] == [
+        ("2\n", "4\n", 10, False, None), ("21\n", "42\n", 20, True, "big"), ("1000\n", "2000\n", 30, True, "big")]
+    assert task.description == "Выведите 2*n" and task.tests_version == 1
+    assert catalog.get(task.id).tests[2].points == 30
+
+    assert tasks_loader.import_path(str(pkg))["unchanged"] == 1
+
+    (pkg / "tests" / "03.out").write_text("2001\n")
+    assert tasks_loader.import_path(str(pkg))["updated"] == 1
+    db.session.expire_all()
+    assert TaskTest.query.filter_by(task_id=task.id).count() == 3
+    assert task.tests_version == 2
+    assert TaskTest.query.filter_by(task_id=task.id, order=3).one().expected_output == "2001\n"
+
+
+def test_import_zip_reports_broken_packages(app, tmp_path):
+    good = _package(tmp_path / "src", "good")
+    _package(tmp_path / "src", "bad", checker="regex")
+    archive = tmp_path / "tasks.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for path in sorted((tmp_path / "src").rglob("*")):
+            if path.is_file():
+                zf.write(path, path.relative_to(tmp_path / "src").as_posix())
+
+    stats = tasks_loader.import_path(str(archive))
+    assert stats["created"] == 1
+    assert [e.split(":")[0] for e in stats["errors"]] == ["bad"]
+    assert Task.query.filter_by(package=good.name).one().title == "Удвоение"
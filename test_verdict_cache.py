@@ -0,0 +1,128 @@
+from app.extensions import db
+from app.models import Submission, TaskTest
+from app.services import judging
+from app.services.verdict_cache import normalize_source
+
+CODE = "print(int(input()) * 2)\n"
+
+
+def _state(fake_ee):
+    return fake_ee.extensions["fake_execengine"]
+
+
+def _drain():
+    for _ in range(200):
+        judging.run_once()
+        if not Submission.query.filter(Submission.status.in_(("queued", "running"))).count():
+            return
+    raise AssertionError("queue did not drain")
+
+
+def test_normalize_source_ignores_line_endings_and_trailing_space():
+    assert normalize_source("a = 1  \r\nprint(a)\n\n") == normalize_source("a = 1\nprint(a)")
+
+
+def test_identical_submissions_share_one_batch_and_reuse_verdict(app, task, student, fake_ee):
+    first = judging.enqueue(student.id, task, CODE, 71)
+    second = judging.enqueue(student.id, task, CODE.replace("\n", "\r\n"), 71)
+    assert first.cache_key == second.cache_key
+    _drain()
+    assert _state(fake_ee)["submits"] == 1
+
+    third = judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    assert _state(fake_ee)["submits"] == 1
+    db.session.expire_all()
+    assert {s.status for s in (first, second, third)} == {"OK"}
+    assert third.result["cached_from"] in (first.id, second.id)
+
+
+def test_editing_tests_invalidates_cache(app, task, student, fake_ee):
+    judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    version = task.tests_version
+
+    task.tests.append(TaskTest(order=3, input_data="5\n", expected_output="10\n", points=0))
+    db.session.commit()
+    assert task.tests_version == version + 1
+
+    judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    assert _state(fake_ee)["submits"] == 2
+
+
+def test_stale_catalog_snapshot_does_not_reuse_old_verdict(app, task, student, fake_ee):
+    from app.services.catalog import TaskInfo
+
+    old = judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    stale = TaskInfo.of(task)  # снимок соседнего gunicorn-воркера, ещё до правки
+
+    task.tests[0].expected_output = "3\n"
+    db.session.commit()
+    assert stale.tests_version < task.tests_version
+
+    sub = judging.enqueue(student.id, task=stale, code=CODE, language_id=71)
+    _drain()
+    db.session.expire_all()
+    assert sub.cache_key != old.cache_key
+    assert _state(fake_ee)["submits"] == 2
+    assert "cached_from" not in (sub.result or {})
+
+
+def test_queued_submission_is_rekeyed_at_dispatch(app, task, student, fake_ee):
+    old = judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    queued = judging.enqueue(student.id, task, CODE, 71)
+    assert queued.cache_key == old.cache_key  # ещё в очереди, а тесты правят
+
+    task.tests[0].expected_output = "3\n"
+    db.session.commit()
+    _drain()
+    db.session.expire_all()
+    assert queued.cache_key != old.cache_key
+    assert _state(fake_ee)["submits"] == 2
+
+
+def test_stale_key_in_queue_does_not_get_running_twin_verdict(app, task, student, fake_ee):
+    from app.services.catalog import TaskInfo
+
+    stale = TaskInfo.of(task)
+    running = judging.enqueue(student.id, task, CODE, 71)
+    judging.run_once()  # ушла в ExecEngine по старым тестам
+    task.tests[0].expected_output = "3\n"
+    db.session.commit()
+
+    late = judging.enqueue(student.id, task=stale, code=CODE, language_id=71)
+    assert late.cache_key == running.cache_key
+    accepted = {"status": {"id": 3, "description": "Accepted"}}
+    judging.finish(running, {"status": "FINISHED", "results": [accepted, accepted]})  # раньше тика воркера
+    assert running.status == "OK"
+    assert late.status == "queued"
+
+
+def test_changing_max_score_invalidates_cache(app, task, student, fake_ee):
+    first = judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    task.max_score = 10
+    db.session.commit()
+
+    second = judging.enqueue(student.id, task, CODE, 71)
+    _drain()
+    db.session.expire_all()
+    assert first.score == 100 and second.score == 10
+    assert "cached_from" not in second.result
+
+
+def test_twins_of_running_check_do_not_block_the_queue(app, task, student, fake_ee):
+    strategy = judging.get_completion()
+    original = judging.enqueue(student.id, task, CODE, 71)
+    judging.dispatch_queued(judging.get_client(), strategy)
+    assert original.status == "running"
+
+    twins = [judging.enqueue(student.id, task, CODE + f"\n{' ' * i}", 71) for i in range(5)]
+    other = judging.enqueue(student.id, task, "print(int(input()) + int(input()) * 0 + 0)", 71)
+    judging.dispatch_queued(judging.get_client(), strategy, limit=3)
+    db.session.expire_all()
+    assert other.status == "running"
+    assert {t.status for t in twins} == {"queued"}